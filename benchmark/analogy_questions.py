@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from evaluation_framework.embeddingStore import EmbeddingStore
+from evaluation_framework.txt_dataManager import SemanticAnalogiesDataManager
+
+"""
+It measures the time needed to intersect the questions of a semantic analogies dataset with the vectors, for
+increasing numbers of questions. The chunked lookup of the data manager is compared with the previous implementation:
+a lookup of each word followed by a scan of the found questions for each question, which is quadratic in the number
+of questions and is measured on the smaller datasets only.
+"""
+
+n_entities = 100000
+vector_size = 20
+question_counts = [1000, 10000, 100000]
+# largest dataset on which the quadratic implementation is measured
+max_scan_size = 10000
+
+
+def generate_store():
+    rng = np.random.RandomState(0)
+    names = ["http://example.org/entity_" + str(i) for i in range(n_entities)]
+    return EmbeddingStore(names, rng.rand(n_entities, vector_size))
+
+
+def generate_questions(directory, n_questions):
+    rng = np.random.RandomState(n_questions)
+    entities = rng.randint(0, n_entities, (n_questions, 4))
+    # a tenth of the questions contain an entity without a vector
+    missing = rng.rand(n_questions) < 0.1
+    filename = os.path.join(directory, "questions_%d.txt" % n_questions)
+    with open(filename, "w") as f:
+        for question, is_missing in zip(entities, missing):
+            words = ["http://example.org/entity_" + str(i) for i in question]
+            if is_missing:
+                words[3] = "http://example.org/missing"
+            f.write(" ".join(words) + "\n")
+    return filename
+
+
+def scan_intersection(store, filename):
+    full_data = []
+    with open(filename) as f:
+        for line in f:
+            full_data.append(line.rstrip().split())
+
+    words = list(set(word for x in full_data for word in x))
+    found = dict(zip(words, store.lookup(words) >= 0))
+    data = [x for x in full_data if all(found[word] for word in x)]
+    ignored = [x for x in full_data if not x in data]
+
+    indices = store.lookup([word for row in data for word in row]).reshape(-1, 4)
+    return indices, ignored
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def run_benchmark():
+    store = generate_store()
+    # the index of the vocabulary is built before the measures
+    store.lookup(["http://example.org/entity_0"])
+    data_manager = SemanticAnalogiesDataManager(False)
+
+    results = list()
+    with tempfile.TemporaryDirectory() as directory:
+        for n_questions in question_counts:
+            filename = generate_questions(directory, n_questions)
+            result = {"questions": n_questions}
+            if n_questions <= max_scan_size:
+                result["scan"] = measure(scan_intersection, store, filename)
+            result["chunked_lookup"] = measure(
+                data_manager.intersect_vectors_goldStandard,
+                store,
+                None,
+                vector_size,
+                filename,
+            )
+            results.append(result)
+
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.4f"))
+
+
+if __name__ == "__main__":
+    run_benchmark()
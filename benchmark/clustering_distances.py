@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from evaluation_framework.Clustering.clustering_model import (
+    ClusteringModel,
+    get_distances,
+    get_scaled_data,
+)
+
+"""
+It measures the time needed to fit the clustering models on a dataset, for increasing numbers of entities: each model
+standardizes the vectors and computes their distances itself, or the vectors are standardized once and their
+distances are computed once and shared by the hierarchical clusterings. The time of the metrics is not included.
+The vectors are drawn around a few centres.
+"""
+
+entity_counts = [1000, 2500, 5000]
+vector_size = 20
+n_clusters = 3
+model_names = ["DB", "KMeans", "AC", "WHC"]
+metrics = ["cosine", "euclidean"]
+repetitions = 3
+
+
+def generate_dataset(n_entities):
+    rng = np.random.RandomState(n_entities)
+    centres = rng.randn(n_clusters, vector_size)
+    clusters = rng.randint(0, n_clusters, n_entities)
+    merged = pd.DataFrame(
+        centres[clusters] + 0.3 * rng.randn(n_entities, vector_size)
+    )
+    merged.insert(0, "cluster", clusters)
+    merged.insert(0, "name", ["entity_" + str(i) for i in range(n_entities)])
+    return merged
+
+
+def separate_fit(merged, metric):
+    for model_name in model_names:
+        model = ClusteringModel("Clustering", model_name, metric, n_clusters, False)
+        model.fit_labels(get_scaled_data(merged))
+
+
+def shared_fit(merged, metric):
+    data = get_scaled_data(merged)
+    distances = get_distances(data, metric)
+    for model_name in model_names:
+        model = ClusteringModel("Clustering", model_name, metric, n_clusters, False)
+        model.fit_labels(data, distances)
+
+
+def measure(function, *args):
+    times = list()
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_benchmark():
+    results = list()
+    for n_entities in entity_counts:
+        merged = generate_dataset(n_entities)
+        for metric in metrics:
+            results.append(
+                {
+                    "entities": n_entities,
+                    "metric": metric,
+                    "separate": measure(separate_fit, merged, metric),
+                    "shared": measure(shared_fit, merged, metric),
+                }
+            )
+
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.4f"))
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore")
+    run_benchmark()
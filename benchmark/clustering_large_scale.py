@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from evaluation_framework.Clustering.clustering_model import (
+    ClusteringModel,
+    get_distances,
+    get_neighbours_graph,
+    get_scaled_data,
+)
+
+"""
+It measures the time and the peak memory needed to fit the KMeans and the agglomerative clustering models on a
+dataset, for increasing numbers of entities: the exact models, which share the distances among all the vectors, or
+the large-scale models, which do not need them. The exact models are measured
+on the smaller datasets only, as their memory grows with the square of the number of entities. The adjusted rand
+index of the clusterings with respect to the generated clusters is reported too.
+"""
+
+entity_counts = [2000, 5000, 20000]
+vector_size = 20
+n_clusters = 3
+model_names = ["KMeans", "AC", "WHC"]
+metric = "euclidean"
+# largest dataset on which the exact models are measured
+max_exact_size = 5000
+
+
+def generate_dataset(n_entities):
+    rng = np.random.RandomState(n_entities)
+    centres = rng.randn(n_clusters, vector_size)
+    clusters = rng.randint(0, n_clusters, n_entities)
+    merged = pd.DataFrame(centres[clusters] + 0.5 * rng.randn(n_entities, vector_size))
+    merged.insert(0, "cluster", clusters)
+    merged.insert(0, "name", ["entity_" + str(i) for i in range(n_entities)])
+    return merged
+
+
+def fit(merged, large_scale):
+    data = get_scaled_data(merged)
+    distances = None
+    connectivity = None
+    if large_scale:
+        connectivity = get_neighbours_graph(data, metric)
+    else:
+        distances = get_distances(data, metric)
+
+    ignored = merged.iloc[:0]
+    scores = list()
+    for model_name in model_names:
+        model = ClusteringModel(
+            "Clustering", model_name, metric, n_clusters, False, large_scale
+        )
+        result = model.train(merged, ignored, data, distances, connectivity)
+        scores.append(result["adjusted_rand_index"])
+    return min(scores)
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    elapsed = time.perf_counter() - start
+
+    # the memory is measured in a second run, as tracing the allocations slows the models down
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, value
+
+
+def run_benchmark():
+    results = list()
+    for n_entities in entity_counts:
+        merged = generate_dataset(n_entities)
+        for large_scale in [False, True]:
+            if not large_scale and n_entities > max_exact_size:
+                continue
+            elapsed, peak, score = measure(fit, merged, large_scale)
+            results.append(
+                {
+                    "entities": n_entities,
+                    "large_scale": large_scale,
+                    "time_s": elapsed,
+                    "peak_MB": peak / 2 ** 20,
+                    "min_adjusted_rand_index": score,
+                }
+            )
+
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.2f"))
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore")
+    run_benchmark()
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from sklearn import metrics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from evaluation_framework.Clustering.clustering_model import get_clustering_scores
+
+"""
+It measures the time needed to compute the scores of a clustering, for increasing numbers of entities: the six sklearn
+metrics, each building its own contingency table, and the clustering accuracy filled sample by sample, or all the
+scores from a single contingency table. The predicted clusters contain a share of DBSCAN noise entities, each one a
+cluster on its own.
+"""
+
+entity_counts = [1000, 10000, 20000]
+n_classes = 10
+n_clusters = 20
+# share of the entities which are noise for DBSCAN
+noise_share = 0.1
+
+
+def generate_labels(n_entities):
+    rng = np.random.RandomState(n_entities)
+    true_labels = rng.randint(0, n_classes, n_entities)
+    labels = rng.randint(0, n_clusters, n_entities)
+    noise = rng.rand(n_entities) < noise_share
+    labels[noise] = np.arange(n_clusters, n_clusters + np.count_nonzero(noise))
+    return true_labels, labels.astype(np.float64)
+
+
+def separate_scores(true_labels, labels):
+    scores = [
+        metrics.adjusted_rand_score(true_labels, labels),
+        metrics.adjusted_mutual_info_score(true_labels, labels),
+        metrics.homogeneity_score(true_labels, labels),
+        metrics.completeness_score(true_labels, labels),
+        metrics.v_measure_score(true_labels, labels),
+        metrics.normalized_mutual_info_score(true_labels, labels),
+    ]
+
+    y_true = np.array(true_labels, np.int64)
+    y_pred = np.array(labels, np.int64)
+    D = max(y_pred.max(), y_true.max()) + 1
+    w = np.zeros((D, D), dtype=np.int64)
+    for i in range(y_pred.size):
+        w[y_pred[i], y_true[i]] += 1
+    row_indices, col_indices = linear_sum_assignment(w.max() - w)
+    scores.append(
+        float(sum([w[i, j] for i, j in zip(row_indices, col_indices)])) / y_pred.size
+    )
+    return scores
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def run_benchmark():
+    results = list()
+    for n_entities in entity_counts:
+        true_labels, labels = generate_labels(n_entities)
+        results.append(
+            {
+                "entities": n_entities,
+                "predicted_clusters": len(np.unique(labels)),
+                "separate": measure(separate_scores, true_labels, labels),
+                "single_table": measure(get_clustering_scores, true_labels, labels),
+            }
+        )
+
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.4f"))
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore")
+    run_benchmark()
@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from evaluation_framework.compactVocabulary import CompactVocabulary
+
+"""
+It measures the memory used by the vocabulary of the entity names and the time needed to look up a gold standard in
+it, for increasing numbers of entities. The compact vocabulary is compared with the previous structures: a list of
+the names and a dictionary from each name to its row.
+The names imitate the quoted triples of RDF-star, which are much longer than the IRIs of the entities.
+"""
+
+entity_counts = [100000, 1000000]
+gold_size = 1000
+
+
+def generate_names(n_entities):
+    return [
+        "<< <http://example.org/entity_%d> <http://example.org/property_%d> "
+        "<http://example.org/entity_%d> >>" % (i, i % 100, i + 1)
+        for i in range(n_entities)
+    ]
+
+
+def dictionary_vocabulary(names):
+    return list(names), {name: idx for idx, name in enumerate(names)}
+
+
+def measure_memory(function):
+    tracemalloc.start()
+    result = function()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def run_benchmark():
+    results = list()
+    for n_entities in entity_counts:
+        # the names are encoded and decoded again, so that the measured memory contains only the structures
+        encoded = [name.encode("utf-8") for name in generate_names(n_entities)]
+        rng = np.random.RandomState(0)
+        keys = [
+            encoded[i].decode("utf-8") for i in rng.randint(0, n_entities, gold_size)
+        ]
+
+        (names, vocab), dict_memory, _ = measure_memory(
+            lambda: dictionary_vocabulary([name.decode("utf-8") for name in encoded])
+        )
+        del names, vocab
+        # tracing the memory slows down the allocations, so the time is measured separately
+        decoded = [name.decode("utf-8") for name in encoded]
+        start = time.perf_counter()
+        names, vocab = dictionary_vocabulary(decoded)
+        dict_time = time.perf_counter() - start
+        dict_lookup = measure(lambda: [vocab.get(key, -1) for key in keys])
+        del names, vocab
+
+        vocabulary, _, compact_peak = measure_memory(
+            lambda: CompactVocabulary.from_names(
+                [name.decode("utf-8") for name in encoded]
+            )
+        )
+        start = time.perf_counter()
+        vocabulary = CompactVocabulary.from_names(decoded)
+        # the first lookup builds the index of the hashes
+        vocabulary.lookup(keys[:1])
+        compact_time = time.perf_counter() - start
+        compact_lookup = measure(vocabulary.lookup, keys)
+        del decoded
+
+        results.append(
+            {
+                "entities": n_entities,
+                "names_MB": vocabulary.buffer.nbytes / 2 ** 20,
+                "dict_MB": dict_memory / 2 ** 20,
+                "compact_MB": vocabulary.nbytes / 2 ** 20,
+                "compact_build_peak_MB": compact_peak / 2 ** 20,
+                "dict_build_s": dict_time,
+                "compact_build_s": compact_time,
+                "dict_lookup_s": dict_lookup,
+                "compact_lookup_s": compact_lookup,
+            }
+        )
+
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.4f"))
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import DBSCAN
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from evaluation_framework.Clustering.clustering_model import (
+    RadiusNeighbours,
+    get_scaled_data,
+)
+
+"""
+It measures the time needed to fit DBSCAN for the grid of eps and min_samples values of the DBSCAN sweep of the
+Clustering task, for increasing numbers of entities: DBSCAN is fit from scratch for each setting, or all the settings
+are derived from the neighbours of the vectors computed once. It also checks that the labels are the same.
+"""
+
+entity_counts = [1000, 2500, 5000]
+vector_size = 20
+n_clusters = 3
+metrics = ["cosine", "euclidean"]
+
+
+def generate_data(n_entities):
+    rng = np.random.RandomState(n_entities)
+    centres = rng.randn(n_clusters, vector_size)
+    clusters = rng.randint(0, n_clusters, n_entities)
+    merged = pd.DataFrame(centres[clusters] + rng.randn(n_entities, vector_size))
+    merged.insert(0, "cluster", clusters)
+    merged.insert(0, "name", ["entity_" + str(i) for i in range(n_entities)])
+    return get_scaled_data(merged)
+
+
+def run_benchmark():
+    results = list()
+    for n_entities in entity_counts:
+        data = generate_data(n_entities)
+        for metric in metrics:
+            start = time.perf_counter()
+            neighbours = RadiusNeighbours(data, metric)
+            sweep_labels = [
+                neighbours.fit_labels(eps, min_samples)
+                for eps, min_samples in neighbours.settings
+            ]
+            sweep_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            refit_labels = [
+                DBSCAN(eps=eps, min_samples=min_samples, metric=metric)
+                .fit(data)
+                .labels_
+                for eps, min_samples in neighbours.settings
+            ]
+            refit_time = time.perf_counter() - start
+
+            results.append(
+                {
+                    "entities": n_entities,
+                    "metric": metric,
+                    "settings": len(neighbours.settings),
+                    "refit": refit_time,
+                    "sweep": sweep_time,
+                    "same_labels": all(
+                        np.array_equal(a, b) for a, b in zip(sweep_labels, refit_labels)
+                    ),
+                }
+            )
+
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.4f"))
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore")
+    run_benchmark()
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from evaluation_framework.embeddingStore import EmbeddingStore
+
+"""
+It measures the time needed to intersect a gold standard with the vectors kept in memory, for increasing sizes of the
+gold standard. The index of the embedding store is compared with the previous implementations: an inner merge
+followed by an outer merge to find the ignored entities, and a lookup of each entity in a dictionary.
+The index is built at the first intersection, so its building time is reported separately.
+"""
+
+n_entities = 2000000
+vector_size = 20
+gold_sizes = [100, 1000, 10000, 100000]
+
+
+def generate_vectors():
+    rng = np.random.RandomState(0)
+    names = ["http://example.org/entity_" + str(i) for i in range(n_entities)]
+    W = rng.rand(n_entities, vector_size).astype(np.float32)
+    return names, W
+
+
+def generate_gold_standard(names, size):
+    rng = np.random.RandomState(size)
+    gold = pd.DataFrame(
+        {"name": rng.choice(names, size), "label": rng.randint(0, 5, size)}
+    )
+    # a tenth of the entities are missing from the vectors
+    gold.loc[: size // 10, "name"] = "http://example.org/missing"
+    return gold
+
+
+def merge_intersection(vectors_df, gold):
+    merged = pd.merge(gold, vectors_df, on="name", how="inner")
+    outputLeftMerge = pd.merge(gold, vectors_df, how="outer", indicator=True)
+    ignored = outputLeftMerge[outputLeftMerge["_merge"] == "left_only"][gold.columns]
+    return merged, ignored
+
+
+def dictionary_intersection(store, gold):
+    vocab = {name: idx for idx, name in enumerate(store.names)}
+    keys = gold["name"]
+    found = np.fromiter((key in vocab for key in keys), dtype=bool, count=len(keys))
+
+    positions = np.flatnonzero(found)
+    codes = pd.factorize(keys)[0]
+    positions = positions[np.argsort(codes[positions], kind="stable")]
+    rows = [vocab[key] for key in keys.iloc[positions]]
+
+    vectors = pd.DataFrame(store.matrix[rows], columns=range(store.vector_size))
+    merged = pd.concat([gold.iloc[positions].reset_index(drop=True), vectors], axis=1)
+    ignored = gold[~found].reset_index(drop=True)
+    return merged, ignored
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def run_benchmark():
+    names, W = generate_vectors()
+    vectors_df = pd.DataFrame(W)
+    vectors_df.insert(0, "name", names)
+
+    store = EmbeddingStore(names, W, dtype="float32")
+    index_building = measure(store.lookup, names[:1])
+
+    results = list()
+    for size in gold_sizes:
+        gold = generate_gold_standard(names, size)
+        results.append(
+            {
+                "gold_size": size,
+                "two_merges": measure(merge_intersection, vectors_df, gold),
+                "dictionary": measure(dictionary_intersection, store, gold),
+                "index": measure(store.merge, gold),
+            }
+        )
+
+    print("Vectors: %d, index building: %.4f seconds" % (n_entities, index_building))
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.4f"))
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", FutureWarning)
+    run_benchmark()
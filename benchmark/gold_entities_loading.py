@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from evaluation_framework.evaluationManager import EvaluationManager
+from evaluation_framework.txt_dataManager import DataManager
+
+"""
+It measures the memory and the time needed to read a TXT vectors file, for increasing numbers of entities: all the
+vectors are read, or only the ones of the entities of the gold standards of the tasks which do not need all of them.
+The file contains the entities of the gold standards and random entities. The first load reads the gold entities and
+writes the cache, the following ones read the gold entities or all the vectors from the cache.
+"""
+
+entity_counts = [100000, 1000000]
+vector_size = 100
+tasks = [
+    "Classification",
+    "Regression",
+    "Clustering",
+    "DocumentSimilarity",
+    "EntityRelatedness",
+]
+
+
+def write_vectors(filename, gold_entities, n_entities):
+    rng = np.random.RandomState(0)
+    names = list(gold_entities) + [
+        "http://example.org/entity_" + str(i)
+        for i in range(n_entities - len(gold_entities))
+    ]
+    with open(filename, "w", encoding="utf-8") as f:
+        for start in range(0, len(names), 10000):
+            W = rng.rand(min(10000, len(names) - start), vector_size)
+            for name, vector in zip(names[start : start + 10000], W):
+                f.write(name + " " + " ".join("%.6f" % x for x in vector) + "\n")
+
+
+def measure(function):
+    start = time.perf_counter()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return time.perf_counter() - start, peak
+
+
+def run_benchmark():
+    data_manager = DataManager(False)
+    evaluation_manager = EvaluationManager(data_manager, False)
+    gold_entities = evaluation_manager.get_gold_standard_entities(
+        evaluation_manager.create_evaluators(tasks, "cosine", 2)
+    )
+
+    results = list()
+    with tempfile.TemporaryDirectory() as directory:
+        for n_entities in entity_counts:
+            filename = os.path.join(directory, "vectors_%d.txt" % n_entities)
+            write_vectors(filename, gold_entities, n_entities)
+
+            first_time, first_peak = measure(
+                lambda: data_manager.initialize_vectors(
+                    filename, vector_size, gold_entities
+                )
+            )
+            gold_time, gold_peak = measure(
+                lambda: data_manager.initialize_vectors(
+                    filename, vector_size, gold_entities
+                )
+            )
+            all_time, all_peak = measure(
+                lambda: data_manager.initialize_vectors(filename, vector_size)
+            )
+            results.append(
+                {
+                    "entities": n_entities,
+                    "gold_entities": len(gold_entities),
+                    "first_peak_MB": first_peak / 2 ** 20,
+                    "all_peak_MB": all_peak / 2 ** 20,
+                    "gold_peak_MB": gold_peak / 2 ** 20,
+                    "first_s": first_time,
+                    "all_s": all_time,
+                    "gold_s": gold_time,
+                }
+            )
+            for name in os.listdir(directory):
+                os.remove(os.path.join(directory, name))
+
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.2f"))
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", FutureWarning)
+    run_benchmark()
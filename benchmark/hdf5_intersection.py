@@ -0,0 +1,131 @@
+import base64
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import h5py
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from evaluation_framework.hdf5_dataManager import ClassificationDataManager
+
+"""
+It measures the time needed to intersect a gold standard with the vectors of an HDF5 file, for increasing sizes
+of the gold standard. Both the layout with a dataset for each entity and the consolidated layout are measured,
+together with the previous implementation which appended a row at a time to the merged dataframe.
+"""
+
+n_entities = 50000
+vector_size = 100
+gold_sizes = [100, 1000, 10000, 50000]
+# the row-by-row implementation is quadratic, so it is measured only on the smallest gold standards
+max_rowwise_size = 1000
+
+
+def generate_files(directory):
+    rng = np.random.RandomState(0)
+    names = ["http://example.org/entity_" + str(i) for i in range(n_entities)]
+    W = rng.rand(n_entities, vector_size).astype(np.float32)
+
+    legacy_filename = os.path.join(directory, "legacy.h5")
+    with h5py.File(legacy_filename, "w") as vector_file:
+        vector_group = vector_file.create_group("Vectors")
+        for name, vector in zip(names, W):
+            key = base64.b32encode(name.encode("utf-8")).decode("ascii")
+            vector_group.create_dataset(key, data=vector[np.newaxis, :])
+
+    consolidated_filename = os.path.join(directory, "consolidated.h5")
+    ClassificationDataManager(False).write_vector_file(
+        consolidated_filename, names, W
+    )
+
+    return names, legacy_filename, consolidated_filename
+
+
+def generate_gold_standard(directory, names, size):
+    rng = np.random.RandomState(size)
+    gold = pd.DataFrame(
+        {
+            "DBpedia_URI15": rng.choice(names, size),
+            "label": rng.randint(0, 5, size),
+        }
+    )
+    # a tenth of the entities are missing from the vectors file
+    gold.loc[: size // 10, "DBpedia_URI15"] = "http://example.org/missing"
+
+    filename = os.path.join(directory, "gold_" + str(size) + ".tsv")
+    gold.to_csv(filename, sep="\t", index=False)
+    return filename
+
+
+def rowwise_intersection(data_manager, vector_filename, goldStandard_filename):
+    vector_file = h5py.File(vector_filename, "r")
+    vector_group = vector_file["Vectors"]
+
+    gold = data_manager.read_file(goldStandard_filename, ["DBpedia_URI15", "label"])
+    gold.rename(columns={"DBpedia_URI15": "name"}, inplace=True)
+
+    merged = pd.DataFrame(columns=data_manager.create_header(vector_size))
+    ignored = list()
+
+    for row in gold.itertuples():
+        encoded_name = data_manager._to_hdf5_key(row.name)
+        if encoded_name in vector_group:
+            values = vector_group[encoded_name][0]
+
+            new_row = dict(zip(np.arange(vector_size), values))
+            new_row["name"] = row.name
+            new_row["label"] = row.label
+
+            merged = merged.append(new_row, ignore_index=True)
+        else:
+            ignored.append(row.name)
+
+    vector_file.close()
+    return merged, pd.DataFrame(ignored, columns=["name"])
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def run_benchmark():
+    data_manager = ClassificationDataManager(False)
+
+    with tempfile.TemporaryDirectory() as directory:
+        names, legacy_filename, consolidated_filename = generate_files(directory)
+
+        results = list()
+        for size in gold_sizes:
+            gold_filename = generate_gold_standard(directory, names, size)
+
+            result = {"gold_size": size}
+            if size <= max_rowwise_size and hasattr(pd.DataFrame, "append"):
+                result["rowwise"] = measure(
+                    rowwise_intersection, data_manager, legacy_filename, gold_filename
+                )
+            for layout, vector_filename in [
+                ("per_entity", legacy_filename),
+                ("consolidated", consolidated_filename),
+            ]:
+                result[layout] = measure(
+                    data_manager.intersect_vectors_goldStandard,
+                    None,
+                    vector_filename,
+                    vector_size,
+                    gold_filename,
+                )
+            results.append(result)
+
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.4f"))
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", FutureWarning)
+    run_benchmark()
@@ -0,0 +1,167 @@
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from evaluation_framework.embeddingStore import available_dtypes
+from evaluation_framework.hdf5_dataManager import DataManager as Hdf5DataManager
+from evaluation_framework.manager import FrameworkManager
+from evaluation_framework.txt_dataManager import DataManager as TxtDataManager
+
+"""
+It evaluates a TXT vectors file, and the same vectors converted to a consolidated HDF5 file, with each precision of the
+vectors kept in memory and compares the scores with the ones computed in float64 from the same format. It reports the
+memory of the matrix, the execution time and the largest difference of the scores of each format and precision, and
+it fails if a difference exceeds the tolerance.
+The models which are not deterministic (the decision and model trees) are not compared.
+"""
+
+# models whose scores change from run to run
+random_models = ["C45", "M5"]
+# columns of the results which are not scores
+ignored_columns = ["coverage", "tot_answers", "tot_candidates", "recall_at_k"]
+# data manager of each format of the vectors file
+data_managers = {"txt": TxtDataManager, "hdf5": Hdf5DataManager}
+
+
+def convert_to_hdf5(vector_filename, vector_size, hdf5_filename):
+    store = TxtDataManager(False, "float64").initialize_vectors(
+        vector_filename, vector_size
+    )
+    Hdf5DataManager(False, "float64").write_vector_file(
+        hdf5_filename, store.names, store.matrix
+    )
+
+
+def evaluate(vector_filename, vector_format, vector_size, tasks, dtype, result_directory):
+    start = time.perf_counter()
+    FrameworkManager().evaluate(
+        vector_filename,
+        vector_file_format=vector_format,
+        vector_size=vector_size,
+        tasks=tasks,
+        compare_with=[],
+        result_directory_path=result_directory,
+        dtype=dtype,
+    )
+    return time.perf_counter() - start
+
+
+def read_scores(result_directory):
+    scores = dict()
+    for filename in sorted(glob.glob(os.path.join(result_directory, "*_results.csv"))):
+        results = pd.read_csv(filename)
+        if "model_name" in results.columns:
+            results = results[~results["model_name"].isin(random_models)]
+        columns = [
+            column
+            for column in results.select_dtypes(include=[np.number]).columns
+            if column not in ignored_columns
+        ]
+        scores[os.path.basename(filename)] = results[columns].to_numpy(dtype=np.float64)
+    return scores
+
+
+def max_difference(scores, reference_scores):
+    # the errors of the regression are not bounded, so the differences are relative to the scores larger than 1
+    difference = 0.0
+    for filename, reference in reference_scores.items():
+        values = scores[filename]
+        if values.shape != reference.shape:
+            return np.inf
+        both_nan = np.isnan(values) & np.isnan(reference)
+        if values.size > 0:
+            difference = max(
+                difference,
+                float(
+                    np.max(
+                        np.where(
+                            both_nan,
+                            0,
+                            np.abs(values - reference)
+                            / np.maximum(1, np.abs(reference)),
+                        )
+                    )
+                ),
+            )
+    return difference
+
+
+def run_benchmark(vector_filename, vector_size, tasks, tolerance):
+    results = list()
+    with tempfile.TemporaryDirectory() as directory:
+        filenames = {
+            "txt": vector_filename,
+            "hdf5": os.path.join(directory, "vectors.h5"),
+        }
+        convert_to_hdf5(vector_filename, vector_size, filenames["hdf5"])
+
+        for vector_format, filename in filenames.items():
+            scores = dict()
+            for dtype in ["float64"] + [d for d in available_dtypes if d != "float64"]:
+                result_directory = os.path.join(directory, vector_format + "_" + dtype)
+                elapsed = evaluate(
+                    filename, vector_format, vector_size, tasks, dtype, result_directory
+                )
+                scores[dtype] = read_scores(result_directory)
+                store = data_managers[vector_format](False, dtype).initialize_vectors(
+                    filename, vector_size
+                )
+                results.append(
+                    {
+                        "format": vector_format,
+                        "dtype": dtype,
+                        "matrix_MB": store.matrix.nbytes / 2 ** 20,
+                        "time_s": elapsed,
+                        "max_difference": max_difference(
+                            scores[dtype], scores["float64"]
+                        ),
+                    }
+                )
+
+    results = pd.DataFrame(results)
+    print(results.to_string(index=False, float_format="%.6g"))
+    return bool((results["max_difference"] <= tolerance).all())
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("vector_filename", help="TXT file of the vectors to evaluate")
+    parser.add_argument("vector_size", type=int, help="size of the vectors")
+    parser.add_argument(
+        "--tasks",
+        nargs="+",
+        default=[
+            "Classification",
+            "Regression",
+            "Clustering",
+            "DocumentSimilarity",
+            "EntityRelatedness",
+            "SemanticAnalogies",
+        ],
+        help="tasks to evaluate",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.05,
+        help="largest difference of the scores with respect to float64 (relative to the scores larger than 1)",
+    )
+    arguments = parser.parse_args()
+
+    if not run_benchmark(
+        arguments.vector_filename,
+        arguments.vector_size,
+        arguments.tasks,
+        arguments.tolerance,
+    ):
+        sys.exit("The scores differ from the float64 ones more than the tolerance.")
@@ -1,12 +1,14 @@
 from sklearn.naive_bayes import GaussianNB
 from sklearn.neighbors import KNeighborsClassifier
-from sklearn.model_selection import cross_val_score
+from sklearn.model_selection import cross_validate
 from sklearn.svm import SVC
 from sklearn import tree
 import numpy as np
 from evaluation_framework.abstract_model import AbstractModel
 
 float_precision = 15
+# number of folds of the cross-validation
+n_splits = 10
 
 """
 Model of the classification task
@@ -53,17 +55,19 @@ class ClassificationModel(AbstractModel):
     """
     It trains the model based on the provided data
     
-    data: dataframe with entity name as first column, class label as second column and the vectors starting from the third column
+    X: matrix containing the vectors of the entities
+    y: array containing the class labels of the entities
+    folds: list of (train, test) arrays of row positions, one for each fold of the cross-validation
+    n_jobs: number of jobs used to run the cross-validation, None to run it in this process
     
     It returns the result object reporting the task name, the model name and its configuration - if any -, and the accuracy as evaluation metric.
     """
 
-    def train(self, data):
+    def train(self, X, y, folds, n_jobs=None):
         if self.debugging_mode:
             print("Classification training...")
         scoring = "accuracy"
-        n_splits = 10
-        n_samples = data.shape[0]
+        n_samples = len(y)
         if n_splits > n_samples:
             raise ValueError(
                 (
@@ -73,9 +77,9 @@ class ClassificationModel(AbstractModel):
                 + "\n"
             )
 
-        scores = cross_val_score(
-            self.model, data.iloc[:, 2:], data["label"], cv=n_splits, scoring=scoring
-        )
+        scores = cross_validate(
+            self.model, X, y, cv=folds, scoring=scoring, n_jobs=n_jobs
+        )["test_score"]
         scoring_value = np.mean(scores)
         if self.debugging_mode:
             print(
@@ -87,3 +91,113 @@ class ClassificationModel(AbstractModel):
             "model_configuration": self.configuration,
             scoring: round(scoring_value, float_precision),
         }
+
+
+"""
+Model of the classification task which trains SVM models with different C values on the same data.
+For each fold, the RBF kernel is computed once and shared by all the C values, instead of being computed by each 
+SVM model.
+"""
+
+
+class SVMSweepModel(AbstractModel):
+    """
+    It initialize the model of the classification task
+
+    task_name: name of the task
+    C_values: list of the C values of the SVM models
+    debugging_mode: {TRUE, FALSE}, TRUE to run the model by reporting all the errors and information; FALSE otherwise
+    """
+
+    def __init__(self, task_name, C_values, debugging_mode):
+        self.name = "SVM"
+        self.C_values = list(C_values)
+        self.debugging_mode = debugging_mode
+        self.task_name = task_name
+
+        if self.debugging_mode:
+            print("Classification SVM sweep model initialized")
+
+    """
+    It returns the squared euclidean distances among the vectors, computed as libsvm does for the RBF kernel. 
+    The rounding errors of nearly identical vectors can make them slightly negative, so they are clipped at 0.
+    
+    X: matrix containing the vectors of the entities
+    """
+
+    @staticmethod
+    def get_squared_distances(X):
+        X = np.asarray(X, dtype=np.float64)
+        squared_norms = np.einsum("ij,ij->i", X, X)
+        distances = squared_norms[:, np.newaxis] + squared_norms[np.newaxis, :] - 2 * X.dot(X.T)
+        return np.maximum(distances, 0, out=distances)
+
+    """
+    It trains the SVM models based on the provided data
+    
+    X: matrix containing the vectors of the entities
+    y: array containing the class labels of the entities
+    folds: list of (train, test) arrays of row positions, one for each fold of the cross-validation
+    distances: squared distances among the vectors, as returned by get_squared_distances. If None, they are 
+        computed for each fold.
+    
+    It returns a list with a result object for each C value, reporting the task name, the model name and its 
+    configuration, and the accuracy as evaluation metric.
+    """
+
+    def train(self, X, y, folds, distances=None):
+        if self.debugging_mode:
+            print("Classification SVM sweep training...")
+        scoring = "accuracy"
+        n_samples = len(y)
+        if n_splits > n_samples:
+            raise ValueError(
+                (
+                    "Classification : Cannot have number of splits n_splits={0} greater"
+                    " than the number of samples: {1}."
+                ).format(n_splits, n_samples)
+                + "\n"
+            )
+
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        scores = np.zeros((len(self.C_values), len(folds)))
+
+        for fold, (train, test) in enumerate(folds):
+            if distances is None:
+                fold_distances = self.get_squared_distances(
+                    np.concatenate([X[train], X[test]])
+                )
+                train_distances = fold_distances[: len(train), : len(train)]
+                test_distances = fold_distances[len(train) :, : len(train)]
+            else:
+                train_distances = distances[np.ix_(train, train)]
+                test_distances = distances[np.ix_(test, train)]
+
+            # gamma='scale' of SVC, computed on the training vectors
+            X_var = X[train].var()
+            gamma = 1.0 / (X.shape[1] * X_var) if X_var != 0 else 1.0
+
+            train_kernel = np.exp(-gamma * train_distances)
+            test_kernel = np.exp(-gamma * test_distances)
+
+            for i, C_value in enumerate(self.C_values):
+                model = SVC(C=C_value, kernel="precomputed")
+                model.fit(train_kernel, y[train])
+                scores[i, fold] = np.mean(model.predict(test_kernel) == y[test])
+
+        results = list()
+        for i, C_value in enumerate(self.C_values):
+            configuration = "C=" + str(C_value)
+            scoring_value = np.mean(scores[i])
+            if self.debugging_mode:
+                print("Classification", self.name, configuration, scoring, scoring_value)
+            results.append(
+                {
+                    "task_name": self.task_name,
+                    "model_name": self.name,
+                    "model_configuration": configuration,
+                    scoring: round(scoring_value, float_precision),
+                }
+            )
+        return results
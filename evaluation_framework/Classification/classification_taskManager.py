@@ -5,12 +5,17 @@ import pandas as pd
 
 from evaluation_framework.Classification.classification_model import (
     ClassificationModel as Model,
+    SVMSweepModel,
+    n_splits,
 )
 from evaluation_framework.abstract_taskManager import AbstractTaskManager
+from evaluation_framework.embeddingStore import EmbeddingStore
 from numpy import mean
 from typing import List
 
 task_name = "Classification"
+# maximum number of entities of a dataset for which the distances among the vectors are kept by the SVM sweep
+max_cached_distances = 5000
 
 """
 Manager of the Classification task
@@ -18,7 +23,16 @@ Manager of the Classification task
 
 
 class ClassificationManager(AbstractTaskManager):
-    def __init__(self, data_manager, debugging_mode: bool, datasets: List[str] = None):
+    split_into_units = True
+
+    def __init__(
+        self,
+        data_manager,
+        debugging_mode: bool,
+        datasets: List[str] = None,
+        n_jobs: int = None,
+        svm_sweep: bool = False,
+    ):
         """Constructor
 
         Parameters
@@ -29,11 +43,21 @@ class ClassificationManager(AbstractTaskManager):
             {TRUE, FALSE}, TRUE to run the model by reporting all the errors and information; FALSE otherwise
         datasets: List[str] or None
             None if all datasets shall be evaluated. Specific datasets can also be named using this parameter.
+        n_jobs: int or None
+            Number of jobs used by the cross-validation of each model. None to run it in the same process.
+        svm_sweep: bool
+            True to train the SVM models with all the C values in the same unit of work, computing the kernel once
+            for each fold; False to train each SVM model in its own unit of work. The kernel computed once differs
+            from the one of libsvm in the last digits, which can change a few predictions of the models with the
+            largest C values (100, 1000): their accuracy can differ by about 0.002 from the one of the separate
+            models. Default: False
         """
         super().__init__()
         self.debugging_mode = debugging_mode
         self.data_manager = data_manager
         self.datasets = datasets
+        self.n_jobs = n_jobs
+        self.svm_sweep = svm_sweep
         if self.debugging_mode:
             print("Classification task manager initialized.")
 
@@ -45,25 +69,48 @@ class ClassificationManager(AbstractTaskManager):
     def get_task_name():
         return task_name
 
+    """
+    It returns the names of the entities of the datasets used as gold standard, i.e. the only entities whose vectors 
+    are used by the task.
+    """
+
+    def get_gold_standard_entities(self):
+        if self.datasets is not None:
+            gold_standard_filenames = self.datasets
+        else:
+            gold_standard_filenames = self.get_gold_standard_file()
+
+        entities = set()
+        for gold_standard_filename in gold_standard_filenames:
+            gold = self.data_manager.read_file(
+                ClassificationManager.get_file_for_dataset(gold_standard_filename), ["name"]
+            )
+            entities.update(gold["name"])
+        return entities
+
     """
     It evaluates the Classification task.
+    Each combination of dataset, shuffle of the dataset and model configuration is a unit of work, which is run by 
+    the task scheduler if provided. In SVM sweep mode, all the SVM configurations of a shuffle are a single unit.
     
-    vectors: dataframe which contains the vectors data
+    vectors: embedding store which contains the vectors data
     vector_file: path of the vector file
     vector_size: size of the vectors
     results_folder: directory where the results must be stored
     log_dictionary: dictionary to store all the information to store in the log file
     scores_dictionary: dictionary to store all the scores which will be used in the comparison phase
+    scheduler: task scheduler running the units of work, or None to run them in this process
     """
 
     def evaluate(
         self,
-        vectors: pd.DataFrame,
+        vectors: EmbeddingStore,
         vector_file: str,
         vector_size,
         results_folder,
         log_dictionary,
         scores_dictionary,
+        scheduler=None,
     ):
         log_errors = ""
 
@@ -75,32 +122,26 @@ class ClassificationManager(AbstractTaskManager):
         else:
             gold_standard_filenames = self.get_gold_standard_file()
 
+        classification_model_names = ["NB", "KNN", "C45"]
+        SVM_configurations = [
+            pow(10, -3),
+            pow(10, -2),
+            0.1,
+            1.0,
+            10.0,
+            pow(10, 2),
+            pow(10, 3),
+        ]
+
+        units = list()
+        data_coverages = dict()
         for gold_standard_filename in gold_standard_filenames:
             gold_standard_file = ClassificationManager.get_file_for_dataset(
                 gold_standard_filename
             )
 
-            classification_model_names = ["NB", "KNN", "C45"]
-            SVM_configurations = [
-                pow(10, -3),
-                pow(10, -2),
-                0.1,
-                1.0,
-                10.0,
-                pow(10, 2),
-                pow(10, 3),
-            ]
-
-            scores = defaultdict(list)
-            totalscores_element = defaultdict(list)
-
-            data, ignored = self.data_manager.intersect_vectors_goldStandard(
-                vectors=vectors,
-                vector_filename=vector_file,
-                vector_size=vector_size,
-                goldStandard_filename=gold_standard_file,
-                column_key="name",
-                column_score="label"
+            data, ignored = self.get_data(
+                vectors, vector_file, vector_size, gold_standard_filename
             )
             data_coverage = len(data) / (len(data) + len(ignored))
 
@@ -118,56 +159,140 @@ class ClassificationManager(AbstractTaskManager):
                         + gold_standard_file
                     )
             else:
+                data_coverages[gold_standard_filename] = data_coverage
                 for i in range(10):
-                    data = data.sample(frac=1, random_state=i).reset_index(drop=True)
                     for model_name in classification_model_names:
-                        # initialize the model
-                        model = Model(task_name, model_name, self.debugging_mode)
-                        # train and print score
-                        try:
-                            result = model.train(data)
-                            result["gold_standard_file"] = gold_standard_filename
-                            result["coverage"] = data_coverage
-                            scores[model_name].append(result)
-                            totalscores_element[model_name].append(result)
-                        except Exception as e:
-                            log_errors += (
-                                "File used as gold standard: "
-                                + gold_standard_filename
-                                + "\n"
-                            )
-                            log_errors += "Classification method: " + model_name + "\n"
-                            log_errors += str(e) + "\n"
-
-                    for conf in SVM_configurations:
-                        # initialize the model
-                        model = Model(task_name, "SVM", self.debugging_mode, conf)
-                        # train and print score
-                        try:
-                            result = model.train(data)
-                            result["gold_standard_file"] = gold_standard_filename
-                            result["coverage"] = data_coverage
-                            scores["SVM"].append(result)
-                            totalscores_element["SVM_" + str(conf)].append(result)
-                        except Exception as e:
-                            log_errors += (
-                                "File used as gold standard: "
-                                + gold_standard_filename
-                                + "\n"
-                            )
-                            log_errors += (
-                                "Classification method: SVM " + str(conf) + "\n"
+                        units.append(
+                            (vector_file, vector_size, gold_standard_filename, i, model_name, None)
+                        )
+                    if self.svm_sweep:
+                        units.append(
+                            (vector_file, vector_size, gold_standard_filename, i, "SVM", tuple(SVM_configurations))
+                        )
+                    else:
+                        for conf in SVM_configurations:
+                            units.append(
+                                (vector_file, vector_size, gold_standard_filename, i, "SVM", conf)
                             )
-                            log_errors += str(e) + "\n"
 
-                self.storeResults(results_folder, gold_standard_filename, scores)
-                totalscores[gold_standard_filename] = totalscores_element
+        results = self.run_units("train_unit", units, vectors, scheduler)
+
+        scores = defaultdict(lambda: defaultdict(list))
+        totalscores_elements = defaultdict(lambda: defaultdict(list))
+        for unit, (unit_result, error) in zip(units, results):
+            _, _, gold_standard_filename, _, model_name, confs = unit
+            # an SVM sweep returns a result for each configuration
+            if isinstance(confs, tuple):
+                unit_results = zip(confs, unit_result or [None] * len(confs))
+            else:
+                unit_results = [(confs, unit_result)]
+
+            for conf, result in unit_results:
+                model_key = model_name if conf is None else "SVM_" + str(conf)
+
+                if error is None:
+                    result["gold_standard_file"] = gold_standard_filename
+                    result["coverage"] = data_coverages[gold_standard_filename]
+                    scores[gold_standard_filename][model_name].append(result)
+                    totalscores_elements[gold_standard_filename][model_key].append(result)
+                else:
+                    log_errors += (
+                        "File used as gold standard: " + gold_standard_filename + "\n"
+                    )
+                    if conf is None:
+                        log_errors += "Classification method: " + model_name + "\n"
+                    else:
+                        log_errors += "Classification method: SVM " + str(conf) + "\n"
+                    log_errors += str(error) + "\n"
+
+        for gold_standard_filename in data_coverages:
+            self.storeResults(
+                results_folder, gold_standard_filename, scores[gold_standard_filename]
+            )
+            totalscores[gold_standard_filename] = totalscores_elements[
+                gold_standard_filename
+            ]
+        self.clear_data()
+        self._distances = dict()
 
         results_df = self.resultsAsDataFrame(totalscores)
         scores_dictionary[task_name] = results_df
 
         log_dictionary[task_name] = log_errors
 
+    """
+    It trains a model on a shuffle of a dataset. It is a unit of work of the Classification task.
+    It returns the result object reporting the task name, the model name and its configuration - if any -, and the accuracy as evaluation metric.
+    
+    vectors: embedding store which contains the vectors data
+    vector_file: path of the vector file
+    vector_size: size of the vectors
+    gold_standard_filename: the dataset used as gold standard
+    shuffle: number of the shuffle of the dataset
+    model_name: name of the model
+    conf: C value of the SVM model, tuple of the C values of the SVM sweep, None for the other models
+    """
+
+    def train_unit(
+        self,
+        vectors,
+        vector_file,
+        vector_size,
+        gold_standard_filename,
+        shuffle,
+        model_name,
+        conf,
+    ):
+        X, y = self.get_features(
+            vectors, vector_file, vector_size, gold_standard_filename
+        )
+        folds = self.get_folds(
+            vectors,
+            vector_file,
+            vector_size,
+            gold_standard_filename,
+            shuffle,
+            n_splits,
+            True,
+        )
+
+        if isinstance(conf, tuple):
+            model = SVMSweepModel(task_name, conf, self.debugging_mode)
+            distances = self.get_distances(
+                vectors, vector_file, vector_size, gold_standard_filename
+            )
+            return model.train(X, y, folds, distances)
+
+        model = Model(task_name, model_name, self.debugging_mode, conf)
+        return model.train(X, y, folds, self.n_jobs)
+
+    """
+    It returns the squared distances among the vectors of the dataset used as gold standard, which are shared by 
+    all the folds and shuffles of the SVM sweep. They are computed once for each dataset, unless the dataset has more 
+    than max_cached_distances entities: in this case, None is returned and the distances are computed for each fold.
+    
+    vectors: embedding store which contains the vectors data
+    vector_file: path of the vector file
+    vector_size: size of the vectors
+    gold_standard_filename: the dataset used as gold standard
+    """
+
+    def get_distances(self, vectors, vector_file, vector_size, gold_standard_filename):
+        if not hasattr(self, "_distances"):
+            self._distances = dict()
+
+        if gold_standard_filename not in self._distances:
+            X, _ = self.get_features(
+                vectors, vector_file, vector_size, gold_standard_filename
+            )
+            if len(X) > max_cached_distances:
+                self._distances[gold_standard_filename] = None
+            else:
+                self._distances[
+                    gold_standard_filename
+                ] = SVMSweepModel.get_squared_distances(X)
+        return self._distances[gold_standard_filename]
+
     """
     It stores the entities which are in the dataset used as gold standard, but not in the input file.
     
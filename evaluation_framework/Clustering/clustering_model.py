@@ -1,12 +1,458 @@
+from math import log
+from sklearn import config_context
 from sklearn.preprocessing import StandardScaler
-from sklearn import metrics
-from sklearn.cluster import AgglomerativeClustering, DBSCAN, KMeans
+from sklearn.metrics import mutual_info_score
+from sklearn.cluster import AgglomerativeClustering, DBSCAN, KMeans, MiniBatchKMeans
+from sklearn.metrics.pairwise import pairwise_distances, pairwise_distances_chunked
+from sklearn.neighbors import NearestNeighbors, kneighbors_graph
 from scipy.optimize import linear_sum_assignment
+from scipy.cluster.hierarchy import linkage
+from scipy.spatial.distance import pdist
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+from scipy.special import gammaln
 import numpy as np
 import pandas as pd
 from evaluation_framework.abstract_model import AbstractModel
 
 float_precision = 15
+# names of the distance metrics of sklearn which scipy knows with a different name, as translated by sklearn itself
+# when it computes the average linkage
+scipy_metrics = {"l1": "cityblock", "manhattan": "cityblock", "l2": "euclidean"}
+# number of nearest neighbours of each vector which the large-scale ward hierarchical clustering can merge it with
+large_scale_neighbours = 10
+# number of vectors on which the large-scale agglomerative clustering with average linkage is computed
+large_scale_sample_size = 2000
+# memory in MB of each chunk of distances computed by the large-scale models, instead of the default of sklearn (1GB)
+large_scale_working_memory = 64
+# values of min_samples of the DBSCAN sweep
+dbscan_sweep_min_samples = [3, 5, 10]
+# quantiles of the distances of the vectors to their min_samples-th nearest vector (the vector itself included) which
+# are used as eps by the DBSCAN sweep, for each value of min_samples
+dbscan_sweep_quantiles = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+
+def get_scaled_data(merged: pd.DataFrame) -> np.ndarray:
+    """It returns the vectors of a dataset merged with the vectors, standardized as the clustering models use them.
+
+    Parameters
+    ----------
+    merged : pd.DataFrame
+        Dataframe with entity name as first column, cluster label as second column and the vectors starting from
+        the third column.
+
+    Returns
+    -------
+        Matrix with the standardized vector of each entity.
+    """
+    return StandardScaler().fit_transform(merged.iloc[:, 2:].values)
+
+
+def get_distances(data: np.ndarray, metric: str) -> np.ndarray:
+    """It computes the distances between all the pairs of vectors once, so that they are shared by the hierarchical
+    clusterings: the agglomerative clustering with average linkage and, with the euclidean metric, the ward
+    hierarchical clustering. They are computed with scipy, as the linkages of sklearn do.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Matrix with the standardized vector of each entity.
+    metric : str
+        Distance metric.
+
+    Returns
+    -------
+        Condensed distance matrix, as returned by scipy.spatial.distance.pdist, or None if the distances cannot be
+        computed with the metric or are not all finite (e.g. the cosine distance of a zero vector): the models then
+        compute them themselves.
+    """
+    try:
+        distances = pdist(data, metric=scipy_metrics.get(metric, metric))
+    except (ValueError, TypeError):
+        return None
+    if not np.all(np.isfinite(distances)):
+        return None
+    return distances
+
+
+def get_neighbours_graph(
+    data: np.ndarray, metric: str, n_neighbours: int = large_scale_neighbours
+):
+    """It computes the graph of the nearest neighbours of each vector, which constrains the merges of the large-scale
+    ward hierarchical clustering. It is sparse, so that the distances among all the vectors are not needed.
+    If the graph is not connected, its components are connected by the minimum spanning tree of one vector of each
+    component. Otherwise sklearn would connect the closest vectors of each pair of components, which needs the
+    distances among all their vectors.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Matrix with the standardized vector of each entity.
+    metric : str
+        Distance metric.
+    n_neighbours : int
+        Number of nearest neighbours of each vector.
+
+    Returns
+    -------
+        Sparse CSR matrix, with 1 for each vector and its nearest neighbours.
+    """
+    with config_context(working_memory=large_scale_working_memory):
+        graph = kneighbors_graph(
+            data, min(n_neighbours, len(data) - 1), metric=metric, include_self=False
+        )
+    n_components, components = connected_components(graph, directed=False)
+    if n_components > 1:
+        representatives = np.unique(components, return_index=True)[1]
+        # the distances are increased by 1, which does not change the tree, since a distance of 0 is not an edge
+        distances = pairwise_distances(data[representatives], metric=metric) + 1
+        np.fill_diagonal(distances, 0)
+        tree = minimum_spanning_tree(distances).tocoo()
+        bridges = coo_matrix(
+            (
+                np.ones(len(tree.row)),
+                (representatives[tree.row], representatives[tree.col]),
+            ),
+            shape=graph.shape,
+        )
+        graph = (graph + bridges).tocsr()
+    return graph
+
+
+def get_linkage_labels(linkage_matrix: np.ndarray, n_clusters: int) -> np.ndarray:
+    """It cuts a hierarchical clustering into clusters, as AgglomerativeClustering does: the clusters are the ones
+    before the last n_clusters - 1 merges.
+
+    Parameters
+    ----------
+    linkage_matrix : np.ndarray
+        Linkage matrix, as returned by scipy.cluster.hierarchy.linkage.
+    n_clusters : int
+        Number of clusters.
+
+    Returns
+    -------
+        Array with the cluster label of each vector, from 0 to n_clusters - 1.
+    """
+    n_samples = len(linkage_matrix) + 1
+    n_merges = n_samples - n_clusters
+    # the node created by the i-th merge is n_samples + i, and it is the parent of the two merged nodes
+    parent = np.arange(2 * n_samples - 1)
+    merged = linkage_matrix[:n_merges, :2].astype(np.int64)
+    parent[merged[:, 0]] = np.arange(n_samples, n_samples + n_merges)
+    parent[merged[:, 1]] = np.arange(n_samples, n_samples + n_merges)
+
+    # each node has a larger number than its children, so the roots are propagated from the last node
+    root = parent.copy()
+    for node in range(n_samples + n_merges - 1, -1, -1):
+        root[node] = root[parent[node]]
+    return np.unique(root[:n_samples], return_inverse=True)[1]
+
+
+def get_contingency_table(true_labels: np.ndarray, labels: np.ndarray):
+    """It counts the vectors of each cluster of the gold standard which are in each predicted cluster, as
+    sklearn.metrics.cluster.contingency_matrix does. The table is sparse, since each noise vector of DBSCAN is a
+    cluster on its own.
+
+    Parameters
+    ----------
+    true_labels : np.ndarray
+        Cluster label of each vector in the gold standard.
+    labels : np.ndarray
+        Predicted cluster label of each vector.
+
+    Returns
+    -------
+        Sparse CSR matrix with a row for each cluster of the gold standard and a column for each predicted cluster,
+        both sorted by label.
+    """
+    true_index = np.unique(true_labels, return_inverse=True)[1]
+    index = np.unique(labels, return_inverse=True)[1]
+    contingency = coo_matrix(
+        (np.ones(len(true_index), dtype=np.int64), (true_index, index)),
+        shape=(true_index.max() + 1, index.max() + 1),
+    ).tocsr()
+    contingency.sum_duplicates()
+    return contingency
+
+
+def get_entropy(counts: np.ndarray) -> float:
+    """It computes the entropy of a clustering from the number of vectors in each cluster, as
+    sklearn.metrics.cluster.entropy does from the labels."""
+    counts = counts[counts > 0].astype(np.float64)
+    if counts.size == 1:
+        return 0.0
+    total = np.sum(counts)
+    return -np.sum((counts / total) * (np.log(counts) - log(total)))
+
+
+def get_pairs(counts: np.ndarray) -> int:
+    """It counts the pairs of vectors which are in the same cell, given the number of vectors of each cell."""
+    counts = np.asarray(counts, dtype=np.int64)
+    return int(np.sum(counts * (counts - 1) // 2))
+
+
+def get_expected_mutual_information(
+    class_counts: np.ndarray, cluster_counts: np.ndarray, n_samples: int
+) -> float:
+    """It computes the expected mutual information of two clusterings with the given cluster sizes, drawn at random,
+    with the same formula of sklearn.metrics.adjusted_mutual_info_score, whose implementation is private in sklearn
+    and only takes the labels. Each term of the sum only depends on the sizes of a cluster of each clustering, so the predicted
+    clusters with the same size, e.g. the noise vectors of DBSCAN, are summed at once.
+
+    Parameters
+    ----------
+    class_counts : np.ndarray
+        Number of vectors in each cluster of the gold standard.
+    cluster_counts : np.ndarray
+        Number of vectors in each predicted cluster.
+    n_samples : int
+        Number of vectors.
+
+    Returns
+    -------
+        Expected mutual information.
+    """
+    class_counts = np.asarray(class_counts, dtype=np.int64)
+    sizes, multiplicity = np.unique(
+        np.asarray(cluster_counts, dtype=np.int64), return_counts=True
+    )
+    # any clustering with a single cluster has no information
+    if class_counts.size == 1 or np.asarray(cluster_counts).size == 1:
+        return 0.0
+
+    N = float(n_samples)
+    gln_b = gammaln(sizes + 1)
+    gln_Nb = gammaln(N - sizes + 1)
+    gln_N = gammaln(N + 1)
+
+    emi = 0.0
+    for a in class_counts:
+        # the number of vectors nij in common with a cluster of each size goes from start to end
+        start = np.maximum(a - n_samples + sizes, 1)
+        end = np.minimum(a, sizes)
+        lengths = np.maximum(end - start + 1, 0)
+        offsets = np.cumsum(lengths) - lengths
+        nij = (
+            np.arange(lengths.sum())
+            - np.repeat(offsets, lengths)
+            + np.repeat(start, lengths)
+        ).astype(np.float64)
+        b = np.repeat(sizes, lengths).astype(np.float64)
+
+        term1 = nij / N
+        term2 = np.log(N) + np.log(nij) - np.log(a) - np.log(b)
+        # term3 involves many factorials, so it is computed in log space to avoid overflows
+        gln = (
+            gammaln(a + 1)
+            + np.repeat(gln_b, lengths)
+            + gammaln(N - a + 1)
+            + np.repeat(gln_Nb, lengths)
+            - gln_N
+            - gammaln(nij + 1)
+            - gammaln(a - nij + 1)
+            - gammaln(b - nij + 1)
+            - gammaln(N - a - b + nij + 1)
+        )
+        emi += np.sum(np.repeat(multiplicity, lengths) * term1 * term2 * np.exp(gln))
+    return float(emi)
+
+
+def get_clustering_accuracy(contingency) -> float:
+    """It computes the clustering accuracy (ACC), i.e. the fraction of vectors in the predicted clusters matched to
+    the clusters of the gold standard by the Hungarian algorithm, so that the matched vectors are the most.
+
+    Parameters
+    ----------
+    contingency
+        Contingency table of the clustering, see get_contingency_table.
+
+    Returns
+    -------
+        Clustering accuracy.
+    """
+    table = contingency.toarray()
+    row_indices, col_indices = linear_sum_assignment(table, maximize=True)
+    return float(table[row_indices, col_indices].sum()) / table.sum()
+
+
+def get_clustering_scores(true_labels: np.ndarray, labels: np.ndarray) -> dict:
+    """It computes the scores of a clustering with respect to the gold standard from a single contingency table:
+    the adjusted rand index, the adjusted mutual information, the homogeneity, the completeness, the V-measure, the
+    normalized mutual information and the clustering accuracy. They are the same of the sklearn metrics, which build
+    the table again for each score, with the arithmetic mean of the entropies as normalizer of the mutual
+    information.
+
+    Parameters
+    ----------
+    true_labels : np.ndarray
+        Cluster label of each vector in the gold standard.
+    labels : np.ndarray
+        Predicted cluster label of each vector.
+
+    Returns
+    -------
+        Dictionary with the score names as keys and the scores as values.
+    """
+    n_samples = len(true_labels)
+    contingency = get_contingency_table(true_labels, labels)
+    n_classes, n_clusters = contingency.shape
+    class_counts = np.ravel(contingency.sum(axis=1))
+    cluster_counts = np.ravel(contingency.sum(axis=0))
+
+    mutual_info = mutual_info_score(None, None, contingency=contingency)
+    class_entropy = get_entropy(class_counts)
+    cluster_entropy = get_entropy(cluster_counts)
+    # both the clusterings contain a single cluster, so they are the same
+    same_single_cluster = n_classes == n_clusters == 1
+
+    if same_single_cluster or n_classes == n_clusters == n_samples:
+        adjusted_rand_index = 1.0
+    else:
+        class_pairs = get_pairs(class_counts)
+        cluster_pairs = get_pairs(cluster_counts)
+        expected_pairs = (class_pairs * cluster_pairs) / get_pairs([n_samples])
+        mean_pairs = (cluster_pairs + class_pairs) / 2.0
+        adjusted_rand_index = (get_pairs(contingency.data) - expected_pairs) / (
+            mean_pairs - expected_pairs
+        )
+
+    normalizer = np.mean([class_entropy, cluster_entropy])
+    if same_single_cluster:
+        adjusted_mutual_info_score = 1.0
+        normalized_mutual_info_score = 1.0
+    else:
+        expected_mutual_info = get_expected_mutual_information(
+            class_counts, cluster_counts, n_samples
+        )
+        denominator = normalizer - expected_mutual_info
+        # the normalizer is not smaller than the expected mutual information, but for the floating point errors
+        if denominator < 0:
+            denominator = min(denominator, -np.finfo("float64").eps)
+        else:
+            denominator = max(denominator, np.finfo("float64").eps)
+        adjusted_mutual_info_score = (
+            mutual_info - expected_mutual_info
+        ) / denominator
+        normalized_mutual_info_score = mutual_info / max(
+            normalizer, np.finfo("float64").eps
+        )
+
+    homogeneity_score = mutual_info / class_entropy if class_entropy else 1.0
+    completeness_score = mutual_info / cluster_entropy if cluster_entropy else 1.0
+    if homogeneity_score + completeness_score == 0.0:
+        v_measure_score = 0.0
+    else:
+        v_measure_score = (
+            2.0
+            * homogeneity_score
+            * completeness_score
+            / (homogeneity_score + completeness_score)
+        )
+
+    return {
+        "adjusted_rand_index": adjusted_rand_index,
+        "adjusted_mutual_info_score": adjusted_mutual_info_score,
+        "homogeneity_score": homogeneity_score,
+        "completeness_score": completeness_score,
+        "v_measure_score": v_measure_score,
+        "normalized_mutual_info_score": normalized_mutual_info_score,
+        "clustering_accuracy": get_clustering_accuracy(contingency),
+    }
+
+
+class RadiusNeighbours:
+    """
+    It computes the neighbours of each vector once, so that DBSCAN is fit for a grid of eps and min_samples values 
+    without searching them again. The grid is derived from the distances of the vectors to their nearest neighbours, 
+    since the distances depend on the metric and on the vectors. The pairs of neighbours within the largest eps are 
+    sorted by distance, so that the ones within each eps are a prefix of them.
+    
+    data: standardized vectors
+    metric: distance metric
+    min_samples_grid: values of min_samples
+    quantiles: quantiles of the distances of the vectors to their min_samples-th nearest vector used as eps
+    """
+
+    def __init__(
+        self,
+        data,
+        metric,
+        min_samples_grid=dbscan_sweep_min_samples,
+        quantiles=dbscan_sweep_quantiles,
+    ):
+        self.n_samples = len(data)
+        # the nearest vectors do not include the vector itself, which DBSCAN counts in min_samples
+        n_neighbours = max(min(max(min_samples_grid) - 1, self.n_samples - 1), 1)
+        with config_context(working_memory=large_scale_working_memory):
+            model = NearestNeighbors(n_neighbors=n_neighbours, metric=metric).fit(data)
+            neighbour_distances = model.kneighbors(return_distance=True)[0]
+
+            self.settings = list()
+            for min_samples in min_samples_grid:
+                column = min(max(min_samples - 1, 1), n_neighbours) - 1
+                for quantile in quantiles:
+                    # eps is rounded, so that the setting is easily reproduced
+                    eps = float(
+                        "%.4g" % np.quantile(neighbour_distances[:, column], quantile)
+                    )
+                    if eps > 0 and (eps, min_samples) not in self.settings:
+                        self.settings.append((eps, min_samples))
+
+            self.max_eps = max([eps for eps, _ in self.settings], default=0)
+            graph = model.radius_neighbors_graph(radius=self.max_eps, mode="distance")
+
+        graph = graph.tocoo()
+        order = np.argsort(graph.data, kind="stable")
+        self.rows = graph.row[order]
+        self.cols = graph.col[order]
+        self.distances = graph.data[order]
+
+    """
+    It returns the cluster label of each vector, -1 for the noise, as fit by DBSCAN with the given parameters: the 
+    clusters are numbered in the order of their first core vector, and each border vector belongs to the first 
+    cluster which reaches it.
+    
+    eps: maximum distance between two neighbours, not larger than max_eps, the largest eps of the grid
+    min_samples: number of vectors in the neighbourhood of a core vector, the vector itself included
+    """
+
+    def fit_labels(self, eps, min_samples):
+        if eps > self.max_eps:
+            raise ValueError(
+                "Clustering : eps="
+                + str(eps)
+                + " is larger than the largest eps of the neighbours: "
+                + str(self.max_eps)
+            )
+        n_pairs = np.searchsorted(self.distances, eps, side="right")
+        rows = self.rows[:n_pairs]
+        cols = self.cols[:n_pairs]
+        core = np.bincount(rows, minlength=self.n_samples) + 1 >= min_samples
+
+        # the clusters are the connected components of the core vectors
+        core_pairs = core[rows] & core[cols]
+        graph = coo_matrix(
+            (
+                np.ones(np.count_nonzero(core_pairs)),
+                (rows[core_pairs], cols[core_pairs]),
+            ),
+            shape=(self.n_samples, self.n_samples),
+        )
+        components = connected_components(graph, directed=True, connection="weak")[1]
+        _, first, index = np.unique(
+            components[core], return_index=True, return_inverse=True
+        )
+        labels = np.full(self.n_samples, -1, dtype=np.int64)
+        labels[core] = np.argsort(np.argsort(first))[index]
+
+        border_pairs = core[rows] & ~core[cols]
+        border_labels = np.full(self.n_samples, self.n_samples, dtype=np.int64)
+        np.minimum.at(border_labels, cols[border_pairs], labels[rows[border_pairs]])
+        border = ~core & (border_labels < self.n_samples)
+        labels[border] = border_labels[border]
+        return labels
+
 
 """
 Model of the clustering task
@@ -22,53 +468,211 @@ class ClusteringModel(AbstractModel):
     metric: function used to compute the distance metric
     n_clusters: number of expected clusters
     debugging_mode: {TRUE, FALSE}, TRUE to run the model by reporting all the errors and information; FALSE otherwise
+    large_scale: {TRUE, FALSE}, TRUE to use the large-scale version of the model, if any, which does not need the 
+        distances among all the vectors; FALSE otherwise. Default: FALSE
+    eps: eps of DBSCAN, None for the default of sklearn. Default: None
+    min_samples: min_samples of DBSCAN, None for the default of sklearn. Default: None
     """
 
-    def __init__(self, task_name, modelName, metric, n_clusters, debugging_mode):
+    def __init__(
+        self,
+        task_name,
+        modelName,
+        metric,
+        n_clusters,
+        debugging_mode,
+        large_scale=False,
+        eps=None,
+        min_samples=None,
+    ):
         self.n_clusters = n_clusters
         self.debugging_mode = debugging_mode
         self.task_name = task_name
+        self.modelName = modelName
+        self.metric = metric
+        self.large_scale = large_scale
+        self.dbscan_parameters = dict()
+        if eps is not None:
+            self.dbscan_parameters["eps"] = eps
+        if min_samples is not None:
+            self.dbscan_parameters["min_samples"] = min_samples
         if modelName == "DB":
-            self.model = "DBSCAN(metric='" + metric + "')"
             self.name = "DBSCAN"
             self.configuration = "metric=" + metric
+            for parameter, value in self.dbscan_parameters.items():
+                self.configuration += ", " + parameter + "=" + str(value)
         elif modelName == "KMeans":
-            self.model = "KMeans(n_clusters=" + str(n_clusters) + ", random_state=0)"
             self.name = "KMeans"
             self.configuration = "metric=enclidean, n_clusters=" + str(n_clusters)
         elif modelName == "AC":
-            self.model = (
-                "AgglomerativeClustering(n_clusters="
-                + str(n_clusters)
-                + ", affinity='"
-                + metric
-                + "', linkage='average')"
-            )
             self.name = "Agglomerative clustering"
             self.configuration = "metric=" + metric + ", n_clusters=" + str(n_clusters)
         elif modelName == "WHC":
-            self.model = (
-                "AgglomerativeClustering(n_clusters="
-                + str(n_clusters)
-                + ", affinity='euclidean', linkage='ward')"
-            )
             self.name = "Ward hierarchical clustering"
             self.configuration = "metric=" + metric + ", n_clusters=" + str(n_clusters)
         else:
             print("YOU CHOSE WRONG MODEL FOR CLUSTERING!")
 
+        # the large-scale models give different results, so they are reported with a different configuration
+        if large_scale and modelName == "KMeans":
+            self.configuration += ", large_scale=mini-batch"
+        elif large_scale and modelName == "AC":
+            self.configuration += (
+                ", large_scale=" + str(large_scale_sample_size) + " sampled vectors"
+            )
+        elif large_scale and modelName == "WHC":
+            self.configuration += (
+                ", large_scale=" + str(large_scale_neighbours) + "-NN connectivity"
+            )
+
         if self.debugging_mode:
             print("Clustering model initialized")
 
+    """
+    It creates the clustering model.
+    
+    connectivity (optional): graph of the nearest neighbours of each vector, see get_neighbours_graph. It constrains 
+        the merges of the large-scale ward hierarchical clustering. Default: None
+    """
+
+    def create_model(self, connectivity=None):
+        if self.modelName == "DB":
+            return DBSCAN(metric=self.metric, **self.dbscan_parameters)
+        elif self.modelName == "KMeans":
+            if self.large_scale:
+                return MiniBatchKMeans(n_clusters=self.n_clusters, random_state=0)
+            return KMeans(n_clusters=self.n_clusters, random_state=0)
+        elif self.modelName == "AC":
+            return AgglomerativeClustering(
+                n_clusters=self.n_clusters, affinity=self.metric, linkage="average"
+            )
+        elif self.modelName == "WHC":
+            return AgglomerativeClustering(
+                n_clusters=self.n_clusters,
+                affinity="euclidean",
+                linkage="ward",
+                connectivity=connectivity,
+            )
+        raise ValueError("Clustering : unknown model " + str(self.modelName))
+
+    """
+    It fits the model and returns the cluster label of each vector, -1 for the noise.
+    If the distances among the vectors are provided, the hierarchical clusterings are computed from them with the 
+    same results, instead of computing them again: the linkages are computed with scipy as AgglomerativeClustering 
+    does. DBSCAN searches the neighbours of each vector itself, which is faster than reading them from a graph of the 
+    distances when the neighbourhoods are dense.
+    The large-scale ward hierarchical clustering only merges the clusters of neighbouring vectors, see 
+    fit_sample_labels for the large-scale agglomerative clustering with average linkage.
+    
+    data: standardized vectors
+    distances: condensed distance matrix of the vectors with the metric of the model, or None
+    connectivity: graph of the nearest neighbours of each vector, or None to compute it when the model needs it
+    neighbours: neighbours of each vector within a radius, see RadiusNeighbours, or None. DBSCAN is fit on them if 
+        its eps is within their radius
+    """
+
+    def fit_labels(self, data, distances=None, connectivity=None, neighbours=None):
+        if self.modelName == "DB" and neighbours is not None:
+            eps = self.dbscan_parameters.get("eps", DBSCAN().eps)
+            min_samples = self.dbscan_parameters.get(
+                "min_samples", DBSCAN().min_samples
+            )
+            if eps <= neighbours.max_eps:
+                return neighbours.fit_labels(eps, min_samples)
+        if self.large_scale:
+            if self.modelName == "AC":
+                return self.fit_sample_labels(data)
+            if connectivity is None and self.modelName == "WHC":
+                connectivity = get_neighbours_graph(data, self.metric)
+            return self.create_model(connectivity).fit(data).labels_
+        if distances is not None:
+            if self.modelName == "AC":
+                return get_linkage_labels(
+                    linkage(distances, method="average"), self.n_clusters
+                )
+            elif (
+                self.modelName == "WHC"
+                and scipy_metrics.get(self.metric, self.metric) == "euclidean"
+            ):
+                return get_linkage_labels(
+                    linkage(distances, method="ward"), self.n_clusters
+                )
+        return self.create_model().fit(data).labels_
+
+    """
+    It fits the large-scale agglomerative clustering with average linkage and returns the cluster label of each 
+    vector. The clustering is computed on a random sample of the vectors, and each other vector is assigned to the 
+    cluster of the sample at the smallest average distance, as the average linkage merges the closest clusters. The 
+    distances among all the vectors are not needed: the ones from the sample are computed a chunk of vectors at a 
+    time. The connectivity-constrained average linkage of sklearn is not used, as its time grows with the square of 
+    the number of vectors when the clusters are large.
+    
+    data: standardized vectors
+    """
+
+    def fit_sample_labels(self, data):
+        n_samples = len(data)
+        sample = np.arange(n_samples)
+        if n_samples > large_scale_sample_size:
+            sample = np.sort(
+                np.random.RandomState(0).choice(
+                    n_samples, large_scale_sample_size, replace=False
+                )
+            )
+        sample_data = data[sample]
+
+        distances = get_distances(sample_data, self.metric)
+        if distances is not None:
+            sample_labels = get_linkage_labels(
+                linkage(distances, method="average"), self.n_clusters
+            )
+        else:
+            sample_labels = self.create_model().fit(sample_data).labels_
+        members = np.eye(self.n_clusters)[sample_labels]
+        cluster_sizes = members.sum(axis=0)
+
+        def get_closest_clusters(distances, start):
+            return np.argmin(distances.dot(members) / cluster_sizes, axis=1)
+
+        labels = np.concatenate(
+            list(
+                pairwise_distances_chunked(
+                    data,
+                    sample_data,
+                    reduce_func=get_closest_clusters,
+                    metric=self.metric,
+                    working_memory=large_scale_working_memory,
+                )
+            )
+        )
+        labels[sample] = sample_labels
+        return labels
+
     """
     It trains the model based on the provided data
     
     merged: dataframe with entity name as first column, cluster label as second column and the vectors starting from the third column
+    ignored: dataframe with the entities of the dataset used as gold standard which are not in the vectors
+    data (optional): standardized vectors of merged, see get_scaled_data. Default: None to compute them
+    distances (optional): condensed distance matrix of the standardized vectors, see get_distances. If provided, the 
+        models which use the distances are fit on them. Default: None
+    connectivity (optional): graph of the nearest neighbours of the standardized vectors, see get_neighbours_graph. 
+        It is used by the large-scale models only. Default: None
+    neighbours (optional): neighbours of the standardized vectors, see RadiusNeighbours. If provided, DBSCAN is fit 
+        on them when its eps is within their radius. Default: None
     
     It returns the result object reporting the task name, the model name and its configuration - if any -, and evaluation metrics.
     """
 
-    def train(self, merged, ignored):
+    def train(
+        self,
+        merged,
+        ignored,
+        data=None,
+        distances=None,
+        connectivity=None,
+        neighbours=None,
+    ):
         n_samples = merged.shape[0]
         if n_samples < self.n_clusters:
             raise ValueError(
@@ -80,19 +684,17 @@ class ClusteringModel(AbstractModel):
                 )
             )
 
-        data = merged.iloc[:, 2:].values
-        data = StandardScaler().fit_transform(data)
-
-        cluster_method = eval(self.model).fit(data)
+        if data is None:
+            data = get_scaled_data(merged)
 
-        labels = cluster_method.labels_
+        labels = self.fit_labels(data, distances, connectivity, neighbours)
 
         n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
 
-        for index, value in enumerate(labels):
-            if value == -1:
-                labels[index] = n_clusters
-                n_clusters += 1
+        # each noise vector of DBSCAN is a cluster on its own
+        noise = labels == -1
+        labels[noise] = np.arange(n_clusters, n_clusters + np.count_nonzero(noise))
+        n_clusters += np.count_nonzero(noise)
 
         ignoredLabels = [n_clusters] * len(ignored)
         labels = np.concatenate((labels, ignoredLabels), axis=0)
@@ -119,79 +721,45 @@ class ClusteringModel(AbstractModel):
                 + str(len(labels))
             )
 
-        adjusted_rand_score = metrics.adjusted_rand_score(trueLabels, labels)
-        if self.debugging_mode:
-            print(self.name + " Adjusted rand index : " + str(adjusted_rand_score))
-
-        adjusted_mutual_info_score = metrics.adjusted_mutual_info_score(
-            trueLabels, labels
-        )
+        scores = get_clustering_scores(trueLabels, labels)
         if self.debugging_mode:
+            print(
+                self.name
+                + " Adjusted rand index : "
+                + str(scores["adjusted_rand_index"])
+            )
             print(
                 self.name
                 + " Adjusted mutual info score : "
-                + str(adjusted_mutual_info_score)
+                + str(scores["adjusted_mutual_info_score"])
             )
-
-        homogeneity_score = metrics.homogeneity_score(trueLabels, labels)
-        if self.debugging_mode:
-            print(self.name + " Homogeneity_score : " + str(homogeneity_score))
-
-        completeness_score = metrics.completeness_score(trueLabels, labels)
-        if self.debugging_mode:
-            print(self.name + " Completeness_score : " + str(completeness_score))
-
-        v_measure_score = metrics.v_measure_score(trueLabels, labels)
-        if self.debugging_mode:
-            print(self.name + " V_measure_score : " + str(v_measure_score))
-
-        normalized_mutual_info_score = metrics.normalized_mutual_info_score(
-            trueLabels, labels
-        )
-        if self.debugging_mode:
+            print(
+                self.name + " Homogeneity_score : " + str(scores["homogeneity_score"])
+            )
+            print(
+                self.name
+                + " Completeness_score : "
+                + str(scores["completeness_score"])
+            )
+            print(self.name + " V_measure_score : " + str(scores["v_measure_score"]))
             print(
                 self.name
                 + " Normalized mutual info score : "
-                + str(normalized_mutual_info_score)
+                + str(scores["normalized_mutual_info_score"])
+            )
+            print(
+                self.name
+                + " Clustering accuracy : "
+                + str(scores["clustering_accuracy"])
             )
-
-        clustering_accuracy = self._compute_clustering_accuracy(trueLabels, labels)
-        if self.debugging_mode:
-            print(self.name + " Clustering accuracy : " + str(clustering_accuracy))
 
         return {
             "task_name": self.task_name,
             "model_name": self.name,
             "model_configuration": self.configuration,
             "num_clusters": n_clusters,
-            "adjusted_rand_index": round(adjusted_rand_score, float_precision),
-            "adjusted_mutual_info_score": round(
-                adjusted_mutual_info_score, float_precision
-            ),
-            "homogeneity_score": round(homogeneity_score, float_precision),
-            "completeness_score": round(completeness_score, float_precision),
-            "v_measure_score": round(v_measure_score, float_precision),
-            "normalized_mutual_info_score": round(
-                normalized_mutual_info_score, float_precision
-            ),
-            "clustering_accuracy": round(clustering_accuracy, float_precision),
+            **{
+                score_name: round(score, float_precision)
+                for score_name, score in scores.items()
+            },
         }
-
-    @staticmethod
-    def _compute_clustering_accuracy(y_true, y_pred) -> float:
-        """Compute the clustering accuracy (ACC) for an actual (y_true) and a predicted (y_pred) clustering."""
-        y_true = np.array(y_true, np.int64)
-        y_pred = np.array(y_pred, np.int64)
-        if y_pred.size != y_true.size:
-            raise Exception(
-                "True and predicated labels for clustering accuracy have to be of the same size."
-            )
-        D = max(y_pred.max(), y_true.max()) + 1
-        w = np.zeros((D, D), dtype=np.int64)
-        for i in range(y_pred.size):
-            w[y_pred[i], y_true[i]] += 1
-        row_indices, col_indices = linear_sum_assignment(w.max() - w)
-        return (
-            float(sum([w[i, j] for i, j in zip(row_indices, col_indices)]))
-            / y_pred.size
-        )
@@ -5,10 +5,21 @@ import pandas as pd
 from numpy import mean
 from typing import List
 
-from evaluation_framework.Clustering.clustering_model import ClusteringModel as Model
+from evaluation_framework.Clustering.clustering_model import (
+    ClusteringModel as Model,
+    RadiusNeighbours,
+    get_distances,
+    get_neighbours_graph,
+    get_scaled_data,
+)
 from evaluation_framework.abstract_taskManager import AbstractTaskManager
 
 task_name = "Clustering"
+# maximum number of entities of a dataset for which the distances among the vectors are computed once and shared by
+# the models, as their matrix grows with the square of the number of entities
+max_precomputed_distances = 10000
+# score by which the best setting of the DBSCAN sweep is chosen
+best_sweep_metric = "adjusted_rand_index"
 
 
 class ClusteringManager(AbstractTaskManager):
@@ -22,6 +33,8 @@ class ClusteringManager(AbstractTaskManager):
         distance_metric: str,
         debugging_mode: bool,
         datasets: List[str] = None,
+        large_scale_threshold: int = None,
+        dbscan_sweep: bool = False,
     ):
         """Constructor. It initializes the manager of the clustering task.
 
@@ -35,12 +48,20 @@ class ClusteringManager(AbstractTaskManager):
             TRUE to run the model by reporting all the errors and information; FALSE otherwise.
         datasets : List[str]
             None if all datasets shall be evaluated. Specific datasets can also be named using this parameter.
+        large_scale_threshold : int
+            Number of entities of a dataset above which the large-scale models are used, as the exact agglomerative
+            clusterings need the distances among all the vectors. None to use the exact models only.
+        dbscan_sweep : bool
+            TRUE to fit DBSCAN also for a grid of eps and min_samples values, from the neighbours of the vectors
+            computed once, and to report the scores of each setting and the best one; FALSE otherwise.
         """
         super().__init__()
         self.debugging_mode = debugging_mode
         self.data_manager = data_manager
         self.distance_metric = distance_metric
         self.datasets = datasets
+        self.large_scale_threshold = large_scale_threshold
+        self.dbscan_sweep = dbscan_sweep
         if self.debugging_mode:
             print("Clustering task manager initialized")
 
@@ -52,10 +73,29 @@ class ClusteringManager(AbstractTaskManager):
     def get_task_name():
         return task_name
 
+    """
+    It returns the names of the entities of the datasets used as gold standard, i.e. the only entities whose vectors 
+    are used by the task.
+    """
+
+    def get_gold_standard_entities(self):
+        if self.datasets is not None:
+            gold_standard_filenames = self.datasets
+        else:
+            gold_standard_filenames = self.get_gold_standard_file()
+
+        entities = set()
+        for gold_standard_filename in gold_standard_filenames:
+            gold = self.data_manager.read_file(
+                ClusteringManager.get_file_for_dataset(gold_standard_filename), ["name"]
+            )
+            entities.update(gold["name"])
+        return entities
+
     """
     It evaluates the Clustering task.
     
-    vectors: dataframe which contains the vectors data
+    vectors: embedding store which contains the vectors data
     vector_file: path of the vector file
     vector_size: size of the vectors
     result_directory: directory where the results must be stored
@@ -117,17 +157,69 @@ class ClusteringManager(AbstractTaskManager):
                         + gold_standard_file
                     )
             else:
+                # the vectors are standardized once, and their distances or the graph of their neighbours are
+                # computed once for all the models
+                X = get_scaled_data(data)
+                large_scale = (
+                    self.large_scale_threshold is not None
+                    and len(X) > self.large_scale_threshold
+                )
+                distances = None
+                connectivity = None
+                if large_scale:
+                    connectivity = get_neighbours_graph(X, self.distance_metric)
+                elif len(X) <= max_precomputed_distances:
+                    distances = get_distances(X, self.distance_metric)
+
+                models = dict()
                 for model_name in clustering_models:
-                    model = Model(
+                    models[model_name] = Model(
                         task_name,
                         model_name,
                         self.distance_metric,
                         n_clusters,
                         self.debugging_mode,
+                        large_scale=large_scale,
                     )
 
+                # the settings of the DBSCAN sweep are all fit from the same neighbours of the vectors
+                neighbours = None
+                sweep_models = list()
+                if self.dbscan_sweep:
                     try:
-                        result = model.train(data, ignored)
+                        neighbours = RadiusNeighbours(X, self.distance_metric)
+                    except Exception as e:
+                        log_errors += (
+                            "File used as gold standard: "
+                            + gold_standard_filename
+                            + "\n"
+                        )
+                        log_errors += "Clustering method: DBSCAN sweep\n"
+                        log_errors += str(e) + "\n"
+                    else:
+                        for eps, min_samples in neighbours.settings:
+                            model_name = (
+                                "DB eps="
+                                + str(eps)
+                                + " min_samples="
+                                + str(min_samples)
+                            )
+                            sweep_models.append(model_name)
+                            models[model_name] = Model(
+                                task_name,
+                                "DB",
+                                self.distance_metric,
+                                n_clusters,
+                                self.debugging_mode,
+                                eps=eps,
+                                min_samples=min_samples,
+                            )
+
+                for model_name, model in models.items():
+                    try:
+                        result = model.train(
+                            data, ignored, X, distances, connectivity, neighbours
+                        )
                         result["gold_standard_file"] = gold_standard_filename
                         result["coverage"] = data_coverage
                         scores[model_name].append(result)
@@ -145,6 +237,21 @@ class ClusteringManager(AbstractTaskManager):
                         fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
                         log_errors += str(e) + fname + ", "+ str(exc_tb.tb_lineno) +'\n'
                         """
+
+                sweep_results = [
+                    scores[model_name][0]
+                    for model_name in sweep_models
+                    if model_name in scores
+                ]
+                if len(sweep_results) > 0:
+                    best = dict(
+                        max(sweep_results, key=lambda result: result[best_sweep_metric])
+                    )
+                    best["model_configuration"] += (
+                        ", best of the sweep by " + best_sweep_metric
+                    )
+                    scores["DB best"].append(best)
+                    totalscores_element["DB best"].append(best)
                 self.storeResults(results_folder, gold_standard_filename, scores)
                 totalscores[gold_standard_filename] = totalscores_element
 
@@ -2,10 +2,14 @@ from scipy.stats import spearmanr
 from scipy.stats import pearsonr
 import pandas as pd
 import numpy as np
+from collections import defaultdict
 from sklearn.metrics import pairwise_distances
 from evaluation_framework.abstract_model import AbstractModel
 
 float_precision = 15
+# maximum number of entity annotations for which the similarity of all the pairs of documents is computed at once.
+# With more annotations, only the pairs of documents in the gold standard are compared.
+max_all_pairs_annotations = 4000
 
 """
 Model of the Document similarity task
@@ -35,12 +39,18 @@ class DocumentSimilarityModel(AbstractModel):
     
     data: dataframe with entity name as first column, and the vectors starting from the second column
     stats: it contains the data used as gold standard
+    n_documents (optional): number of documents, whose IDs go from 1 to n_documents. Default: None to use the 
+        largest document ID in data
+    doc_similarity (optional): dataframe containing the similarity for each pair of documents, as returned by 
+        compute_doc_distances for the configuration of the model. Default: None to compute it
     
     It returns the result object reporting the task name, the used configuration and the evaluation metrics.
     """
 
-    def train(self, data, stats):
-        doc_similarity, log_info = self.compute_doc_distance(data)
+    def train(self, data, stats, n_documents=None, doc_similarity=None):
+        log_info = ""
+        if doc_similarity is None:
+            doc_similarity, log_info = self.compute_doc_distance(data, n_documents)
         gold_similarity_score, similarity_score = self.get_gold_and_actual_score(
             stats, doc_similarity
         )
@@ -67,79 +77,218 @@ class DocumentSimilarityModel(AbstractModel):
     It computes the predicted document distance
     
     data: dataframe with entity name as first column, class label as second column and the vectors starting from the third column
+    n_documents (optional): number of documents, whose IDs go from 1 to n_documents. Default: None to use the 
+        largest document ID in data
     
     It returns 
     	the dataframe containing the similarity for each pair of documents;
     	log_info which reports all the problems occurred
     """
 
-    def compute_doc_distance(self, data):
-        log_info = ""
+    def compute_doc_distance(self, data, n_documents=None):
+        doc_similarities, log_info = self.compute_doc_distances(data, n_documents)
+        return doc_similarities[self.with_weights], log_info
 
-        result_dict = {}
-        doc1_list = list()
-        doc2_list = list()
-        doc_similarity = list()
+    """
+    It computes the predicted document distance for every pair of documents, both with and without the weights.
+    The similarity among all the entities is computed once. Then, the similarity of two documents is the average of 
+    the maximum similarity of each entity of a document to an entity of the other one: these maxima are computed by 
+    reductions over the segments of the entities of each document.
+    
+    data: dataframe with the document ID in the doc column, the entity name in the name column, the weight returned 
+        by the annotator in the weight column and the vectors starting from the fourth column
+    n_documents (optional): number of documents, whose IDs go from 1 to n_documents. Default: None to use the 
+        largest document ID in data
+    pairs (optional): dataframe with the pairs of documents of the gold standard in the doc1 and doc2 columns. If 
+        provided and data has more than max_all_pairs_annotations rows, only these pairs are compared, see 
+        compute_pair_distances
+    
+    It returns 
+    	a dictionary with False (without weights) and True (with weights) as keys, and the dataframe containing the 
+    	similarity for each pair of documents as value;
+    	log_info which reports all the problems occurred
+    """
 
-        for i in range(1, 51):
-            # 1. extract entities of document i and j
-            set1 = self.extract_entities(i, data)
-            if len(set1) == 0:
-                log_info += "Document Similarity: No entities in doc " + str(i) + "\n"
-                continue
+    def compute_doc_distances(self, data, n_documents=None, pairs=None):
+        if pairs is not None and len(data) > max_all_pairs_annotations:
+            return self.compute_pair_distances(data, pairs)
 
-            for j in range(i, 51):
-                set2 = self.extract_entities(j, data)
-                if len(set2) == 0:
-                    log_info += (
-                        "Document Similarity: No entities in doc " + str(j) + "\n"
-                    )
-                    continue
-
-                # 1. DONE : set 1 and set 2 contain entities of document i and j
-
-                # 2. compute the similarity for each pair of entities in d_i and d_j
-                # similarity is interpreted as the opposite of distance
-                similarity_score1 = self.compute_similarity(set1, set2)
-                similarity_score2 = self.compute_similarity(set2, set1)
-                if (
-                    self.with_weights
-                ):  # if weights are enabled - multiply distances with weight matrix
-                    similarity_score1 = similarity_score1 * np.outer(
-                        set1["weight"], set2["weight"]
-                    )
-                    similarity_score2 = similarity_score2 * np.outer(
-                        set2["weight"], set1["weight"]
-                    )
+        entities, documents, offsets, sizes = self.group_entities(data)
 
-                # 3. for each entity in d_i identify the maximum similarity to an entity in d2, and viceversa
-                max_sim1 = np.max(similarity_score1, axis=1)
-                max_sim2 = np.max(similarity_score2, axis=1)
+        if n_documents is None:
+            n_documents = int(documents.max()) if len(documents) > 0 else 0
+        log_info = self.get_empty_documents_log(documents, n_documents)
 
-                # 4. calculate document similarity
-                document_similarity = (sum(max_sim1) + sum(max_sim2)) / (
-                    len(max_sim1) + len(max_sim2)
+        doc_similarities = dict()
+        if len(documents) == 0:
+            for with_weights in [False, True]:
+                doc_similarities[with_weights] = pd.DataFrame(
+                    {"doc1": [], "doc2": [], "similarity": []}
                 )
+            return doc_similarities, log_info
 
-                if self.debugging_mode:
+        # similarity is interpreted as the opposite of distance
+        codes, unique_names = pd.factorize(entities["name"])
+        first_rows = np.unique(codes, return_index=True)[1]
+        vectors = entities.iloc[first_rows, 3:]
+        entity_similarity = 1 - pairwise_distances(
+            vectors, vectors, metric=self.distance_metric
+        )
+        similarity = entity_similarity[np.ix_(codes, codes)]
+
+        weights = entities["weight"].to_numpy()
+        # only the pairs with doc1 <= doc2 are reported, as the similarity is symmetric
+        doc1_positions, doc2_positions = np.triu_indices(len(documents))
+
+        for with_weights in [False, True]:
+            if with_weights:
+                # if weights are enabled - multiply distances with weight matrix
+                pair_similarity = similarity * np.outer(weights, weights)
+            else:
+                pair_similarity = similarity
+
+            # for each entity, the maximum similarity to an entity of each document
+            max_sim = np.maximum.reduceat(pair_similarity, offsets, axis=1)
+            # for each pair of documents, the sum of the maxima of the entities of the first one
+            sum_max_sim = np.add.reduceat(max_sim, offsets, axis=0)
+
+            document_similarity = (sum_max_sim + sum_max_sim.T) / (
+                sizes[:, np.newaxis] + sizes[np.newaxis, :]
+            )
+            doc_similarity = pd.DataFrame(
+                {
+                    "doc1": documents[doc1_positions],
+                    "doc2": documents[doc2_positions],
+                    "similarity": document_similarity[doc1_positions, doc2_positions],
+                }
+            )
+
+            if self.debugging_mode:
+                for doc1, doc2, value in doc_similarity.itertuples(index=False):
                     print(
                         "Doc "
-                        + str(i)
+                        + str(doc1)
                         + " - Doc "
-                        + str(j)
+                        + str(doc2)
                         + " : distance similarity "
-                        + str(document_similarity)
+                        + str(value)
+                    )
+            doc_similarities[with_weights] = doc_similarity
+
+        return doc_similarities, log_info
+
+    """
+    It computes the predicted document distance for the given pairs of documents only, both with and without the 
+    weights. Each pair is compared on its own, so that the time grows with the number of pairs instead of the square 
+    of the number of documents.
+    
+    data: dataframe with the document ID in the doc column, the entity name in the name column, the weight returned 
+        by the annotator in the weight column and the vectors starting from the fourth column
+    pairs: dataframe with the pairs of documents to compare in the doc1 and doc2 columns
+    
+    It returns 
+    	a dictionary with False (without weights) and True (with weights) as keys, and the dataframe containing the 
+    	similarity for each pair of documents with entities as value;
+    	log_info which reports the documents of the pairs without entities
+    """
+
+    def compute_pair_distances(self, data, pairs):
+        entities, documents, offsets, sizes = self.group_entities(data)
+        vectors = entities.iloc[:, 3:].to_numpy()
+        weights = entities["weight"].to_numpy()
+        positions = dict(zip(documents.tolist(), range(len(documents))))
+
+        pairs = pairs[["doc1", "doc2"]].drop_duplicates()
+        log_info = ""
+        pair_documents = pd.unique(pairs.to_numpy().ravel())
+        for document in sorted(set(pair_documents.tolist()) - set(positions)):
+            if self.debugging_mode:
+                print("No entities in doc " + str(document))
+            log_info += "Document Similarity: No entities in doc " + str(document) + "\n"
+
+        doc_similarities = {False: defaultdict(list), True: defaultdict(list)}
+        for doc1, doc2 in pairs.itertuples(index=False):
+            if doc1 not in positions or doc2 not in positions:
+                continue
+            start1, size1 = offsets[positions[doc1]], sizes[positions[doc1]]
+            start2, size2 = offsets[positions[doc2]], sizes[positions[doc2]]
+            entities1 = slice(start1, start1 + size1)
+            entities2 = slice(start2, start2 + size2)
+
+            # similarity is interpreted as the opposite of distance
+            similarity = 1 - pairwise_distances(
+                vectors[entities1], vectors[entities2], metric=self.distance_metric
+            )
+            for with_weights in [False, True]:
+                if with_weights:
+                    pair_similarity = similarity * np.outer(
+                        weights[entities1], weights[entities2]
                     )
+                else:
+                    pair_similarity = similarity
+                # for each entity of a document, the maximum similarity to an entity of the other one
+                document_similarity = (
+                    pair_similarity.max(axis=1).sum()
+                    + pair_similarity.max(axis=0).sum()
+                ) / (size1 + size2)
 
-                doc1_list.append(i)
-                doc2_list.append(j)
-                doc_similarity.append(document_similarity)
+                doc_similarities[with_weights]["doc1"].append(doc1)
+                doc_similarities[with_weights]["doc2"].append(doc2)
+                doc_similarities[with_weights]["similarity"].append(
+                    document_similarity
+                )
 
-        result_dict["doc1"] = doc1_list
-        result_dict["doc2"] = doc2_list
-        result_dict["similarity"] = doc_similarity
+        for with_weights in [False, True]:
+            doc_similarities[with_weights] = pd.DataFrame(
+                doc_similarities[with_weights], columns=["doc1", "doc2", "similarity"]
+            )
+        return doc_similarities, log_info
 
-        return pd.DataFrame(result_dict), log_info
+    """
+    It returns the entities of each document without duplicates, keeping the largest weight of each entity, and 
+    where they are. The entities of each document are contiguous and the documents are ordered by ID.
+    
+    data: dataframe with the document ID in the doc column, the entity name in the name column, the weight returned 
+        by the annotator in the weight column and the vectors starting from the fourth column
+    
+    It returns the dataframe of the entities, the array of the document IDs, and the arrays with the position of the 
+    first entity and the number of entities of each document.
+    """
+
+    @staticmethod
+    def group_entities(data):
+        entities = data.sort_values(
+            ["doc", "weight"], ascending=[True, False], kind="mergesort"
+        ).drop_duplicates(subset=["doc", "name"], keep="first")
+        documents, sizes = np.unique(entities["doc"].to_numpy(), return_counts=True)
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        return entities, documents, offsets, sizes
+
+    """
+    It returns the log reporting the documents without entities, in the same way as the comparison of each pair of 
+    documents would do: for each pair of documents (i, j) with i <= j, a document without entities is reported 
+    once if it is i, and once for each i with entities if it is j.
+    
+    documents: sorted array with the IDs of the documents with entities
+    n_documents: number of documents, whose IDs go from 1 to n_documents
+    """
+
+    def get_empty_documents_log(self, documents, n_documents):
+        log_info = ""
+        has_entities = np.zeros(n_documents + 1, dtype=bool)
+        has_entities[documents[documents <= n_documents]] = True
+        for i in range(1, n_documents + 1):
+            if not has_entities[i]:
+                if self.debugging_mode:
+                    print("No entities in doc " + str(i))
+                log_info += "Document Similarity: No entities in doc " + str(i) + "\n"
+                continue
+            for j in range(i, n_documents + 1):
+                if not has_entities[j]:
+                    log_info += (
+                        "Document Similarity: No entities in doc " + str(j) + "\n"
+                    )
+        return log_info
 
     """
     It returns the document similarity value used as gold standard and the actual one
@@ -166,34 +315,3 @@ class DocumentSimilarityModel(AbstractModel):
             pearson_score + spearman_score
         )
         return pearson_score, spearman_score, harmonic_mean
-
-    """
-    It extracts the entities related to the document in input from the whole entities dataframe
-    
-    documentID: current document ID as integer from 1 to 50
-    data: dataframe containing documentID in the doc column, the entity in the document and the weight returned by the annotator
-        """
-
-    def extract_entities(self, documentID, data):
-        set1 = data[data["doc"] == documentID]
-        if len(set1) == 0:
-            if self.debugging_mode:
-                print("No entities in doc " + str(documentID))
-        else:
-            set1 = set1.sort_values("weight", ascending=False).drop_duplicates(
-                subset="name", keep="first"
-            )
-        return set1
-
-    """
-    It computes the similarity among all the entities in the provided inputs.
-    
-    set1, set2: dataframe containing the entities of a document
-    
-    It returns the pairwise distance of all the pairs in the dataframes provided in input
-    """
-
-    def compute_similarity(self, set1, set2):
-        return 1 - pairwise_distances(
-            set1.iloc[:, 3:], set2.iloc[:, 3:], metric=self.distance_metric
-        )
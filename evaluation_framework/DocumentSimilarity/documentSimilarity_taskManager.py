@@ -2,7 +2,7 @@ import csv
 import os
 import pandas as pd
 from collections import defaultdict
-from typing import List
+from typing import Dict, List, Tuple
 
 from evaluation_framework.DocumentSimilarity.documentSimilarity_model import (
     DocumentSimilarityModel as Model,
@@ -17,7 +17,13 @@ class DocumentSimilarityManager(AbstractTaskManager):
     Manager of the Document similarity task
     """
 
-    def __init__(self, data_manager, distance_metric, debugging_mode):
+    def __init__(
+        self,
+        data_manager,
+        distance_metric,
+        debugging_mode,
+        corpora: Dict[str, Tuple[str, str]] = None,
+    ):
         """Constructor. It initializes the manager of the document similarity task.
 
         Parameters
@@ -28,11 +34,17 @@ class DocumentSimilarityManager(AbstractTaskManager):
             Distance metric used to compute the similarity score.
         debugging_mode : bool
             TRUE to run the model by reporting all the errors and information; FALSE otherwise.
+        corpora : Dict[str, Tuple[str, str]]
+            Corpora of annotated documents to evaluate, by name. Each corpus is a pair with the path of the file
+            with the entities of the documents (a JSON list or a JSON lines file, see the data manager) and the
+            path of the CSV file with the similarity score of pairs of documents in the doc1, doc2 and average
+            columns. None to evaluate LP50.
         """
         super().__init__()
         self.debugging_mode = debugging_mode
         self.data_manager = data_manager
         self.distance_metric = distance_metric
+        self.corpora = corpora
         if self.debugging_mode:
             print("Document Similarity task manager initialized")
 
@@ -46,10 +58,26 @@ class DocumentSimilarityManager(AbstractTaskManager):
         """
         return task_name
 
+    """
+    It returns the names of the entities annotated in the documents of the corpora, i.e. the only entities whose 
+    vectors are used by the task.
+    """
+
+    def get_gold_standard_entities(self):
+        if self.corpora is not None:
+            corpora = self.corpora
+        else:
+            corpora = self.get_corpora()
+
+        entities = set()
+        for document_entities_file, _ in corpora.values():
+            entities.update(self.data_manager.get_entities(document_entities_file)["name"])
+        return entities
+
     """
     It evaluates the Classification task.
     
-    vectors: dataframe which contains the vectors data
+    vectors: embedding store which contains the vectors data
     vector_file: path of the vector file
     vector_size: size of the vectors
     result_directory: directory where the results must be stored
@@ -69,76 +97,86 @@ class DocumentSimilarityManager(AbstractTaskManager):
 
         log_errors = ""
 
-        stats_filename = "LP50_averageScores.csv"
-
-        script_dir = os.path.dirname(__file__)
-        rel_path = "data/" + stats_filename
-        stats_file = os.path.join(script_dir, rel_path)
-
-        stats = self.data_manager.read_file(stats_file, ["doc1", "doc2", "average"])
-        document_entities_file = DocumentSimilarityManager.get_file_for_dataset("LP50")
+        # check whether corpora have been passed through the constructor
+        if self.corpora is not None:
+            corpora = self.corpora
+        else:
+            corpora = self.get_corpora()
 
-        vocab = self.data_manager.create_vocab(vectors, vector_file, vector_size)
-        W_norm = self.data_manager.normalize_vectors(
-            vectors, vector_file, vector_size, vocab
-        )
-        vectors.iloc[:, 1:] = W_norm
+        results_dfs = list()
+        for corpus_name, (document_entities_file, stats_file) in corpora.items():
+            stats = self.data_manager.read_file(stats_file, ["doc1", "doc2", "average"])
 
-        data, ignored = self.data_manager.intersect_vectors_goldStandard(
-            vectors, vector_file, vector_size, document_entities_file
-        )
-        data_coverage = len(data) / (len(data) + len(ignored))
+            data, ignored = self.data_manager.intersect_vectors_goldStandard(
+                vectors.normalized_view(),
+                vector_file,
+                vector_size,
+                document_entities_file,
+            )
+            data_coverage = len(data) / (len(data) + len(ignored))
 
-        self.storeIgnored(results_folder, "LP50", ignored)
+            self.storeIgnored(results_folder, corpus_name, ignored)
 
-        scores = dict()
+            scores = dict()
 
-        if data.size == 0:
-            log_errors += (
-                "Document similarity : Problems in merging vector with gold standard "
-                + document_entities_file
-                + "\n"
-            )
-            if self.debugging_mode:
-                print(
+            if data.size == 0:
+                log_errors += (
                     "Document similarity : Problems in merging vector with gold standard "
                     + document_entities_file
+                    + "\n"
                 )
-        else:
-            try:
-
-                scores = defaultdict(list)
-                with_weights = False
-                model = Model(
-                    task_name, self.distance_metric, with_weights, self.debugging_mode
-                )
-                result, log_info = model.train(data, stats)
-                result["gold_standard_file"] = "LP50"
-                result["coverage"] = data_coverage
-                scores["without_weights"] = result
-                # log_errors += log_info
-
-                with_weights = True
-                model = Model(
-                    task_name, self.distance_metric, with_weights, self.debugging_mode
-                )
-                result, log_info = model.train(data, stats)
-                result["gold_standard_file"] = "LP50"
-                result["coverage"] = data_coverage
-                scores["with_weights"] = result
-                log_errors += log_info
-
-                self.storeResults(results_folder, "LP50", scores)
-                results_df = self.resultsAsDataFrame(scores)
-                scores_dictionary[task_name] = results_df
-            except Exception as e:
-                log_errors += (
-                    "File used as gold standard: " + document_entities_file + "\n"
-                )
-                log_errors += (
-                    "Document similarity, with weights: " + str(with_weights) + "\n"
-                )
-                log_errors += str(e) + "\n"
+                if self.debugging_mode:
+                    print(
+                        "Document similarity : Problems in merging vector with gold standard "
+                        + document_entities_file
+                    )
+            else:
+                try:
+
+                    scores = defaultdict(list)
+                    with_weights = False
+                    # the documents are numbered from 1, also the ones whose entities are all ignored
+                    n_documents = int(pd.concat([data["doc"], ignored["doc"]]).max())
+
+                    # the similarities with and without weights are computed in one pass
+                    model = Model(
+                        task_name, self.distance_metric, with_weights, self.debugging_mode
+                    )
+                    doc_similarities, log_info = model.compute_doc_distances(
+                        data, n_documents, stats
+                    )
+                    result, _ = model.train(
+                        data, stats, n_documents, doc_similarities[with_weights]
+                    )
+                    result["gold_standard_file"] = corpus_name
+                    result["coverage"] = data_coverage
+                    scores["without_weights"] = result
+
+                    with_weights = True
+                    model = Model(
+                        task_name, self.distance_metric, with_weights, self.debugging_mode
+                    )
+                    result, _ = model.train(
+                        data, stats, n_documents, doc_similarities[with_weights]
+                    )
+                    result["gold_standard_file"] = corpus_name
+                    result["coverage"] = data_coverage
+                    scores["with_weights"] = result
+                    log_errors += log_info
+
+                    self.storeResults(results_folder, corpus_name, scores)
+                    results_dfs.append(self.resultsAsDataFrame(scores))
+                except Exception as e:
+                    log_errors += (
+                        "File used as gold standard: " + document_entities_file + "\n"
+                    )
+                    log_errors += (
+                        "Document similarity, with weights: " + str(with_weights) + "\n"
+                    )
+                    log_errors += str(e) + "\n"
+
+        if len(results_dfs) > 0:
+            scores_dictionary[task_name] = pd.concat(results_dfs, ignore_index=True)
 
         log_dictionary[task_name] = log_errors
 
@@ -251,6 +289,22 @@ class DocumentSimilarityManager(AbstractTaskManager):
         """
         return ["LP50"]
 
+    @staticmethod
+    def get_corpora() -> Dict[str, Tuple[str, str]]:
+        """It returns the corpora used as gold standard.
+
+        Returns
+        -------
+            Dictionary with the corpus name as key and, as value, the pair with the path of the file with the
+            entities of the documents and the path of the file with the similarity score of pairs of documents.
+        """
+        script_dir = os.path.dirname(__file__)
+        stats_file = os.path.join(script_dir, "data/LP50_averageScores.csv")
+        return {
+            dataset: (DocumentSimilarityManager.get_file_for_dataset(dataset), stats_file)
+            for dataset in DocumentSimilarityManager.get_gold_standard_file()
+        }
+
     @staticmethod
     def get_metric_list():
         """It returns the metrics used in the evaluation of the Classification task.
@@ -7,6 +7,51 @@ from evaluation_framework.abstract_model import AbstractModel
 
 float_precision = 15
 
+
+def paired_cosine_distances(left, right):
+    """It returns the cosine distance between each row of left and the same row of right.
+
+    Parameters
+    ----------
+    left : np.ndarray
+        Matrix with a vector for each row.
+    right : np.ndarray
+        Matrix with the same shape of left.
+
+    Returns
+    -------
+        The array of the distances.
+    """
+    norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosine = np.einsum("ij,ij->i", left, right) / norms
+    return 1.0 - np.clip(cosine, -1.0, 1.0)
+
+
+def paired_euclidean_distances(left, right):
+    """It returns the euclidean distance between each row of left and the same row of right.
+
+    Parameters
+    ----------
+    left : np.ndarray
+        Matrix with a vector for each row.
+    right : np.ndarray
+        Matrix with the same shape of left.
+
+    Returns
+    -------
+        The array of the distances.
+    """
+    difference = left - right
+    return np.sqrt(np.einsum("ij,ij->i", difference, difference))
+
+
+# metrics whose distances are computed pair by pair, the other ones are computed by distance.cdist
+paired_metrics = {
+    "cosine": paired_cosine_distances,
+    "euclidean": paired_euclidean_distances,
+}
+
 """
 Model of the entity relatedness task
 """
@@ -32,68 +77,122 @@ class EntityRelatednessModel(AbstractModel):
     """
     It trains the model based on the provided data
     
-    left_merged: dataframe containing main entities and the related vectors
+    left_merged: dataframe containing main entities, with the position of their group in the group column and the related vectors starting from the third column
     left_ignored: dataframe containing the missing main entities, i.e. the entities which are in the dataset but not in the input file
-    right_merged_list: list of dataframes containing the right entities and the related vectors
-    right_ignored_list: list of dataframes containing the missing right entities, i.e. the entities which are in the dataset but not in the input file
+    right_merged: dataframe containing the right entities of all the groups, with the position of their group in the group column and the related vectors starting from the third column. The entities of each group are contiguous and the groups are in the same order of groups
+    right_ignored: dataframe containing the missing right entities, i.e. the entities which are in the dataset but not in the input file
     groups: dictionary containing the main entities and the attached right entities
     
     It returns the result object reporting the task name, the model name and its configuration - if any -, and the evaluation metric values.
     """
 
-    def train(
-        self, left_merged, left_ignored, right_merged_list, right_ignored_list, groups
-    ):
+    def train(self, left_merged, left_ignored, right_merged, right_ignored, groups):
         predicted_rank_list = self.compute_relatedness(
-            left_merged, left_ignored, right_merged_list, right_ignored_list
+            left_merged, left_ignored, right_merged, right_ignored, groups
         )
-        #gold_rank_list = np.tile(np.arange(1, 21), (21, 1))
-        gold_rank_list = np.tile(np.arange(1, 11), (21, 1))
+        gold_rank_list = [
+            np.arange(1, len(related_entities) + 1)
+            for related_entities in groups.values()
+        ]
         return self.evaluate_ranking(
             list(groups.keys()), gold_rank_list, predicted_rank_list
         )
 
     """
     It computes the relatedness among main and right entities.
+    Each main entity is compared with the right entities of its group only: the found ones come first, followed by 
+    the missing ones with distance 1. The groups whose main entity is missing get the ranking of the right entities 
+    as they are.
     
-    left_merged: dataframe containing main entities and the related vectors
+    left_merged: dataframe containing main entities, with the position of their group in the group column and the related vectors starting from the third column
     left_ignored: dataframe containing the missing main entities, i.e. the entities which are in the dataset but not in the input file
-    right_merged_list: list of dataframes containing the right entities and the related vectors
-    right_ignored_list: list of dataframes containing the missing right entities, i.e. the entities which are in the dataset but not in the input file
+    right_merged: dataframe containing the right entities of all the groups, with the position of their group in the group column and the related vectors starting from the third column
+    right_ignored: dataframe containing the missing right entities, i.e. the entities which are in the dataset but not in the input file
+    groups: dictionary containing the main entities and the attached right entities
     
-    It returns the predicted ranked list.
+    It returns the predicted ranked list, with a ranking for each group in the same order of groups.
     """
 
     def compute_relatedness(
-        self, left_merged, left_ignored, right_merged_list, right_ignored_list
+        self, left_merged, left_ignored, right_merged, right_ignored, groups
     ):
-        predicted_rank_list = list()
+        sizes = np.array([len(related) for related in groups.values()], dtype=np.int64)
+        left_groups = left_merged["group"].to_numpy(dtype=np.int64)
 
-        for i in range(len(left_merged["name"])):
-            distances = []
-
-            if right_merged_list[i].size > 0:
-                distances = distance.cdist(
-                    left_merged.iloc[[i], 1:],
-                    right_merged_list[i].iloc[:, 1:],
-                    metric=self.distance_metric,
-                ).flatten()
+        # the right entities of each group found in the vectors go from starts[i] to starts[i] + found_sizes[i]
+        found_sizes = np.bincount(
+            right_merged["group"].to_numpy(dtype=np.int64), minlength=len(sizes)
+        )
+        starts = np.concatenate([[0], np.cumsum(found_sizes)[:-1]])
+
+        all_distances = self.compute_group_distances(
+            left_merged.iloc[:, 2:].to_numpy(dtype=np.float64),
+            right_merged.iloc[:, 2:].to_numpy(dtype=np.float64),
+            left_groups,
+            starts,
+            found_sizes,
+        )
 
-            ignored_distances = np.array(
-                [1 for j in range(len(right_ignored_list[i]))]
-            )  # max dist??
-            distances = np.concatenate((distances, ignored_distances))
+        predicted_rank_list = [np.arange(size) for size in sizes]
+        # the groups with the same number of right entities are ranked together
+        for size in np.unique(sizes[left_groups]):
+            rows = left_groups[sizes[left_groups] == size]
+            columns = np.arange(size)
+            found = columns < found_sizes[rows, np.newaxis]
 
-            predicted_rank_list.append(list(np.argsort(distances)))
+            distances = np.ones((len(rows), size))  # max dist??
+            distances[found] = all_distances[(starts[rows, np.newaxis] + columns)[found]]
 
-        for i in range(len(left_ignored["name"])):
-            #predicted_rank_list.append(list(np.argsort([1 for i in range(20)])))
-            predicted_rank_list.append(list(np.argsort([1 for i in range(10)])))
+            for row, ranking in zip(rows, np.argsort(distances, axis=1)):
+                predicted_rank_list[row] = ranking
 
         return predicted_rank_list
 
+    """
+    It computes the distance between each main entity and each found right entity of its group, without the 
+    distances to the right entities of the other groups. Each main entity is repeated for the right entities of its 
+    group, and the distances are computed pair by pair. For the metrics without a paired computation, a row of 
+    distances is computed for each main entity.
+    It returns an array with the distance of each right entity to the main entity of its group, NaN for the groups 
+    whose main entity is not found.
+    
+    left: matrix containing the vectors of the main entities
+    right: matrix containing the vectors of the right entities, grouped as in right_merged of compute_relatedness
+    left_groups: group of each main entity
+    starts: first row in right of the right entities of each group
+    found_sizes: number of the right entities of each group found in the vectors
+    """
+
+    def compute_group_distances(self, left, right, left_groups, starts, found_sizes):
+        all_distances = np.full(len(right), np.nan)
+        counts = found_sizes[left_groups]
+        if counts.sum() == 0:
+            return all_distances
+
+        if self.distance_metric not in paired_metrics:
+            for i, group in enumerate(left_groups):
+                if counts[i] > 0:
+                    group_rows = slice(starts[group], starts[group] + counts[i])
+                    all_distances[group_rows] = distance.cdist(
+                        left[[i]], right[group_rows], metric=self.distance_metric
+                    )[0]
+            return all_distances
+
+        left_rows = np.repeat(np.arange(len(left_groups)), counts)
+        # the position of each pair in the block of its main entity is added to the start of its group
+        right_rows = np.arange(counts.sum()) + np.repeat(
+            starts[left_groups] - np.cumsum(counts) + counts, counts
+        )
+        all_distances[right_rows] = paired_metrics[self.distance_metric](
+            left[left_rows], right[right_rows]
+        )
+        return all_distances
+
     """
     It evaluates the ranking comparing the predicted and the gold one.
+    The Kendall tau of two rankings without ties only depends on their length and on the number of discordant pairs. 
+    These are counted for all the rankings at once, and the correlation and the p-value are computed once for each 
+    distinct pair of values.
     
     entities_list: it keeps the relation among the main entities and the right entities
     gold_ranking_list: list of the ranking used as gold standard
@@ -107,14 +206,31 @@ class EntityRelatednessModel(AbstractModel):
     ):
         score_list = list()
 
+        sizes = np.array([len(ranking) for ranking in predicted_ranking_list])
+        discordant_pairs = np.zeros(len(predicted_ranking_list), dtype=np.int64)
+        for size in np.unique(sizes):
+            rows = np.flatnonzero(sizes == size)
+            gold = np.array([gold_ranking_list[i] for i in rows])
+            predicted = np.array([predicted_ranking_list[i] for i in rows])
+            # the predicted ranking in the order of the gold one
+            predicted = np.take_along_axis(
+                predicted, np.argsort(gold, axis=1, kind="stable"), axis=1
+            )
+            discordant = predicted[:, :, np.newaxis] > predicted[:, np.newaxis, :]
+            discordant_pairs[rows] = np.triu(discordant, k=1).sum(axis=(1, 2))
+
+        kendalltau_values = dict()
         for i in range(len(entities_list)):
             if self.debugging_mode:
                 print("Entity Relatedness : " + entities_list[i])
                 print(gold_ranking_list[i])
                 print(predicted_ranking_list[i])
-            kendalltau_correlation, kendalltau_pvalue = kendalltau(
-                gold_ranking_list[i], predicted_ranking_list[i]
-            )
+            key = (sizes[i], discordant_pairs[i])
+            if key not in kendalltau_values:
+                kendalltau_values[key] = kendalltau(
+                    gold_ranking_list[i], predicted_ranking_list[i]
+                )
+            kendalltau_correlation, kendalltau_pvalue = kendalltau_values[key]
             if self.debugging_mode:
                 print(
                     "Entity Relatedness : "
@@ -7,6 +7,7 @@ from evaluation_framework.EntityRelatedness.entityRelatedness_model import (
     EntityRelatednessModel as Model,
 )
 from evaluation_framework.abstract_taskManager import AbstractTaskManager
+import numpy as np
 from numpy import mean
 from typing import List
 
@@ -18,7 +19,9 @@ class EntityRelatednessManager(AbstractTaskManager):
     Manager of the Entity relatedness task
     """
 
-    def __init__(self, data_manager, distance_metric, debugging_mode):
+    def __init__(
+        self, data_manager, distance_metric, debugging_mode, datasets: List[str] = None
+    ):
         """Constructor.
 
         Parameters
@@ -29,11 +32,17 @@ class EntityRelatednessManager(AbstractTaskManager):
             Distance metric used to compute the similarity score.
         debugging_mode : bool
             TRUE to run the model by reporting all the errors and information; FALSE otherwise.
+        datasets : List[str]
+            Paths of the datasets to evaluate, either TSV files (.tsv) with the main entity, a related entity and its
+            gold rank in each line or text files with each main entity followed by its related entities in indented
+            lines (see the data manager). The groups can have any size. Each dataset is named after its file name
+            without extension. None to evaluate kgrc_entity_relatedness.
         """
         super().__init__()
         self.debugging_mode = debugging_mode
         self.data_manager = data_manager
         self.distance_metric = distance_metric
+        self.datasets = datasets
         if self.debugging_mode:
             print("Entity relatedness task manager initialized")
 
@@ -45,10 +54,33 @@ class EntityRelatednessManager(AbstractTaskManager):
     def get_task_name() -> str:
         return task_name
 
+    """
+    It returns the names of the main and related entities of the datasets used as gold standard, i.e. the only 
+    entities whose vectors are used by the task.
+    """
+
+    def get_gold_standard_entities(self):
+        if self.datasets is not None:
+            datasets = self.datasets
+        else:
+            datasets = [
+                EntityRelatednessManager.get_file_for_dataset(dataset)
+                for dataset in EntityRelatednessManager.get_gold_standard_file()
+            ]
+
+        entities = set()
+        for gold_standard_file in datasets:
+            for main_entity, related_entities in self.data_manager.read_file(
+                gold_standard_file
+            ).items():
+                entities.add(main_entity)
+                entities.update(related_entities)
+        return entities
+
     """
     It evaluates the Entity relatedness task.
     
-    vectors: dataframe which contains the vectors data
+    vectors: embedding store which contains the vectors data
     vector_file: path of the vector file
     vector_size: size of the vectors
     result_directory: directory where the results must be stored
@@ -66,17 +98,80 @@ class EntityRelatednessManager(AbstractTaskManager):
         scores_dictionary,
     ):
         log_errors = ""
-        #gold_standard_filename = "KORE"
-        gold_standard_filename = "kgrc_entity_relatedness"
-        gold_standard_file = EntityRelatednessManager.get_file_for_dataset(
-            dataset=gold_standard_filename
-        )
+
+        # check whether datasets have been passed through the constructor
+        if self.datasets is not None:
+            datasets = self.datasets
+        else:
+            datasets = [
+                EntityRelatednessManager.get_file_for_dataset(dataset)
+                for dataset in EntityRelatednessManager.get_gold_standard_file()
+            ]
+
+        results_dfs = list()
+        for gold_standard_file in datasets:
+            gold_standard_filename = os.path.splitext(
+                os.path.basename(gold_standard_file)
+            )[0]
+            log_errors += self.evaluate_dataset(
+                vectors,
+                vector_file,
+                vector_size,
+                results_folder,
+                gold_standard_file,
+                gold_standard_filename,
+                results_dfs,
+            )
+
+        if len(results_dfs) > 0:
+            scores_dictionary[task_name] = pd.concat(results_dfs, ignore_index=True)
+
+        log_dictionary[task_name] = log_errors
+
+    """
+    It evaluates the Entity relatedness task on a dataset. It returns the errors to store in the log file.
+    
+    vectors: embedding store which contains the vectors data
+    vector_file: path of the vector file
+    vector_size: size of the vectors
+    results_folder: directory where the results must be stored
+    gold_standard_file: path of the dataset used as gold standard
+    gold_standard_filename: name of the dataset used as gold standard
+    results_dfs: list where the dataframe of the scores is appended
+    """
+
+    def evaluate_dataset(
+        self,
+        vectors,
+        vector_file,
+        vector_size,
+        results_folder,
+        gold_standard_file,
+        gold_standard_filename,
+        results_dfs,
+    ):
+        log_errors = ""
 
         groups = self.data_manager.read_file(gold_standard_file)
+        if len(groups) == 0:
+            log_errors += (
+                "EntityRelatedeness : no groups of entities in "
+                + gold_standard_filename
+                + "\n"
+            )
+            if self.debugging_mode:
+                print(
+                    "EntityRelatedeness : no groups of entities in "
+                    + gold_standard_filename
+                )
+            return log_errors
 
         scores = list()
 
-        left_entities_df = pd.DataFrame({"name": list(groups.keys())})
+        # each main entity keeps the position of its group, which pairs it with its right entities
+        left_entities_df = pd.DataFrame(
+            {"name": list(groups.keys()), "group": np.arange(len(groups))}
+        )
         left_merged, left_ignored = self.data_manager.intersect_vectors_goldStandard(
             vectors, vector_file, vector_size, gold_standard_file, left_entities_df
         )
@@ -97,30 +192,48 @@ class EntityRelatednessManager(AbstractTaskManager):
                     + " in vectors"
                 )
         else:
-            right_merged_list = list()
-            right_ignored_list = list()
-
-            for key in groups.keys():
-                right_entities_df = pd.DataFrame({"name": groups[key]})
-                (
-                    right_merged,
-                    right_ignored,
-                ) = self.data_manager.intersect_vectors_goldStandard(
-                    vectors,
-                    vector_file,
-                    vector_size,
-                    gold_standard_file,
-                    goldStandard_data=right_entities_df,
-                )
-                right_ignored["related_to"] = key
-                right_merged_list.append(right_merged)
-                right_ignored_list.append(right_ignored)
+            # the right entities of all the groups are intersected with the vectors at once
+            right_entities_df = pd.DataFrame(
+                {
+                    "name": [
+                        entity for related in groups.values() for entity in related
+                    ],
+                    "group": [
+                        i for i, related in enumerate(groups.values()) for _ in related
+                    ],
+                }
+            )
+            # as in the intersection of a single group, the repetitions of an entity follow its first occurrence
+            right_entities_df["first_position"] = (
+                pd.Series(np.arange(len(right_entities_df)))
+                .groupby([right_entities_df["group"], right_entities_df["name"]])
+                .transform("min")
+            )
+            right_merged, right_ignored = self.data_manager.intersect_vectors_goldStandard(
+                vectors,
+                vector_file,
+                vector_size,
+                gold_standard_file,
+                goldStandard_data=right_entities_df,
+            )
+            right_merged = (
+                right_merged.sort_values("first_position", kind="mergesort")
+                .drop(columns="first_position")
+                .reset_index(drop=True)
+            )
 
-                self.storeIgnored(results_folder, gold_standard_filename, right_ignored)
+            keys = list(groups.keys())
+            right_ignored = pd.DataFrame(
+                {
+                    "name": right_ignored["name"],
+                    "related_to": [keys[i] for i in right_ignored["group"]],
+                }
+            )
+            self.storeIgnored(results_folder, gold_standard_filename, right_ignored)
 
             model = Model(task_name, self.distance_metric, self.debugging_mode)
             scores = model.train(
-                left_merged, left_ignored, right_merged_list, right_ignored_list, groups
+                left_merged, left_ignored, right_merged, right_ignored, groups
             )
 
             for score in scores:
@@ -129,10 +242,9 @@ class EntityRelatednessManager(AbstractTaskManager):
 
             self.storeResults(results_folder, gold_standard_filename, scores)
 
-            results_df = self.resultsAsDataFrame(scores)
-            scores_dictionary[task_name] = results_df
+            results_dfs.append(self.resultsAsDataFrame(scores))
 
-        log_dictionary[task_name] = log_errors
+        return log_errors
 
     """
     It stores the entities which are in the dataset used as gold standard, but not in the input file.
@@ -1,11 +1,13 @@
 from sklearn import tree
 from sklearn import linear_model
-from sklearn.model_selection import cross_val_score
+from sklearn.model_selection import cross_validate
 from sklearn.neighbors import KNeighborsRegressor
 import numpy as np
 from evaluation_framework.abstract_model import AbstractModel
 
 float_precision = 15
+# number of folds of the cross-validation
+n_splits = 10
 
 """
 Model of the regression task
@@ -44,17 +46,19 @@ class RegressionModel(AbstractModel):
     """
     It trains the model based on the provided data
     
-    data: dataframe with entity name as first column, class label as second column and the vectors starting from the third column
+    X: matrix containing the vectors of the entities
+    y: array containing the values to predict of the entities
+    folds: list of (train, test) arrays of row positions, one for each fold of the cross-validation
+    n_jobs: number of jobs used to run the cross-validation, None to run it in this process
     
     It returns the result object reporting the task name, the model name and its configuration - if any -, and the RMSE as evaluation metric.
     """
 
-    def train(self, data):
+    def train(self, X, y, folds, n_jobs=None):
         if self.debugging_mode:
             print("Regression training...")
         scoring = "neg_mean_squared_error"
-        n_splits = 10
-        n_samples = data.shape[0]
+        n_samples = len(y)
         if n_splits > n_samples:
             raise ValueError(
                 (
@@ -64,9 +68,9 @@ class RegressionModel(AbstractModel):
                 + "\n"
             )
 
-        scores = cross_val_score(
-            self.model, data.iloc[:, 2:], data["label"], cv=n_splits, scoring=scoring
-        )
+        scores = cross_validate(
+            self.model, X, y, cv=folds, scoring=scoring, n_jobs=n_jobs
+        )["test_score"]
         scoring = "root_mean_squared_error"
         scoring_value = np.mean(np.sqrt(np.abs(scores)))
         if self.debugging_mode:
@@ -3,7 +3,10 @@ from collections import defaultdict
 import os
 import pandas as pd
 
-from evaluation_framework.Regression.regression_model import RegressionModel as Model
+from evaluation_framework.Regression.regression_model import (
+    RegressionModel as Model,
+    n_splits,
+)
 from evaluation_framework.abstract_taskManager import AbstractTaskManager
 from numpy import mean
 from typing import List
@@ -15,7 +18,15 @@ class RegressionManager(AbstractTaskManager):
     Manager of the Regression task
     """
 
-    def __init__(self, data_manager, debugging_mode: bool, datasets: List[str] = None):
+    split_into_units = True
+
+    def __init__(
+        self,
+        data_manager,
+        debugging_mode: bool,
+        datasets: List[str] = None,
+        n_jobs: int = None,
+    ):
         """Constructor. It initializes the manager of the regression task.
 
         Parameters
@@ -26,10 +37,13 @@ class RegressionManager(AbstractTaskManager):
             TRUE to run the model by reporting all the errors and information; FALSE otherwise
         datasets : List[str] or None
             None if all datasets shall be evaluated. Specific datasets can also be named using this parameter.
+        n_jobs : int or None
+            Number of jobs used by the cross-validation of each model. None to run it in the same process.
         """
         self.debugging_mode = debugging_mode
         self.data_manager = data_manager
         self.datasets = datasets
+        self.n_jobs = n_jobs
         if debugging_mode:
             print("Regression task manager initialized")
 
@@ -41,15 +55,37 @@ class RegressionManager(AbstractTaskManager):
     def get_task_name():
         return task_name
 
+    """
+    It returns the names of the entities of the datasets used as gold standard, i.e. the only entities whose vectors 
+    are used by the task.
+    """
+
+    def get_gold_standard_entities(self):
+        if self.datasets is not None:
+            gold_standard_filenames = self.datasets
+        else:
+            gold_standard_filenames = self.get_gold_standard_file()
+
+        entities = set()
+        for gold_standard_filename in gold_standard_filenames:
+            gold = self.data_manager.read_file(
+                RegressionManager.get_file_for_dataset(gold_standard_filename), ["name"]
+            )
+            entities.update(gold["name"])
+        return entities
+
     """
     It evaluates the Regression task.
+    Each combination of dataset, shuffle of the dataset and model is a unit of work, which is run by the task 
+    scheduler if provided.
     
-    vectors: dataframe which contains the vectors data
+    vectors: embedding store which contains the vectors data
     vector_file: path of the vector file
     vector_size: size of the vectors
     result_directory: directory where the results must be stored
     log_dictionary: dictionary to store all the information to store in the log file
     scores_dictionary: dictionary to store all the scores which will be used in the comparison phase
+    scheduler: task scheduler running the units of work, or None to run them in this process
     """
 
     def evaluate(
@@ -60,6 +96,7 @@ class RegressionManager(AbstractTaskManager):
         results_folder,
         log_dictionary,
         scores_dictionary,
+        scheduler=None,
     ):
         log_errors = ""
 
@@ -73,22 +110,19 @@ class RegressionManager(AbstractTaskManager):
         print("test1")
         pd.set_option("display.max_colwidth", 1000)
 
+        regression_model_names = ["LR", "KNN", "M5"]
+
+        units = list()
+        data_coverages = dict()
         for gold_standard_filename in gold_standard_filenames:
             gold_standard_file = RegressionManager.get_file_for_dataset(
                 dataset=gold_standard_filename
             )
 
-            regression_model_names = ["LR", "KNN", "M5"]
-
-            scores = defaultdict(list)
-            totalscores_element = defaultdict(list)
-
             print("test2")
             pd.options.display.width = 999
-            #for name in list(vectors["name"]):
-            #    print(name + " " + str(len(name)))
-            data, ignored = self.data_manager.intersect_vectors_goldStandard(
-                vectors, vector_file, vector_size, gold_standard_file, None, "name", "label"
+            data, ignored = self.get_data(
+                vectors, vector_file, vector_size, gold_standard_filename
             )
             print("test3")
             data_coverage = len(data) / (len(data) + len(ignored))
@@ -107,36 +141,74 @@ class RegressionManager(AbstractTaskManager):
                         + gold_standard_file
                     )
             else:
+                data_coverages[gold_standard_filename] = data_coverage
                 for i in range(10):
-                    data = data.sample(frac=1, random_state=i).reset_index(drop=True)
-
                     for model_name in regression_model_names:
-                        # initialize the model
-                        model = Model(task_name, model_name, self.debugging_mode)
-                        # train and print score
-                        try:
-                            result = model.train(data)
-                            result["gold_standard_file"] = gold_standard_filename
-                            result["coverage"] = data_coverage
-                            scores[model_name].append(result)
-                            totalscores_element[model_name].append(result)
-                        except Exception as e:
-                            log_errors += (
-                                "File used as gold standard: "
-                                + gold_standard_filename
-                                + "\n"
-                            )
-                            log_errors += "Regression method: " + model_name + "\n"
-                            log_errors += str(e) + "\n"
-
-                self.storeResults(results_folder, gold_standard_filename, scores)
-                totalscores[gold_standard_filename] = totalscores_element
+                        units.append(
+                            (vector_file, vector_size, gold_standard_filename, i, model_name)
+                        )
+
+        results = self.run_units("train_unit", units, vectors, scheduler)
 
+        scores = defaultdict(lambda: defaultdict(list))
+        for unit, (result, error) in zip(units, results):
+            _, _, gold_standard_filename, _, model_name = unit
+
+            if error is None:
+                result["gold_standard_file"] = gold_standard_filename
+                result["coverage"] = data_coverages[gold_standard_filename]
+                scores[gold_standard_filename][model_name].append(result)
+            else:
+                log_errors += (
+                    "File used as gold standard: " + gold_standard_filename + "\n"
+                )
+                log_errors += "Regression method: " + model_name + "\n"
+                log_errors += str(error) + "\n"
+
+        for gold_standard_filename in data_coverages:
+            self.storeResults(
+                results_folder, gold_standard_filename, scores[gold_standard_filename]
+            )
+            totalscores[gold_standard_filename] = scores[gold_standard_filename]
+        self.clear_data()
+
+        if len(gold_standard_filenames) > 0:
             results_df = self.resultsAsDataFrame(totalscores)
             scores_dictionary[task_name] = results_df
 
         log_dictionary[task_name] = log_errors
 
+    """
+    It trains a model on a shuffle of a dataset. It is a unit of work of the Regression task.
+    It returns the result object reporting the task name, the model name and its configuration - if any -, and the evaluation metric.
+    
+    vectors: embedding store which contains the vectors data
+    vector_file: path of the vector file
+    vector_size: size of the vectors
+    gold_standard_filename: the dataset used as gold standard
+    shuffle: number of the shuffle of the dataset
+    model_name: name of the model
+    """
+
+    def train_unit(
+        self, vectors, vector_file, vector_size, gold_standard_filename, shuffle, model_name
+    ):
+        X, y = self.get_features(
+            vectors, vector_file, vector_size, gold_standard_filename
+        )
+        folds = self.get_folds(
+            vectors,
+            vector_file,
+            vector_size,
+            gold_standard_filename,
+            shuffle,
+            n_splits,
+            False,
+        )
+
+        model = Model(task_name, model_name, self.debugging_mode)
+        return model.train(X, y, folds, self.n_jobs)
+
     """
     It stores the entities which are in the dataset used as gold standard, but not in the input file.
     
@@ -1,7 +1,13 @@
 import numpy as np
 from evaluation_framework.abstract_model import AbstractModel
+from evaluation_framework.embeddingStore import get_compute_dtype
+from evaluation_framework.nearestNeighbourIndex import ExactIndex, recall_at_k
 
 float_precision = 15
+# number of questions whose predicted vectors are compared with all the vectors at once
+block_size = 128
+# maximum number of questions searched also by the exact index to compute the recall@k of an approximate index
+recall_sample_size = 1000
 
 
 def default_analogy_function(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
@@ -20,10 +26,18 @@ class SemanticAnalogiesModel(AbstractModel):
     task_name: name of the task
     top_k: the predicted vector is compared with all the vectors and the k nearest ones are depicted. If the actual vector is among the k nearest one, the task is considered correct
     debugging_mode: {TRUE, FALSE}, TRUE to run the model by reporting all the errors and information; FALSE otherwise
-    analogy_function (optional): is the function to compute the analogy. It takes 3 vectors and returns the predicted one
+    analogy_function (optional): is the function to compute the analogy. It takes 3 matrices, with the vectors of a block of questions as rows, and returns the matrix of the predicted vectors
+    block_size (optional): number of questions processed at once. The memory used grows with block_size times the number of vectors
     """
 
-    def __init__(self, task_name, top_k, debugging_mode, analogy_function=None):
+    def __init__(
+        self,
+        task_name,
+        top_k,
+        debugging_mode,
+        analogy_function=None,
+        block_size=block_size,
+    ):
         self.debugging_mode = debugging_mode
         self.task_name = task_name
 
@@ -33,44 +47,71 @@ class SemanticAnalogiesModel(AbstractModel):
             self.analogy_function = analogy_function
 
         self.top_k = top_k
+        if block_size < 1:
+            raise ValueError(
+                "block_size must be a positive number, got " + str(block_size)
+            )
+        self.block_size = block_size
         if debugging_mode:
             print("SemanticAnalogies model initialized")
 
     """
     It trains the model based on the provided data
     
-    vocab: dictionary of all the entities
-    data: dataframe with entity name as first column, class label as second column and the vectors starting from the third column
+    data: matrix with the positions in W of the 4 entities of each question
     W: all the vectors in the input file (even if they are not present in the dataset used as gold standard)
-    It returns the result object reporting the task name and the evaluation metrics.
+    index (optional): nearest neighbour index of W used to search the k nearest vectors. Default: None to compare the 
+        predicted vectors with all the vectors
+    candidates (optional): array with the positions in W of the only vectors which can be predicted. The predicted 
+        vectors are compared with them only and index is ignored. Default: None to consider all the vectors
+    It returns the result object reporting the task name and the evaluation metrics. If the index is approximate, 
+    the result also reports its recall@k with respect to the exact search, on a sample of the questions.
     """
 
-    def train(self, vocab, data, W):
-        indices = np.array([[vocab[word] for word in row] for row in data])
+    def train(self, data, W, index=None, candidates=None):
+        indices = np.asarray(data).reshape(-1, 4)
         ind1, ind2, ind3, ind4 = indices.T
 
-        predictions = np.zeros((len(indices), self.top_k))
-
-        for j in range(len(indices)):
-            pred_vec = self.analogy_function(
-                W[ind1[j], :], W[ind2[j], :], W[ind3[j], :]
-            )
-            dist = np.dot(W, pred_vec.T)
+        if candidates is None:
+            exact_index = ExactIndex(W)
+            # position of each entity among the vectors searched
+            targets = indices
+        else:
+            exact_index = ExactIndex(W[candidates])
+            index = None
+            # the entities which are not candidates get position -1, so they are neither excluded nor predicted
+            candidate_positions = np.full(len(W), -1, dtype=np.int64)
+            candidate_positions[candidates] = np.arange(len(candidates))
+            targets = candidate_positions[indices]
+        if index is None:
+            index = exact_index
+        # e.g. float16 vectors are converted to float32 before computing the analogies
+        compute_dtype = get_compute_dtype(W.dtype)
 
-            dist[ind1[j]] = -np.Inf
-            dist[ind2[j]] = -np.Inf
-            dist[ind3[j]] = -np.Inf
+        correct_predictions = 0
+        for start in range(0, len(indices), self.block_size):
+            block = slice(start, start + self.block_size)
 
-            predictions[j] = np.argsort(-dist, axis=0)[: self.top_k].T
+            pred_vecs = self.analogy_function(
+                W[ind1[block], :].astype(compute_dtype, copy=False),
+                W[ind2[block], :].astype(compute_dtype, copy=False),
+                W[ind3[block], :].astype(compute_dtype, copy=False),
+            )
+            # the k nearest vectors of each question, in no particular order
+            predictions = index.search(pred_vecs, self.top_k, targets[block, :3])
+            actual = targets[block, 3, np.newaxis]
+            correct_predictions += int(np.sum((predictions == actual) & (actual >= 0)))
 
-        correct_predictions = 0
-        for actual_entity, predicted_entities in zip(ind4, predictions):
-            if actual_entity in predicted_entities:
-                correct_predictions += 1
-        total_predictions = len(predictions)
+        total_predictions = len(indices)
         accuracy = correct_predictions / total_predictions
 
+        recall = None
+        if index.approximate:
+            recall = self.get_recall(indices, W, index, exact_index)
+
         if self.debugging_mode:
+            if recall is not None:
+                print("SemanticAnalogies : RECALL@%d: %.4f" % (self.top_k, recall))
             if total_predictions == 0:
                 print("SemanticAnalogies : No data to check")
             else:
@@ -79,10 +120,47 @@ class SemanticAnalogiesModel(AbstractModel):
                     % (self.top_k, accuracy, correct_predictions, total_predictions)
                 )
 
-        return {
+        result = {
             "task_name": self.task_name,
             "top_k_value": self.top_k,
             "right_answers": correct_predictions,
             "tot_answers": total_predictions,
             "accuracy": round(accuracy, float_precision),
         }
+        if recall is not None:
+            result["recall_at_k"] = round(recall, float_precision)
+        return result
+
+    """
+    It returns the recall@k of an approximate index, i.e. the average fraction of the k nearest vectors found by the 
+    exact search which are also found by the index, on a sample of at most recall_sample_size questions.
+    
+    indices: matrix with the positions in W of the 4 entities of each question
+    W: all the vectors in the input file
+    index: approximate nearest neighbour index of W
+    exact_index: exact nearest neighbour index of W
+    """
+
+    def get_recall(self, indices, W, index, exact_index):
+        if len(indices) > recall_sample_size:
+            sample = np.random.RandomState(0).choice(
+                len(indices), recall_sample_size, replace=False
+            )
+            indices = indices[np.sort(sample)]
+
+        compute_dtype = get_compute_dtype(W.dtype)
+        found = list()
+        exact = list()
+        for start in range(0, len(indices), self.block_size):
+            block = indices[start : start + self.block_size]
+            pred_vecs = self.analogy_function(
+                W[block[:, 0], :].astype(compute_dtype, copy=False),
+                W[block[:, 1], :].astype(compute_dtype, copy=False),
+                W[block[:, 2], :].astype(compute_dtype, copy=False),
+            )
+            found.append(index.search(pred_vecs, self.top_k, block[:, :3]))
+            exact.append(exact_index.search(pred_vecs, self.top_k, block[:, :3]))
+
+        if len(found) == 0:
+            return None
+        return recall_at_k(np.concatenate(found), np.concatenate(exact))
@@ -4,8 +4,10 @@ import pandas as pd
 
 from evaluation_framework.SemanticAnalogies.semanticAnalogies_model import (
     SemanticAnalogiesModel as Model,
+    block_size as default_block_size,
 )
 from evaluation_framework.abstract_taskManager import AbstractTaskManager
+from evaluation_framework.nearestNeighbourIndex import get_index
 from numpy import mean
 import numpy as np
 from _collections import defaultdict
@@ -29,6 +31,9 @@ class SemanticAnalogiesManager(AbstractTaskManager):
             [np.ndarray, np.ndarray, np.ndarray], np.ndarray
         ] = None,
         datasets: List[str] = None,
+        block_size: int = default_block_size,
+        analogy_index: str = "exact",
+        analogy_candidates: str = "all",
     ):
         """Constructor. It initializes the manager of the semantic analogies task.
 
@@ -42,9 +47,22 @@ class SemanticAnalogiesManager(AbstractTaskManager):
         debugging_mode : bool
             TRUE to run the model by reporting all the errors and information; FALSE otherwise
         analogy_function : Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]
-            Is the function to compute the analogy. It takes 3 vectors and returns the predicted one.
+            Is the function to compute the analogy. It takes 3 matrices, with the vectors of a block of questions
+            as rows, and returns the matrix of the predicted vectors.
         datasets : List[str]
             None if all datasets shall be evaluated. Specific datasets can also be named using this parameter.
+        block_size : int
+            Number of questions whose predicted vectors are compared with all the vectors at once. The memory used
+            grows with block_size times the number of vectors.
+        analogy_index : str
+            {exact, ivf, hnswlib, faiss}, index used to search the k nearest vectors of the predicted ones. exact
+            compares them with all the vectors; the others are approximate and their recall@k is reported with the
+            results. hnswlib and faiss require the related package.
+        analogy_candidates : str
+            Entities which can be predicted. all to consider all the entities; answers to consider, for each dataset,
+            only the entities which are the answer of one of its questions; otherwise, the path of a file with a
+            candidate entity for each line. If the candidates are restricted, the predicted vectors are compared
+            with their vectors only and analogy_index is ignored.
         """
         super().__init__()
         self.debugging_mode = debugging_mode
@@ -52,6 +70,9 @@ class SemanticAnalogiesManager(AbstractTaskManager):
         self.analogy_function = analogy_function
         self.top_k = top_k
         self.datasets = datasets
+        self.block_size = block_size
+        self.analogy_index = analogy_index
+        self.analogy_candidates = analogy_candidates
         if debugging_mode:
             print("SemanticAnalogies task manager initialized")
 
@@ -66,7 +87,7 @@ class SemanticAnalogiesManager(AbstractTaskManager):
     """
     It evaluates the Semantic analogies task.
     
-    vectors: dataframe which contains the vectors data
+    vectors: embedding store which contains the vectors data
     vector_file: path of the vector file
     vector_size: size of the vectors
     result_directory: directory where the results must be stored
@@ -85,10 +106,10 @@ class SemanticAnalogiesManager(AbstractTaskManager):
     ):
         log_errors = ""
 
-        vocab = self.data_manager.create_vocab(vectors, vector_file, vector_size)
-        W_norm = self.data_manager.normalize_vectors(
-            vectors, vector_file, vector_size, vocab
-        )
+        vocab = vectors.vocab
+        W_norm = vectors.normalized
+        # the index is built once and used for all the datasets
+        index = None
 
         # check whether gold standard datasets have been passed through the constructor
         if self.datasets is not None:
@@ -124,10 +145,20 @@ class SemanticAnalogiesManager(AbstractTaskManager):
                     )
             else:
                 model = Model(
-                    task_name, self.top_k, self.debugging_mode, self.analogy_function
+                    task_name,
+                    self.top_k,
+                    self.debugging_mode,
+                    self.analogy_function,
+                    self.block_size,
                 )
 
-                result = model.train(vocab, data, W_norm)
+                candidates = self.get_candidates(vocab, data)
+                if candidates is None and index is None:
+                    index = get_index(W_norm, self.analogy_index)
+                result = model.train(data, W_norm, index, candidates)
+                if candidates is not None:
+                    result["candidates"] = self.analogy_candidates
+                    result["tot_candidates"] = len(candidates)
                 result["gold_standard_file"] = gold_standard_filename
                 result["coverage"] = data_coverage
                 scores.append(result)
@@ -141,6 +172,38 @@ class SemanticAnalogiesManager(AbstractTaskManager):
 
         log_dictionary[task_name] = log_errors
 
+    """
+    It returns the positions in the vectors of the entities which can be predicted, sorted, or None if all the 
+    entities can be predicted.
+    
+    vocab: compact vocabulary with the position of each entity in the vectors
+    data: matrix with the positions in the vectors of the 4 entities of each question of the dataset used as gold 
+        standard
+    """
+
+    def get_candidates(self, vocab, data):
+        if self.analogy_candidates == "all":
+            return None
+
+        if self.analogy_candidates == "answers":
+            candidates = np.unique(data[:, 3])
+        else:
+            if not hasattr(self, "_candidate_names"):
+                with open(self.analogy_candidates) as candidates_file:
+                    self._candidate_names = set(
+                        line.strip() for line in candidates_file if line.strip()
+                    )
+            rows = vocab.lookup(self._candidate_names)
+            candidates = np.sort(rows[rows >= 0])
+        if self.debugging_mode:
+            print(
+                "SemanticAnalogies : "
+                + str(len(candidates))
+                + " candidate entities out of "
+                + str(len(vocab))
+            )
+        return candidates
+
     """
     It stores the entities which are in the dataset used as gold standard, but not in the input file.
     
@@ -201,6 +264,10 @@ class SemanticAnalogiesManager(AbstractTaskManager):
                 "tot_answers",
                 "accuracy",
             ]
+            if any("recall_at_k" in score for score in scores):
+                fieldnames.append("recall_at_k")
+            if any("candidates" in score for score in scores):
+                fieldnames.extend(["candidates", "tot_candidates"])
             writer = csv.DictWriter(file_result, fieldnames=fieldnames)
             writer.writeheader()
             for score in scores:
@@ -228,6 +295,9 @@ class SemanticAnalogiesManager(AbstractTaskManager):
 
         for (gold_standard_filename, gold_standard_scores) in scores.items():
             for metric in metrics:
+                # the recall@k is only reported by the approximate indices
+                if any(metric not in score for score in gold_standard_scores):
+                    continue
                 metric_scores = list()
                 for score in gold_standard_scores:
                     metric_scores.append(score[metric])
@@ -239,7 +309,18 @@ class SemanticAnalogiesManager(AbstractTaskManager):
                 data_dict["gold_standard_file"].append(score["gold_standard_file"])
                 data_dict["coverage"].append(score["coverage"])
                 data_dict["model"].append("-")
-                data_dict["model_configuration"].append("-")
+                # the scores on restricted candidates or of an approximate index are not comparable with the ones 
+                # of the exact search on all the entities
+                if "candidates" in score:
+                    data_dict["model_configuration"].append(
+                        "candidates=" + score["candidates"]
+                    )
+                elif self.analogy_index != "exact":
+                    data_dict["model_configuration"].append(
+                        "index=" + self.analogy_index
+                    )
+                else:
+                    data_dict["model_configuration"].append("-")
                 data_dict["metric"].append(metric)
                 data_dict["score_value"].append(metric_score)
 
@@ -292,10 +373,11 @@ class SemanticAnalogiesManager(AbstractTaskManager):
 
     @staticmethod
     def get_metric_list() -> List[str]:
-        """It returns the metrics used in the evaluation of the semantic analogies task.
+        """It returns the metrics used in the evaluation of the semantic analogies task. The recall@k is only
+        reported by the approximate indices.
 
         Returns
         -------
             It returns the metrics used in the evaluation of the semantic analogies task.
         """
-        return ["accuracy"]
+        return ["accuracy", "recall_at_k"]
@@ -14,10 +14,11 @@ class AbstractDataManager:
     
     vector_filename: path of the file provided in input, which contains entities and the related vectors.
     vector_size: size of the vectors
+    entities: names of the only entities whose vectors are read. Default: None to read all the vectors.
     """
 
     @abstractmethod
-    def inizialize_vectors(self, vector_file, vector_size):
+    def inizialize_vectors(self, vector_file, vector_size, entities=None):
         pass
 
     """
@@ -46,7 +47,7 @@ class AbstractDataManager:
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -72,7 +73,7 @@ class AbstractDataManager:
     It returns a vocabulary containing all the entities of the vector file provided in input.
     It return a dictionary which key is the entity name and the value is a progressive value.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     """
@@ -84,7 +85,7 @@ class AbstractDataManager:
     """
     It normalizes the vectors to unit length.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     vocab: dictionary which key is the entity name and the value is a progressive value
@@ -14,10 +14,11 @@ class AbstractEvaluationManager:
     
     vector_filename: path of the vector file
     vector_size: size of the vectors
+    entities: names of the only entities whose vectors are read. Default: None to read all the vectors.
     """
 
     @abstractmethod
-    def initialize_vectors(self, vector_file, vec_size):
+    def initialize_vectors(self, vector_file, vec_size, entities=None):
         pass
 
     """
@@ -27,11 +28,36 @@ class AbstractEvaluationManager:
     similarity_metric: distance metric used as similarity metric
     top_k: parameters of the semantic analogies task
     analogy_function: function to compute the analogy among vectors
+    analogy_index: index used to search the nearest vectors in the semantic analogies task
+    analogy_candidates: entities which can be predicted in the semantic analogies task
+    document_corpora: corpora of annotated documents of the document similarity task, None to use LP50
+    relatedness_datasets: paths of the datasets of the entity relatedness task, None to use kgrc_entity_relatedness
+    clustering_large_scale_threshold: number of entities of a clustering dataset above which the large-scale models are 
+        used, None to use the exact models only
+    clustering_dbscan_sweep: True to fit DBSCAN also for a grid of eps and min_samples values in the clustering task
+    classification_svm_sweep: True to train the SVM models of all the C values together in the classification task, 
+        computing the kernel once for each fold
+    n_jobs: number of jobs used by the cross-validation of the classification and regression models. None to run it 
+        in the same process.
+    evaluators: task managers created by create_evaluators, which replace the parameters above. None to create them.
     """
 
     @abstractmethod
     def run_tests_in_sequential(
-        self, tasks, similarity_metric, top_k, analogy_function=None
+        self,
+        tasks,
+        similarity_metric,
+        top_k,
+        analogy_function=None,
+        analogy_index="exact",
+        analogy_candidates="all",
+        document_corpora=None,
+        relatedness_datasets=None,
+        clustering_large_scale_threshold=None,
+        clustering_dbscan_sweep=False,
+        classification_svm_sweep=False,
+        n_jobs=None,
+        evaluators=None,
     ):
         pass
 
@@ -42,11 +68,36 @@ class AbstractEvaluationManager:
     similarity_metric: distance metric used as similarity metric
     top_k: parameters of the semantic analogies task
     analogy_function: function to compute the analogy among vectors
+    n_jobs: maximum number of worker processes. None or -1 to use all the available cores.
+    analogy_index: index used to search the nearest vectors in the semantic analogies task
+    analogy_candidates: entities which can be predicted in the semantic analogies task
+    document_corpora: corpora of annotated documents of the document similarity task, None to use LP50
+    relatedness_datasets: paths of the datasets of the entity relatedness task, None to use kgrc_entity_relatedness
+    clustering_large_scale_threshold: number of entities of a clustering dataset above which the large-scale models are 
+        used, None to use the exact models only
+    clustering_dbscan_sweep: True to fit DBSCAN also for a grid of eps and min_samples values in the clustering task
+    classification_svm_sweep: True to train the SVM models of all the C values together in the classification task, 
+        computing the kernel once for each fold
+    evaluators: task managers created by create_evaluators with n_jobs None, which replace the parameters above. None 
+        to create them.
     """
 
     @abstractmethod
     def run_tests_in_parallel(
-        self, tasks, similarity_metric, top_k, analogy_function=None
+        self,
+        tasks,
+        similarity_metric,
+        top_k,
+        analogy_function=None,
+        n_jobs=None,
+        analogy_index="exact",
+        analogy_candidates="all",
+        document_corpora=None,
+        relatedness_datasets=None,
+        clustering_large_scale_threshold=None,
+        clustering_dbscan_sweep=False,
+        classification_svm_sweep=False,
+        evaluators=None,
     ):
         pass
 
@@ -1,4 +1,7 @@
 from abc import ABCMeta, abstractmethod
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import check_cv
 
 """
 It abstracts the behavior of a Task manager. It should be extended by each task manager.
@@ -6,13 +9,24 @@ It abstracts the behavior of a Task manager. It should be extended by each task
 
 
 class AbstractTaskManager(metaclass=ABCMeta):
+    # True if the task is split into units of work which the task scheduler can run in parallel
+    split_into_units = False
+
     def __init__(self):
         super().__init__()
 
+    """
+    It returns the names of the entities whose vectors are used by the task, or None if the task uses all the 
+    vectors. By default, all the vectors are used.
+    """
+
+    def get_gold_standard_entities(self):
+        return None
+
     """
     It evaluates the specific task.
     
-    vectors: dataframe which contains the vectors data
+    vectors: embedding store which contains the vectors data
     vector_file: path of the vector file
     vector_size: size of the vectors
     result_directory: directory where the results must be stored
@@ -31,3 +45,235 @@ class AbstractTaskManager(metaclass=ABCMeta):
         scores_dictionary,
     ):
         pass
+
+    """
+    It evaluates the specific task in a worker process of the task scheduler.
+    It returns the dictionary of the information to store in the log file and the dictionary of the scores.
+    
+    vectors: embedding store which contains the vectors data
+    vector_file: path of the vector file
+    vector_size: size of the vectors
+    result_directory: directory where the results must be stored
+    """
+
+    def evaluate_in_worker(self, vectors, vector_file, vector_size, result_directory):
+        log_dictionary = dict()
+        scores_dictionary = dict()
+        self.evaluate(
+            vectors,
+            vector_file,
+            vector_size,
+            result_directory,
+            log_dictionary,
+            scores_dictionary,
+        )
+        return log_dictionary, scores_dictionary
+
+    """
+    It evaluates the specific task in parallel mode.
+    If the task is split into units of work, they are run by the task scheduler. Otherwise, the whole task is run 
+    in a worker process.
+    It returns the dictionary of the information to store in the log file and the dictionary of the scores.
+    
+    scheduler: task scheduler running the units of work
+    vectors: embedding store which contains the vectors data
+    vector_file: path of the vector file
+    vector_size: size of the vectors
+    result_directory: directory where the results must be stored
+    """
+
+    def evaluate_with_scheduler(
+        self, scheduler, vectors, vector_file, vector_size, result_directory
+    ):
+        if not self.split_into_units:
+            return scheduler.submit(
+                self.get_task_name(),
+                "evaluate_in_worker",
+                vector_file,
+                vector_size,
+                result_directory,
+            ).result()
+
+        log_dictionary = dict()
+        scores_dictionary = dict()
+        self.evaluate(
+            vectors,
+            vector_file,
+            vector_size,
+            result_directory,
+            log_dictionary,
+            scores_dictionary,
+            scheduler=scheduler,
+        )
+        return log_dictionary, scores_dictionary
+
+    """
+    It runs units of work of the task, i.e. calls of one of its methods with the embedding store as first argument.
+    They are run by the task scheduler, if any, otherwise one after the other.
+    It returns a list with a (result, exception) pair for each unit, in the same order of the units.
+    
+    method_name: name of the method to call
+    units: list of tuples with the further arguments of each call
+    vectors: embedding store which contains the vectors data
+    scheduler: task scheduler, or None to run the units in this process
+    """
+
+    def run_units(self, method_name, units, vectors, scheduler=None):
+        if scheduler is None:
+            results = list()
+            for args in units:
+                try:
+                    results.append((getattr(self, method_name)(vectors, *args), None))
+                except Exception as e:
+                    results.append((None, e))
+            return results
+
+        futures = [
+            scheduler.submit(self.get_task_name(), method_name, *args)
+            for args in units
+        ]
+        results = list()
+        for future in futures:
+            try:
+                results.append((future.result(), None))
+            except Exception as e:
+                results.append((None, e))
+        return results
+
+    """
+    It returns the order of the rows of a dataset after it has been shuffled a number of times, each time with 
+    the random state equal to the number of the shuffle, i.e. data.sample(frac=1, random_state=i) for i from 0 to 
+    shuffle.
+    
+    n_rows: number of rows of the dataset
+    shuffle: number of the last shuffle
+    """
+
+    @staticmethod
+    def get_shuffled_order(n_rows, shuffle):
+        order = pd.Series(range(n_rows))
+        for i in range(shuffle + 1):
+            order = order.sample(frac=1, random_state=i).reset_index(drop=True)
+        return order.to_numpy()
+
+    """
+    It returns the dataset used as gold standard merged with the vectors and the ignored entities. 
+    The result is kept, so that the units of work on the same dataset merge it only once.
+    
+    vectors: embedding store which contains the vectors data
+    vector_file: path of the vector file
+    vector_size: size of the vectors
+    gold_standard_filename: the dataset used as gold standard
+    """
+
+    def get_data(self, vectors, vector_file, vector_size, gold_standard_filename):
+        if not hasattr(self, "_data"):
+            self._data = dict()
+
+        if gold_standard_filename not in self._data:
+            self._data[
+                gold_standard_filename
+            ] = self.data_manager.intersect_vectors_goldStandard(
+                vectors=vectors,
+                vector_filename=vector_file,
+                vector_size=vector_size,
+                goldStandard_filename=self.get_file_for_dataset(gold_standard_filename),
+                column_key="name",
+                column_score="label",
+            )
+        return self._data[gold_standard_filename]
+
+    """
+    It returns the matrix containing the vectors and the array containing the values to predict of the dataset used 
+    as gold standard. They are computed once for each dataset and shared by all the models.
+    
+    vectors: embedding store which contains the vectors data
+    vector_file: path of the vector file
+    vector_size: size of the vectors
+    gold_standard_filename: the dataset used as gold standard
+    """
+
+    def get_features(self, vectors, vector_file, vector_size, gold_standard_filename):
+        if not hasattr(self, "_features"):
+            self._features = dict()
+
+        if gold_standard_filename not in self._features:
+            data, _ = self.get_data(
+                vectors, vector_file, vector_size, gold_standard_filename
+            )
+            self._features[gold_standard_filename] = (
+                data.iloc[:, 2:].to_numpy(),
+                data["label"].to_numpy(),
+            )
+        return self._features[gold_standard_filename]
+
+    """
+    It returns the cross-validation folds of a shuffle of the dataset used as gold standard, see get_shuffled_folds. 
+    They are computed once for each shuffle and shared by all the models. None is returned if the dataset is smaller 
+    than the number of folds, which the models report.
+    
+    vectors: embedding store which contains the vectors data
+    vector_file: path of the vector file
+    vector_size: size of the vectors
+    gold_standard_filename: the dataset used as gold standard
+    shuffle: number of the shuffle of the dataset
+    n_splits: number of folds
+    classifier: True if the folds are used by classifiers, i.e. they are stratified
+    """
+
+    def get_folds(
+        self,
+        vectors,
+        vector_file,
+        vector_size,
+        gold_standard_filename,
+        shuffle,
+        n_splits,
+        classifier,
+    ):
+        if not hasattr(self, "_folds"):
+            self._folds = dict()
+
+        key = (gold_standard_filename, shuffle)
+        if key not in self._folds:
+            _, y = self.get_features(
+                vectors, vector_file, vector_size, gold_standard_filename
+            )
+            if len(y) < n_splits:
+                self._folds[key] = None
+            else:
+                self._folds[key] = self.get_shuffled_folds(
+                    y, shuffle, n_splits, classifier
+                )
+        return self._folds[key]
+
+    """
+    It releases the datasets, the features and the folds kept by get_data, get_features and get_folds once the 
+    task has been evaluated.
+    """
+
+    def clear_data(self):
+        self._data = dict()
+        self._features = dict()
+        self._folds = dict()
+
+    """
+    It returns the cross-validation folds of a dataset after it has been shuffled as in get_shuffled_order. 
+    The folds are the same used by cross_val_score on the shuffled dataset, but they contain the positions of the 
+    rows in the dataset before the shuffle, so that the dataset does not need to be shuffled.
+    
+    y: array with the values to predict, in the order of the dataset before the shuffle
+    shuffle: number of the last shuffle
+    n_splits: number of folds
+    classifier: True if the folds are used by classifiers, i.e. they are stratified
+    """
+
+    @staticmethod
+    def get_shuffled_folds(y, shuffle, n_splits, classifier):
+        order = AbstractTaskManager.get_shuffled_order(len(y), shuffle)
+        y = np.asarray(y)[order]
+        cv = check_cv(n_splits, y, classifier=classifier)
+        return [
+            (order[train], order[test])
+            for train, test in cv.split(np.zeros((len(y), 1)), y)
+        ]
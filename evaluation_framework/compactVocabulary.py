@@ -0,0 +1,320 @@
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+
+"""
+Compact vocabulary of the entity names. The names are stored as a single buffer of UTF-8 bytes with the offset of
+each name, instead of a Python string for each name and a dictionary from names to rows: a vocabulary of long IRIs
+(e.g. quoted triples of RDF-star) takes little more than the bytes of the names.
+The names are looked up through their sorted 64-bit hashes, so a lookup takes a logarithmic time in the number of
+names. It behaves as the dictionary which key is the entity name and the value is its row.
+"""
+
+# number of names decoded at once while hashing the names of the vocabulary
+block_size = 100000
+
+
+def hash_names(names) -> np.ndarray:
+    """It returns the 64-bit hash of each name.
+
+    Parameters
+    ----------
+    names
+        Sequence of strings.
+
+    Returns
+    -------
+        Array of uint64 hashes.
+    """
+    return pd.util.hash_array(np.asarray(list(names), dtype=object), categorize=False)
+
+
+class CompactVocabulary(Mapping):
+    def __init__(
+        self, buffer: np.ndarray, offsets: np.ndarray, hashes: np.ndarray = None
+    ):
+        """Constructor.
+
+        Parameters
+        ----------
+        buffer : np.ndarray
+            Array of uint8 with the UTF-8 bytes of all the names, one after the other.
+        offsets : np.ndarray
+            Array of int64 with the offset of each name in the buffer, followed by the length of the buffer.
+        hashes : np.ndarray
+            Optional array with the hash of each name, as returned by hash_names. If None, it is computed the first
+            time a name is looked up.
+        """
+        self.buffer = buffer
+        self.offsets = offsets
+        if len(self.offsets) == 0 or self.offsets[-1] != len(self.buffer):
+            raise ValueError("The offsets must end with the length of the buffer.")
+        self._hashes = hashes
+        # sorted hashes and row of each one, see lookup
+        self._index = None
+
+    @classmethod
+    def from_names(cls, names):
+        """It creates the vocabulary of a list of names, where the row of each name is its position in the list.
+
+        Parameters
+        ----------
+        names : List[str]
+            Entity names.
+
+        Returns
+        -------
+            The vocabulary.
+        """
+        encoded = [name.encode("utf-8") for name in names]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(buffer, offsets, hash_names(names))
+
+    @classmethod
+    def concatenate(cls, vocabularies):
+        """It creates the vocabulary with the names of the vocabularies provided in input, one after the other.
+
+        Parameters
+        ----------
+        vocabularies : List[CompactVocabulary]
+            Vocabularies to concatenate.
+
+        Returns
+        -------
+            The vocabulary.
+        """
+        if len(vocabularies) == 0:
+            return cls.from_names([])
+
+        buffers = [vocabulary.buffer for vocabulary in vocabularies]
+        starts = np.cumsum([0] + [len(buffer) for buffer in buffers])
+        offsets = np.concatenate(
+            [vocabularies[0].offsets[:1]]
+            + [
+                vocabulary.offsets[1:] + start
+                for vocabulary, start in zip(vocabularies, starts)
+            ]
+        )
+        hashes = None
+        if all(vocabulary._hashes is not None for vocabulary in vocabularies):
+            hashes = np.concatenate([vocabulary._hashes for vocabulary in vocabularies])
+        return cls(np.concatenate(buffers), offsets, hashes)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        buffer: np.ndarray,
+        offsets: np.ndarray,
+        sorted_hashes: np.ndarray,
+        order: np.ndarray,
+    ):
+        """It creates the vocabulary from the arrays returned by get_arrays, without indexing the names again.
+
+        Parameters
+        ----------
+        buffer : np.ndarray
+            Array of uint8 with the UTF-8 bytes of all the names, one after the other.
+        offsets : np.ndarray
+            Array of int64 with the offset of each name in the buffer, followed by the length of the buffer.
+        sorted_hashes : np.ndarray
+            Sorted hashes of the names.
+        order : np.ndarray
+            Row of each sorted hash.
+
+        Returns
+        -------
+            The vocabulary.
+        """
+        vocabulary = cls(buffer, offsets)
+        vocabulary._index = (sorted_hashes, order)
+        return vocabulary
+
+    def get_arrays(self) -> dict:
+        """It returns all the arrays of the vocabulary, indexing the names if they are not indexed yet, so that
+        the vocabulary is created again by from_arrays, e.g. on arrays copied into shared memory.
+
+        Returns
+        -------
+            Dictionary with the names of the parameters of from_arrays as keys and the arrays as values.
+        """
+        sorted_hashes, order = self._get_index()
+        return {
+            "buffer": self.buffer,
+            "offsets": self.offsets,
+            "sorted_hashes": sorted_hashes,
+            "order": order,
+        }
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes of the arrays of the vocabulary."""
+        nbytes = self.buffer.nbytes + self.offsets.nbytes
+        if self._hashes is not None:
+            nbytes += self._hashes.nbytes
+        if self._index is not None:
+            nbytes += sum(array.nbytes for array in self._index)
+        return nbytes
+
+    def name(self, row: int) -> str:
+        """It returns the name in a row.
+
+        Parameters
+        ----------
+        row : int
+            Row of the name.
+
+        Returns
+        -------
+            The name.
+        """
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return self.buffer[start:end].tobytes().decode("utf-8")
+
+    def names(self, start: int = 0, end: int = None):
+        """It returns the list of the names in the rows from start to end.
+
+        Parameters
+        ----------
+        start : int
+            First row.
+        end : int
+            Row after the last one. Default: None for the number of names.
+
+        Returns
+        -------
+            List of names.
+        """
+        if end is None:
+            end = len(self)
+        offsets = self.offsets[start : end + 1] - self.offsets[start]
+        data = self.buffer[self.offsets[start] : self.offsets[end]].tobytes()
+        return [
+            data[offsets[i] : offsets[i + 1]].decode("utf-8")
+            for i in range(end - start)
+        ]
+
+    def _get_index(self):
+        if self._index is None:
+            hashes = self._hashes
+            if hashes is None:
+                hashes = np.concatenate(
+                    [np.zeros(0, dtype=np.uint64)]
+                    + [
+                        hash_names(self.names(start, min(start + block_size, len(self))))
+                        for start in range(0, len(self), block_size)
+                    ]
+                )
+            # the rows with the same hash are kept in increasing order
+            order = np.argsort(hashes, kind="stable")
+            if len(order) < np.iinfo(np.int32).max:
+                order = order.astype(np.int32)
+            self._index = (hashes[order], order)
+            # the hashes are kept in order only
+            self._hashes = None
+        return self._index
+
+    def _equal_names(self, rows: np.ndarray, encoded_keys) -> np.ndarray:
+        """It checks whether the name in each row is equal to the related key, comparing all the bytes at once.
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            Array of rows.
+        encoded_keys : List[bytes]
+            UTF-8 bytes of the key of each row.
+
+        Returns
+        -------
+            Boolean array, True where the name is equal to the key.
+        """
+        lengths = self.offsets[rows + 1] - self.offsets[rows]
+        key_lengths = np.fromiter(
+            map(len, encoded_keys), dtype=np.int64, count=len(encoded_keys)
+        )
+        equal = lengths == key_lengths
+
+        compared = np.flatnonzero(equal & (lengths > 0))
+        if len(compared) > 0:
+            lengths = lengths[compared]
+            ends = np.cumsum(lengths)
+            # position in the buffer of each byte of the compared names
+            byte_positions = np.repeat(self.offsets[rows[compared]], lengths) + (
+                np.arange(ends[-1]) - np.repeat(ends - lengths, lengths)
+            )
+            key_bytes = np.frombuffer(
+                b"".join(encoded_keys[i] for i in compared), dtype=np.uint8
+            )
+            mismatches = np.add.reduceat(
+                self.buffer[byte_positions] != key_bytes, ends - lengths
+            )
+            equal[compared[mismatches > 0]] = False
+        return equal
+
+    def lookup(self, keys) -> np.ndarray:
+        """It returns the row of each name.
+
+        Parameters
+        ----------
+        keys
+            Sequence of names.
+
+        Returns
+        -------
+            Array with the row of each name, -1 if the name is not in the vocabulary. As in a dictionary, the last
+            row is used for the names which are repeated.
+        """
+        keys = list(keys)
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        positions = np.array(
+            [i for i, key in enumerate(keys) if isinstance(key, str)], dtype=np.int64
+        )
+        if len(self) == 0 or len(positions) == 0:
+            return rows
+
+        sorted_hashes, order = self._get_index()
+        key_hashes = hash_names(keys[i] for i in positions)
+        starts = np.searchsorted(sorted_hashes, key_hashes, side="left")
+        ends = np.searchsorted(sorted_hashes, key_hashes, side="right")
+
+        # almost always, a single name has the hash of a key: the last row with the hash is compared first
+        candidates = order[np.maximum(ends - 1, 0)].astype(np.int64)
+        found = (ends > starts) & self._equal_names(
+            candidates, [keys[i].encode("utf-8") for i in positions]
+        )
+        rows[positions[found]] = candidates[found]
+
+        # the other names with the same hash are compared one at a time
+        for i in np.flatnonzero(~found & (ends - starts > 1)):
+            for row in order[starts[i] : ends[i] - 1][::-1]:
+                if self.name(row) == keys[positions[i]]:
+                    rows[positions[i]] = row
+                    break
+        return rows
+
+    def __getitem__(self, name) -> int:
+        row = self.lookup([name])[0]
+        if row < 0:
+            raise KeyError(name)
+        return int(row)
+
+    def __contains__(self, name) -> bool:
+        return self.lookup([name])[0] >= 0
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for start in range(0, len(self), block_size):
+            yield from self.names(start, min(start + block_size, len(self)))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the index is rebuilt when needed, from the hashes in the order of the rows
+        state["_index"] = None
+        if self._index is not None:
+            sorted_hashes, order = self._index
+            state["_hashes"] = np.empty_like(sorted_hashes)
+            state["_hashes"][order] = sorted_hashes
+        return state
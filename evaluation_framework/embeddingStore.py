@@ -0,0 +1,320 @@
+import numpy as np
+import pandas as pd
+from evaluation_framework.compactVocabulary import CompactVocabulary
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+"""
+It keeps the vectors of the input file in memory, so that they are read once and shared by all the tasks.
+"""
+
+# precisions of the stored vectors. float16 halves the memory of float32, but the vectors are converted to float32
+# before any computation
+available_dtypes = ["float64", "float32", "float16"]
+# number of rows converted to the computation precision at once
+block_size = 65536
+# prefix of the shared memory blocks containing the arrays of the vocabulary, see share
+vocabulary_prefix = "_vocab."
+
+
+def get_compute_dtype(dtype) -> np.dtype:
+    """It returns the precision used to compute with vectors stored with the precision provided in input.
+
+    Parameters
+    ----------
+    dtype
+        Precision of the stored vectors.
+
+    Returns
+    -------
+        float32 for float16 vectors, the precision of the vectors otherwise.
+    """
+    dtype = np.dtype(dtype)
+    if dtype == np.float16:
+        return np.dtype(np.float32)
+    return dtype
+
+
+class EmbeddingStore:
+    def __init__(self, names=None, matrix=None, loader=None, dtype="float64"):
+        """Constructor. It stores the entity names and the related vectors.
+
+        Parameters
+        ----------
+        names : List[str] or CompactVocabulary
+            Entity names, one for each row of the matrix. A list is converted into a compact vocabulary.
+        matrix : np.ndarray
+            Matrix of shape (number of entities, vector size) containing the vectors.
+        loader : Callable[[], Tuple[List[str], np.ndarray]]
+            Optional function returning names and matrix. If provided, the vectors are read the first time they
+            are needed instead of when the store is created.
+        dtype
+            {float64, float32, float16}, precision of the stored vectors. float16 vectors are converted to float32
+            when they are used. Default: float64
+        """
+        self.dtype = np.dtype(dtype)
+        if self.dtype.name not in available_dtypes:
+            raise ValueError(
+                self.dtype.name
+                + " is not a supported precision. The managed precisions are "
+                + ", ".join(available_dtypes)
+            )
+        self._vocab = None
+        self._matrix = None
+        self._normalized = None
+        self._loader = loader
+        # store whose normalized vectors are the vectors of this one, see normalized_view
+        self._source = None
+        # shared memory blocks containing the matrices and the vocabulary of this store, see share
+        self._shared_memory = dict()
+        self._shared_memory_owner = False
+
+        if loader is None:
+            self._set_vectors(names, matrix)
+
+    @classmethod
+    def from_dataframe(cls, vectors: pd.DataFrame):
+        """It creates the store from a dataframe with the entity name as first column and the vectors starting
+        from the second column.
+
+        Parameters
+        ----------
+        vectors : pd.DataFrame
+            Dataframe containing the vectors.
+
+        Returns
+        -------
+            The embedding store.
+        """
+        return cls(list(vectors["name"]), vectors.iloc[:, 1:].to_numpy(dtype=np.float64))
+
+    def _set_vectors(self, names, matrix):
+        if not isinstance(names, CompactVocabulary):
+            names = CompactVocabulary.from_names(names)
+        self._vocab = names
+        self._matrix = np.ascontiguousarray(matrix, dtype=self.dtype)
+        if self._matrix.ndim != 2 or self._matrix.shape[0] != len(self._vocab):
+            raise ValueError(
+                "The matrix must have one row for each entity, got "
+                + str(self._matrix.shape)
+                + " for "
+                + str(len(self._vocab))
+                + " entities."
+            )
+
+    def _load(self):
+        if self._matrix is None and self._loader is not None:
+            names, matrix = self._loader()
+            self._set_vectors(names, matrix)
+
+    @property
+    def names(self):
+        """List of the entity names, in the same order of the matrix rows. It is decoded from the vocabulary at
+        each call."""
+        return self.vocab.names()
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Contiguous matrix containing a vector for each entity, with the precision of the store."""
+        self._load()
+        return self._matrix
+
+    @property
+    def vocab(self) -> CompactVocabulary:
+        """Vocabulary of the entity names. It behaves as the dictionary which key is the entity name and the value
+        is the row of the entity in the matrix."""
+        if self._vocab is None and self._source is not None:
+            return self._source.vocab
+        self._load()
+        return self._vocab
+
+    def lookup(self, keys) -> np.ndarray:
+        """It returns the row of each entity in the matrix. The names are indexed only once, so each lookup takes a
+        time linear in the number of keys and logarithmic in the number of entities.
+
+        Parameters
+        ----------
+        keys
+            Sequence of entity names.
+
+        Returns
+        -------
+            Array with the row of each entity, -1 if the entity is not in the store. As in vocab, the last row
+            is used for the entities which are repeated.
+        """
+        return self.vocab.lookup(keys)
+
+    @property
+    def compute_dtype(self) -> np.dtype:
+        """Precision used to compute with the vectors, see get_compute_dtype."""
+        return get_compute_dtype(self.dtype)
+
+    @property
+    def normalized(self) -> np.ndarray:
+        """Copy of the matrix where each vector is normalized to unit length. It is computed only once, with the
+        computation precision, and stored with the precision of the store."""
+        if self._normalized is None and self._source is not None:
+            self._normalized = self.matrix
+        if self._normalized is None:
+            W = self.matrix
+            if self.compute_dtype == self.dtype:
+                d = np.sqrt(np.sum(W ** 2, axis=1))
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    self._normalized = W / d[:, np.newaxis]
+            else:
+                self._normalized = np.empty_like(W)
+                for start in range(0, len(W), block_size):
+                    block = W[start : start + block_size].astype(self.compute_dtype)
+                    d = np.sqrt(np.sum(block ** 2, axis=1))
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        self._normalized[start : start + block_size] = (
+                            block / d[:, np.newaxis]
+                        )
+        return self._normalized
+
+    @property
+    def vector_size(self) -> int:
+        return self.matrix.shape[1]
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def __contains__(self, name):
+        return name in self.vocab
+
+    def normalized_view(self):
+        """It returns a store with the same names of this one, whose matrix is the normalized one. The vectors are
+        normalized only when the view is used."""
+        view = EmbeddingStore(loader=self._normalized_vectors, dtype=self.dtype)
+        view._source = self
+        return view
+
+    def _normalized_vectors(self):
+        return self.vocab, self.normalized
+
+    def share(self, normalized: bool = False):
+        """It returns a store with the same names of this one, whose matrix and vocabulary are placed in shared
+        memory. The names are indexed once, before the vocabulary is placed in shared memory. When the returned
+        store is sent to another process, only the names of the shared memory blocks are sent instead of a copy of
+        the vectors and of the names, and the process does not index the names again. The shared memory must be
+        freed by calling release() on the returned store.
+
+        Parameters
+        ----------
+        normalized : bool
+            True to place also the normalized matrix in shared memory, so that it is computed only once.
+
+        Returns
+        -------
+            The store backed by shared memory, or this store if shared memory is not available (Python < 3.8).
+        """
+        if shared_memory is None:
+            return self
+
+        shared = EmbeddingStore(self.vocab, self.matrix, dtype=self.dtype)
+        shared._shared_memory_owner = True
+        shared._matrix = shared._to_shared_memory("_matrix", self.matrix)
+        shared._vocab = CompactVocabulary.from_arrays(
+            **{
+                name: shared._to_shared_memory(vocabulary_prefix + name, array)
+                for name, array in self.vocab.get_arrays().items()
+            }
+        )
+        if normalized:
+            shared._normalized = shared._to_shared_memory("_normalized", self.normalized)
+        return shared
+
+    def _to_shared_memory(self, attribute, array):
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared_array = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        shared_array[:] = array
+        self._shared_memory[attribute] = block
+        return shared_array
+
+    def release(self):
+        """It frees the shared memory blocks created by share(). In the other processes, it only detaches from
+        them."""
+        # the arrays are released before the blocks are closed
+        for attribute in self._shared_memory:
+            if attribute.startswith(vocabulary_prefix):
+                self._vocab = None
+            else:
+                setattr(self, attribute, None)
+        for block in self._shared_memory.values():
+            try:
+                block.close()
+            except BufferError:
+                # the vectors are still referenced elsewhere, the memory is freed when they are released
+                pass
+            if self._shared_memory_owner:
+                block.unlink()
+        self._shared_memory = dict()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shared_memory"] = dict()
+        state["_shared_memory_owner"] = False
+        for attribute, block in self._shared_memory.items():
+            if attribute.startswith(vocabulary_prefix):
+                array = self._vocab.get_arrays()[attribute[len(vocabulary_prefix) :]]
+                state["_vocab"] = None
+            else:
+                array = getattr(self, attribute)
+                state[attribute] = None
+            state["_shared_memory"][attribute] = (block.name, array.shape, array.dtype.str)
+        return state
+
+    def __setstate__(self, state):
+        shared = state.pop("_shared_memory")
+        self.__dict__.update(state)
+        self._shared_memory = dict()
+        vocabulary_arrays = dict()
+        for attribute, (name, shape, dtype) in shared.items():
+            block = shared_memory.SharedMemory(name=name)
+            self._shared_memory[attribute] = block
+            array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            if attribute.startswith(vocabulary_prefix):
+                vocabulary_arrays[attribute[len(vocabulary_prefix) :]] = array
+            else:
+                setattr(self, attribute, array)
+        if vocabulary_arrays:
+            self._vocab = CompactVocabulary.from_arrays(**vocabulary_arrays)
+
+    def merge(self, goldStandard_data: pd.DataFrame, column_key: str = "name"):
+        """It joins a dataset used as gold standard with the vectors of its entities, keeping the order of the
+        dataset.
+
+        Parameters
+        ----------
+        goldStandard_data : pd.DataFrame
+            Dataframe containing the dataset content.
+        column_key : str
+            Column of the dataset which contains the entity name.
+
+        Returns
+        -------
+            The dataframe with the dataset columns followed by the vector columns, with the computation precision,
+            and the dataframe of the dataset rows whose entity is not in the store.
+        """
+        keys = goldStandard_data[column_key]
+        rows = self.lookup(keys)
+        found = rows >= 0
+
+        # rows sharing the same entity are kept together, as an inner merge does
+        positions = np.flatnonzero(found)
+        codes = pd.factorize(keys)[0]
+        positions = positions[np.argsort(codes[positions], kind="stable")]
+
+        vectors = pd.DataFrame(
+            self.matrix[rows[positions]].astype(self.compute_dtype, copy=False),
+            columns=range(self.vector_size),
+        )
+        merged = pd.concat(
+            [goldStandard_data.iloc[positions].reset_index(drop=True), vectors], axis=1
+        )
+        ignored = goldStandard_data[~found].reset_index(drop=True)
+
+        return merged, ignored
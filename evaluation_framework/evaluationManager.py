@@ -2,13 +2,13 @@ import os
 import traceback
 import time
 import datetime
-from multiprocessing import Process
-import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import math
-from typing import Dict
+from typing import Dict, List
 
 from evaluation_framework.abstract_evaluationManager import AbstractEvaluationManager
+from evaluation_framework.taskScheduler import TaskScheduler
 from evaluation_framework.Classification.classification_taskManager import (
     ClassificationManager as Classification_evaluator,
 )
@@ -49,8 +49,10 @@ class EvaluationManager(AbstractEvaluationManager):
         if self.debugging_mode:
             print("Created evaluation manager")
 
-    def initialize_vectors(self, vector_filename: str, vector_size: int) -> None:
-        """It stores the information related to vectors.
+    def initialize_vectors(
+        self, vector_filename: str, vector_size: int, entities: List[str] = None
+    ) -> None:
+        """It reads the vectors once in an embedding store, which is then handed to all the tasks.
 
         Parameters
         ----------
@@ -58,6 +60,9 @@ class EvaluationManager(AbstractEvaluationManager):
             Path of the vector file.
         vector_size : int
             Size of the vectors.
+        entities : List[str] or None
+            Names of the only entities whose vectors are read, see get_gold_standard_entities. Default: None to
+            read all the vectors.
 
         Returns
         -------
@@ -66,12 +71,18 @@ class EvaluationManager(AbstractEvaluationManager):
         self.vector_filename = vector_filename
         self.vector_size = vector_size
         self.vectors = self.data_manager.initialize_vectors(
-            vector_filename, vector_size
+            vector_filename, vector_size, entities
         )
 
         self.log_file.write("TESTED CONFIGURATION\n")
         self.log_file.write("Vector filename: " + vector_filename + "\n")
         self.log_file.write("Vector size:" + str(vector_size) + "\n")
+        if entities is not None:
+            self.log_file.write(
+                "Vectors read for the gold standard entities: "
+                + str(len(entities))
+                + "\n"
+            )
 
     """
     It runs the tasks in sequential
@@ -80,10 +91,36 @@ class EvaluationManager(AbstractEvaluationManager):
     similarity_metric: distance metric used as similarity metric
     top_k: parameters of the semantic analogies task
     analogy_function: function to compute the analogy among vectors
+    analogy_index: index used to search the nearest vectors in the semantic analogies task
+    analogy_candidates: entities which can be predicted in the semantic analogies task
+    document_corpora: corpora of annotated documents of the document similarity task, None to use LP50
+    relatedness_datasets: paths of the datasets of the entity relatedness task, None to use kgrc_entity_relatedness
+    clustering_large_scale_threshold: number of entities of a clustering dataset above which the large-scale models are 
+        used, None to use the exact models only
+    clustering_dbscan_sweep: True to fit DBSCAN also for a grid of eps and min_samples values in the clustering task
+    classification_svm_sweep: True to train the SVM models of all the C values together in the classification task, 
+        computing the kernel once for each fold
+    n_jobs: number of jobs used by the cross-validation of the classification and regression models. None to run it 
+        in the same process.
+    evaluators: task managers created by create_evaluators, e.g. the ones used by get_gold_standard_entities, which 
+        replace the parameters above. None to create them.
     """
 
     def run_tests_in_sequential(
-        self, tasks, similarity_metric, top_k: int, analogy_function=None
+        self,
+        tasks,
+        similarity_metric,
+        top_k: int,
+        analogy_function=None,
+        analogy_index="exact",
+        analogy_candidates="all",
+        document_corpora=None,
+        relatedness_datasets=None,
+        clustering_large_scale_threshold=None,
+        clustering_dbscan_sweep=False,
+        classification_svm_sweep=False,
+        n_jobs=None,
+        evaluators=None,
     ) -> Dict:
         self.log_file.write("Distance metric:" + similarity_metric + "\n\n")
 
@@ -91,189 +128,46 @@ class EvaluationManager(AbstractEvaluationManager):
         self.top_k = top_k
         self.tasks = tasks
 
+        if evaluators is None:
+            evaluators = self.create_evaluators(
+                tasks,
+                similarity_metric,
+                top_k,
+                analogy_function,
+                analogy_index=analogy_index,
+                analogy_candidates=analogy_candidates,
+                document_corpora=document_corpora,
+                relatedness_datasets=relatedness_datasets,
+                clustering_large_scale_threshold=clustering_large_scale_threshold,
+                clustering_dbscan_sweep=clustering_dbscan_sweep,
+                classification_svm_sweep=classification_svm_sweep,
+                n_jobs=n_jobs,
+            )
+
         log_dictionary = dict()
         scores_dictionary = dict()
-        for task in tasks:
-            if task == Classification_evaluator.get_task_name():
-                try:
-                    classification_dataManager = self.data_manager.get_data_manager(
-                        "classification"
-                    )(self.debugging_mode)
-                    classification_evaluator = Classification_evaluator(
-                        classification_dataManager, self.debugging_mode
-                    )
-                    classification_evaluator.evaluate(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    )
-                    self.log_file.write(log_dictionary[task])
-                    print("Classification finished")
-                except Exception:
-                    self.log_file.write("Classification: " + traceback.format_exc())
-                else:
-                    end_time = time.time()
-                    seconds = end_time - self.start_time
-                    m, s = divmod(seconds, 60)
-                    h, m = divmod(m, 60)
-                    execution_time = (
-                        str(h) + ":" + str(round(m, 2)) + ":" + str(round(s, 2))
-                    )
-                    self.log_file.write(
-                        "Classification execution time: "
-                        + execution_time
-                        + " seconds\n"
-                    )
-                    print("%d:%02d:%02d" % (h, m, s))
-
-            elif task == Regression_evaluator.get_task_name():
-                try:
-                    regression_dataManager = self.data_manager.get_data_manager(
-                        "regression"
-                    )(self.debugging_mode)
-                    regression_evaluator = Regression_evaluator(
-                        regression_dataManager, self.debugging_mode
-                    )
-                    regression_evaluator.evaluate(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    )
-                    self.log_file.write(log_dictionary[task])
-                    print("Regression finished")
-                except Exception:
-                    self.log_file.write("Regression:" + traceback.format_exc())
-                else:
-                    end_time = time.time()
-                    self.log_file.write(
-                        "Regression execution time: "
-                        + str(round(end_time - self.start_time, 2))
-                        + " seconds\n"
-                    )
-            elif task == Clustering_evaluator.get_task_name():
-                try:
-                    clustering_dataManager = self.data_manager.get_data_manager(
-                        "clustering"
-                    )(self.debugging_mode)
-                    clustering_evaluator = Clustering_evaluator(
-                        clustering_dataManager, similarity_metric, self.debugging_mode
-                    )
-                    clustering_evaluator.evaluate(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    )
-                    self.log_file.write(log_dictionary[task])
-                    print("Clustering finished")
-                except Exception:
-                    self.log_file.write("Clustering: " + traceback.format_exc())
-                else:
-                    end_time = time.time()
-                    self.log_file.write(
-                        "Clustering execution time: "
-                        + str(round(end_time - self.start_time, 2))
-                        + " seconds\n"
-                    )
-            elif task == Doc_Similarity_evaluator.get_task_name():
-                try:
-                    documentSimilarity_dataManager = self.data_manager.get_data_manager(
-                        "document_similarity"
-                    )(self.debugging_mode)
-                    doc_similarity_evaluator = Doc_Similarity_evaluator(
-                        documentSimilarity_dataManager,
-                        similarity_metric,
-                        self.debugging_mode,
-                    )
-                    doc_similarity_evaluator.evaluate(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    )
-                    self.log_file.write(log_dictionary[task])
-                    print("Document similarity finished")
-                except Exception:
-                    self.log_file.write(traceback.format_exc())
-                else:
-                    end_time = time.time()
-                    self.log_file.write(
-                        "Document Similarity execution time: "
-                        + str(round(end_time - self.start_time, 2))
-                        + " seconds\n"
-                    )
-            elif task == Entity_Relatedness_evaluator.get_task_name():
-                try:
-                    entityRelatedness_dataManager = self.data_manager.get_data_manager(
-                        "entity_relatedness"
-                    )(self.debugging_mode)
-                    entity_Relatedness_evaluator = Entity_Relatedness_evaluator(
-                        entityRelatedness_dataManager,
-                        similarity_metric,
-                        self.debugging_mode,
-                    )
-                    entity_Relatedness_evaluator.evaluate(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    )
-                    self.log_file.write(log_dictionary[task])
-                    print("Entity Relatedness finished")
-                except Exception:
-                    self.log_file.write(traceback.format_exc())
-                else:
-                    end_time = time.time()
-                    self.log_file.write(
-                        "Entity Relatedness execution time: "
-                        + str(round(end_time - self.start_time, 2))
-                        + " seconds\n"
-                    )
-            elif task == Semantic_Analogies_evaluator.get_task_name():
-                try:
-                    semanticAnalogies_dataManager = self.data_manager.get_data_manager(
-                        "semantic_analogies"
-                    )(self.debugging_mode)
-                    semantic_Analogies_evaluator = Semantic_Analogies_evaluator(
-                        semanticAnalogies_dataManager,
-                        top_k,
-                        self.debugging_mode,
-                        analogy_function,
-                    )
-                    semantic_Analogies_evaluator.evaluate(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    )
-                    self.log_file.write(log_dictionary[task])
-                    print("Semantic Analogies finished")
-                except Exception:
-                    self.log_file.write(traceback.format_exc())
-                else:
-                    end_time = time.time()
-                    self.log_file.write(
-                        "Semantic Analogies execution time: "
-                        + str(round(end_time - self.start_time, 2))
-                        + " seconds\n"
-                    )
+        for task_name, evaluator in evaluators.items():
+            try:
+                evaluator.evaluate(
+                    self.vectors,
+                    self.vector_filename,
+                    self.vector_size,
+                    self.result_directory,
+                    log_dictionary,
+                    scores_dictionary,
+                )
+                self.log_file.write(log_dictionary[task_name])
+                print(task_name + " finished")
+            except Exception:
+                self.log_file.write(task_name + ": " + traceback.format_exc())
             else:
-                # raise Exception('The task ' + task + ' is not supported')
-                print("The task " + task + " is not supported")
+                end_time = time.time()
+                self.log_file.write(
+                    task_name
+                    + " execution time: "
+                    + str(round(end_time - self.start_time, 2))
+                    + " seconds\n"
+                )
 
         return scores_dictionary
 
@@ -284,80 +178,169 @@ class EvaluationManager(AbstractEvaluationManager):
     similarity_metric: distance metric used as similarity metric
     top_k: parameters of the semantic analogies task
     analogy_function: function to compute the analogy among vectors
+    n_jobs: maximum number of worker processes. None or -1 to use all the available cores.
+    analogy_index: index used to search the nearest vectors in the semantic analogies task
+    analogy_candidates: entities which can be predicted in the semantic analogies task
+    document_corpora: corpora of annotated documents of the document similarity task, None to use LP50
+    relatedness_datasets: paths of the datasets of the entity relatedness task, None to use kgrc_entity_relatedness
+    clustering_large_scale_threshold: number of entities of a clustering dataset above which the large-scale models are 
+        used, None to use the exact models only
+    clustering_dbscan_sweep: True to fit DBSCAN also for a grid of eps and min_samples values in the clustering task
+    classification_svm_sweep: True to train the SVM models of all the C values together in the classification task, 
+        computing the kernel once for each fold
+    evaluators: task managers created by create_evaluators with n_jobs None, e.g. the ones used by 
+        get_gold_standard_entities, which replace the parameters above. None to create them.
     """
 
     def run_tests_in_parallel(
-        self, tasks, similarity_metric, top_k: int, analogy_function=None
+        self,
+        tasks,
+        similarity_metric,
+        top_k: int,
+        analogy_function=None,
+        n_jobs=None,
+        analogy_index="exact",
+        analogy_candidates="all",
+        document_corpora=None,
+        relatedness_datasets=None,
+        clustering_large_scale_threshold=None,
+        clustering_dbscan_sweep=False,
+        classification_svm_sweep=False,
+        evaluators=None,
     ):
         self.similarity_metric = similarity_metric
         self.top_k = top_k
         self.tasks = tasks
 
-        processing_manager = multiprocessing.Manager()
-        log_dictionary = processing_manager.dict()
-        scores_dictionary = processing_manager.dict()
-        processes = {}
+        if evaluators is None:
+            evaluators = self.create_evaluators(
+                tasks,
+                similarity_metric,
+                top_k,
+                analogy_function,
+                analogy_index=analogy_index,
+                analogy_candidates=analogy_candidates,
+                document_corpora=document_corpora,
+                relatedness_datasets=relatedness_datasets,
+                clustering_large_scale_threshold=clustering_large_scale_threshold,
+                clustering_dbscan_sweep=clustering_dbscan_sweep,
+                classification_svm_sweep=classification_svm_sweep,
+            )
+
+        # the normalized vectors are shared only if the tasks use them
+        share_normalized = (
+            Doc_Similarity_evaluator.get_task_name() in evaluators
+            or Semantic_Analogies_evaluator.get_task_name() in evaluators
+        )
+
+        scores_dictionary = dict()
+        # each task is coordinated by a thread of this process, while its units of work run in the workers
+        with TaskScheduler(
+            self.vectors, evaluators, n_jobs, share_normalized, self.debugging_mode
+        ) as scheduler, ThreadPoolExecutor(
+            max_workers=max(len(evaluators), 1)
+        ) as threads:
+            futures = {}
+            for task_name in evaluators:
+                futures[task_name] = threads.submit(
+                    evaluators[task_name].evaluate_with_scheduler,
+                    scheduler,
+                    self.vectors,
+                    self.vector_filename,
+                    self.vector_size,
+                    self.result_directory,
+                )
+
+            for task_name in futures:
+                try:
+                    log_dictionary, task_scores = futures[task_name].result()
+                except Exception:
+                    self.log_file.write(task_name + ": " + traceback.format_exc())
+                    continue
+
+                if task_name in log_dictionary:
+                    self.log_file.write(log_dictionary[task_name])
+                scores_dictionary.update(task_scores)
+
+                print(task_name + " is finished")
+                end_time = time.time()
+                self.log_file.write(
+                    task_name
+                    + " execution time: "
+                    + str(round(end_time - self.start_time, 2))
+                    + " seconds \n"
+                )
+
+        return scores_dictionary
+
+    """
+    It creates the task manager of each task, by task name.
+    
+    tasks: list of the task to run
+    similarity_metric: distance metric used as similarity metric
+    top_k: parameters of the semantic analogies task
+    analogy_function: function to compute the analogy among vectors
+    analogy_index: index used to search the nearest vectors in the semantic analogies task
+    analogy_candidates: entities which can be predicted in the semantic analogies task
+    document_corpora: corpora of annotated documents of the document similarity task, None to use LP50
+    relatedness_datasets: paths of the datasets of the entity relatedness task, None to use kgrc_entity_relatedness
+    clustering_large_scale_threshold: number of entities of a clustering dataset above which the large-scale models are 
+        used, None to use the exact models only
+    clustering_dbscan_sweep: True to fit DBSCAN also for a grid of eps and min_samples values in the clustering task
+    classification_svm_sweep: True to train the SVM models of all the C values together in the classification task, 
+        computing the kernel once for each fold
+    n_jobs: number of jobs used by the cross-validation of the classification and regression models. None to run it 
+        in the same process, e.g. when the units of work already run in the worker processes of the task scheduler.
+    """
+
+    def create_evaluators(
+        self,
+        tasks,
+        similarity_metric,
+        top_k: int,
+        analogy_function=None,
+        analogy_index="exact",
+        analogy_candidates="all",
+        document_corpora=None,
+        relatedness_datasets=None,
+        clustering_large_scale_threshold=None,
+        clustering_dbscan_sweep=False,
+        classification_svm_sweep=False,
+        n_jobs=None,
+    ) -> Dict:
+        evaluators = {}
         for task in tasks:
             if task == Classification_evaluator.get_task_name():
                 classification_dataManager = self.data_manager.get_data_manager(
                     "classification"
                 )(self.debugging_mode)
                 classification_evaluator = Classification_evaluator(
-                    classification_dataManager, self.debugging_mode
-                )
-                p1 = Process(
-                    target=classification_evaluator.evaluate,
-                    args=(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    ),
+                    classification_dataManager,
+                    self.debugging_mode,
+                    n_jobs=n_jobs,
+                    svm_sweep=classification_svm_sweep,
                 )
-                p1.start()
-                processes[Classification_evaluator.get_task_name()] = p1
+                evaluators[Classification_evaluator.get_task_name()] = classification_evaluator
             elif task == Regression_evaluator.get_task_name():
                 regression_dataManager = self.data_manager.get_data_manager(
                     "regression"
                 )(self.debugging_mode)
                 regression_evaluator = Regression_evaluator(
-                    regression_dataManager, self.debugging_mode
+                    regression_dataManager, self.debugging_mode, n_jobs=n_jobs
                 )
-                p2 = Process(
-                    target=regression_evaluator.evaluate,
-                    args=(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    ),
-                )
-                p2.start()
-                processes[Regression_evaluator.get_task_name()] = p2
+                evaluators[Regression_evaluator.get_task_name()] = regression_evaluator
             elif task == Clustering_evaluator.get_task_name():
                 clustering_dataManager = self.data_manager.get_data_manager(
                     "clustering"
                 )(self.debugging_mode)
                 clustering_evaluator = Clustering_evaluator(
-                    clustering_dataManager, similarity_metric, self.debugging_mode
-                )
-                p3 = Process(
-                    target=clustering_evaluator.evaluate,
-                    args=(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    ),
+                    clustering_dataManager,
+                    similarity_metric,
+                    self.debugging_mode,
+                    large_scale_threshold=clustering_large_scale_threshold,
+                    dbscan_sweep=clustering_dbscan_sweep,
                 )
-                p3.start()
-                processes[Clustering_evaluator.get_task_name()] = p3
+                evaluators[Clustering_evaluator.get_task_name()] = clustering_evaluator
             elif task == Doc_Similarity_evaluator.get_task_name():
                 documentSimilarity_dataManager = self.data_manager.get_data_manager(
                     "document_similarity"
@@ -366,20 +349,9 @@ class EvaluationManager(AbstractEvaluationManager):
                     documentSimilarity_dataManager,
                     similarity_metric,
                     self.debugging_mode,
+                    corpora=document_corpora,
                 )
-                p4 = Process(
-                    target=doc_similarity_evaluator.evaluate,
-                    args=(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    ),
-                )
-                p4.start()
-                processes[Doc_Similarity_evaluator.get_task_name()] = p4
+                evaluators[Doc_Similarity_evaluator.get_task_name()] = doc_similarity_evaluator
             elif task == Entity_Relatedness_evaluator.get_task_name():
                 entityRelatedness_dataManager = self.data_manager.get_data_manager(
                     "entity_relatedness"
@@ -388,20 +360,9 @@ class EvaluationManager(AbstractEvaluationManager):
                     entityRelatedness_dataManager,
                     similarity_metric,
                     self.debugging_mode,
+                    datasets=relatedness_datasets,
                 )
-                p5 = Process(
-                    target=entity_relatedness_evaluator.evaluate,
-                    args=(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    ),
-                )
-                p5.start()
-                processes[Entity_Relatedness_evaluator.get_task_name()] = p5
+                evaluators[Entity_Relatedness_evaluator.get_task_name()] = entity_relatedness_evaluator
             elif task == Semantic_Analogies_evaluator.get_task_name():
                 semanticAnalogies_dataManager = self.data_manager.get_data_manager(
                     "semantic_analogies"
@@ -411,43 +372,47 @@ class EvaluationManager(AbstractEvaluationManager):
                     top_k,
                     self.debugging_mode,
                     analogy_function,
+                    analogy_index=analogy_index,
+                    analogy_candidates=analogy_candidates,
                 )
-                p6 = Process(
-                    target=semantic_analogies_evaluator.evaluate,
-                    args=(
-                        self.vectors,
-                        self.vector_filename,
-                        self.vector_size,
-                        self.result_directory,
-                        log_dictionary,
-                        scores_dictionary,
-                    ),
-                )
-                p6.start()
-                processes[Semantic_Analogies_evaluator.get_task_name()] = p6
+                evaluators[Semantic_Analogies_evaluator.get_task_name()] = semantic_analogies_evaluator
             else:
                 print("The task " + task + " is not supported")
 
-        for process_name in processes:
-            process = processes[process_name]
-            process.join()
+        return evaluators
 
-            if process_name in log_dictionary:
-                self.log_file.write(log_dictionary[process_name])
+    """
+    It returns the sorted names of the entities of the datasets used as gold standard by the tasks, i.e. the only 
+    entities whose vectors are needed, or None if a task uses all the vectors (e.g. SemanticAnalogies). It is 
+    computed before the vectors are read, so that only these entities are read. The same task managers are then 
+    passed to run_tests_in_sequential or run_tests_in_parallel, so that they are created once.
+    
+    evaluators: task managers created by create_evaluators
+    """
 
-            if hasattr(process, "exception"):
-                self.log_file.write(str(process.exception))
-            else:
-                print(process_name + " is finished")
-                end_time = time.time()
-                self.log_file.write(
-                    process_name
-                    + " execution time: "
-                    + str(round(end_time - self.start_time, 2))
-                    + " seconds \n"
-                )
+    def get_gold_standard_entities(self, evaluators):
+        entities = set()
+        for task_name, evaluator in evaluators.items():
+            try:
+                task_entities = evaluator.get_gold_standard_entities()
+            except Exception:
+                # all the vectors are read, and the task reports the error when it is evaluated
+                if self.debugging_mode:
+                    print(
+                        task_name
+                        + ": the gold standard entities cannot be read\n"
+                        + traceback.format_exc()
+                    )
+                task_entities = None
 
-        return scores_dictionary
+            if task_entities is None:
+                if self.debugging_mode:
+                    print(task_name + " needs all the vectors")
+                return None
+            entities.update(task_entities)
+
+        # the names which are not strings (e.g. empty values) are never found in the vectors
+        return sorted(entity for entity in entities if isinstance(entity, str))
 
     """
     It creates the result folder.
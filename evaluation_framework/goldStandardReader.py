@@ -0,0 +1,228 @@
+import csv
+import json
+import numpy as np
+import pandas as pd
+from itertools import islice
+from typing import Dict, List, Tuple
+
+"""
+It reads the datasets used as gold standard which have the same format whatever the format of the vectors file, so
+that the data managers of the TXT and HDF5 vectors share them.
+"""
+
+# number of lines of a semantic analogies dataset whose entities are looked up at once
+question_chunk_size = 10000
+
+
+def read_relatedness_file(filename: str) -> Dict[str, List[str]]:
+    """It reads a dataset of the entity relatedness task. Two formats are managed:
+    - a TSV file (.tsv) with the main entity, a related entity and its gold rank (1 for the most related one) in each
+      line, see read_relatedness_tsv_file.
+    - the text file, with each main entity in a line followed by its related entities, ordered by gold rank, in
+      indented lines. The main entities without related entities are skipped.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the dataset.
+
+    Returns
+    -------
+        A dictionary with each main entity as key and, as value, the list of its related entities ordered by gold
+        rank, from the most related one. The groups can have any size.
+    """
+    if filename.endswith(".tsv"):
+        return read_relatedness_tsv_file(filename)
+
+    entities_groups = {}
+    related_entities = None
+
+    with open(filename) as f:
+        for i, line in enumerate(f):
+            key = line.strip()
+            if not key:
+                continue
+
+            # the related entities are indented below their main entity
+            if line[0].isspace():
+                if related_entities is None:
+                    raise ValueError(
+                        filename
+                        + ", line "
+                        + str(i + 1)
+                        + ": related entity without a main entity"
+                    )
+                related_entities.append(key)
+            else:
+                related_entities = []
+                entities_groups[key] = related_entities
+
+    return {
+        main_entity: related_entities
+        for main_entity, related_entities in entities_groups.items()
+        if len(related_entities) > 0
+    }
+
+
+def read_relatedness_tsv_file(filename: str) -> Dict[str, List[str]]:
+    """It reads a dataset of the entity relatedness task in the TSV format, with the main entity, a related entity and
+    its gold rank in each line. It is read one line at a time; a header line is skipped. The lines of a group need not
+    be contiguous or sorted by rank. The task compares the predicted ranking with the order of the related entities,
+    so two related entities of a group with the same gold rank are rejected.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the dataset.
+
+    Returns
+    -------
+        A dictionary with each main entity as key and the list of its related entities ordered by gold rank as value.
+    """
+    ranked_groups = {}
+
+    with open(filename, newline="") as f:
+        reader = csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        for i, row in enumerate(reader):
+            if len(row) == 0:
+                continue
+            if len(row) != 3:
+                raise ValueError(
+                    filename
+                    + ", line "
+                    + str(i + 1)
+                    + ": expected the main entity, the related entity and the gold rank, got "
+                    + str(len(row))
+                    + " columns"
+                )
+
+            main_entity, related_entity, rank = (value.strip() for value in row)
+            try:
+                rank = float(rank)
+            except ValueError:
+                # header line
+                if i == 0:
+                    continue
+                raise ValueError(
+                    filename + ", line " + str(i + 1) + ": invalid gold rank " + rank
+                )
+
+            ranked_entities = ranked_groups.setdefault(main_entity, {})
+            if rank in ranked_entities:
+                raise ValueError(
+                    filename
+                    + ", line "
+                    + str(i + 1)
+                    + ": gold rank "
+                    + str(rank)
+                    + " of "
+                    + main_entity
+                    + " is tied with "
+                    + ranked_entities[rank]
+                )
+            ranked_entities[rank] = related_entity
+
+    return {
+        main_entity: [
+            ranked_entities[rank] for rank in sorted(ranked_entities)
+        ]
+        for main_entity, ranked_entities in ranked_groups.items()
+    }
+
+
+def read_document_entities(filename: str) -> pd.DataFrame:
+    """It reads the file of a corpus of the document similarity task, which contains the entities attached to the
+    documents. The file is either a JSON list of documents or a JSON lines file (.jsonl) with a document for each
+    line, which is read one document at a time. Each document has a list of annotations, each one with the entity and
+    its weight. The documents are numbered from 1 in the order of the file.
+
+    Parameters
+    ----------
+    filename : str
+        Path of the documents file.
+
+    Returns
+    -------
+        The dataframe with the doc, name and weight columns, with a row for each annotation.
+    """
+    doc_list = list()
+    entities_list = list()
+    weight_list = list()
+
+    with open(filename) as f:
+        if filename.endswith(".jsonl"):
+            data = (json.loads(line) for line in f if line.strip())
+        else:
+            data = json.load(f)
+
+        for i, doc_obj in enumerate(data):
+            for annotation in doc_obj["annotations"]:
+                doc_list.append(i + 1)
+                entities_list.append(annotation["entity"])
+                weight_list.append(float(annotation["weight"]))
+
+    return pd.DataFrame.from_dict(
+        {"doc": doc_list, "name": entities_list, "weight": weight_list}
+    )
+
+
+def read_analogy_questions(
+    vectors, filename: str
+) -> Tuple[np.ndarray, List[List[str]]]:
+    """It reads a dataset of the semantic analogies task, i.e. a file with a question of 4 entities for each line, and
+    looks its entities up in the vectors. The file is read one chunk of lines at a time, and the entities of each chunk
+    are looked up at once.
+
+    Parameters
+    ----------
+    vectors
+        Embedding store containing the vectors.
+    filename : str
+        Path of the dataset.
+
+    Returns
+    -------
+        The matrix with the rows in the vectors of the 4 entities of each question whose entities all have a vector,
+        and the list of the other questions, each one as the list of its entities.
+    """
+    data = list()
+    ignored = list()
+    # the rows fit in int32, unless the vectors are more than its maximum value
+    dtype = np.int32 if len(vectors.vocab) < np.iinfo(np.int32).max else np.int64
+
+    with open(filename, "r") as f:
+        n_lines = 0
+        while True:
+            lines = list(islice(f, question_chunk_size))
+            if len(lines) == 0:
+                break
+
+            quadruples = list()
+            for i, line in enumerate(lines):
+                quadruple = line.split()
+                if len(quadruple) == 0:
+                    continue
+                if len(quadruple) != 4:
+                    raise ValueError(
+                        filename
+                        + ", line "
+                        + str(n_lines + i + 1)
+                        + ": expected 4 entities, got "
+                        + str(len(quadruple))
+                    )
+                quadruples.append(quadruple)
+            n_lines += len(lines)
+
+            # the entities of all the questions of the chunk are looked up at once
+            rows = vectors.lookup(
+                [entity for quadruple in quadruples for entity in quadruple]
+            ).reshape(-1, 4)
+            found = np.all(rows >= 0, axis=1)
+            data.append(rows[found].astype(dtype))
+            ignored.extend(
+                quadruple
+                for quadruple, is_found in zip(quadruples, found)
+                if not is_found
+            )
+
+    return np.concatenate([np.zeros((0, 4), dtype=dtype)] + data), ignored
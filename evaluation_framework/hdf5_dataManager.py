@@ -5,7 +5,17 @@ import json
 import numpy as np
 import base64
 import h5py
+from functools import partial
 from evaluation_framework.abstract_dataManager import AbstractDataManager
+from evaluation_framework.goldStandardReader import (
+    read_analogy_questions,
+    read_document_entities,
+    read_relatedness_file,
+)
+from evaluation_framework.embeddingStore import EmbeddingStore
+
+# number of rows of the consolidated vectors dataset stored and read together
+block_size = 1024
 
 """
 It models how to manage vectors provided in HDF5 file.
@@ -13,14 +23,19 @@ It models how to manage vectors provided in HDF5 file.
 
 
 class DataManager(AbstractDataManager):
+    # precision of the vectors, see EmbeddingStore
+    dtype = "float64"
+
     """
     It initializes the DataManager for each provided task.
 
     debugging_mode: {TRUE,FALSE}.
+    dtype: {float64, float32, float16}, precision of the vectors. Default: float64
     """
 
-    def __init__(self, debugging_mode):
+    def __init__(self, debugging_mode, dtype="float64"):
         self.debugging_mode = debugging_mode
+        self.dtype = dtype
 
         self.taskDataManager = dict()
         self.taskDataManager["classification"] = ClassificationDataManager
@@ -34,25 +49,185 @@ class DataManager(AbstractDataManager):
             print("HDF5 data manager initialized")
 
     """
-    It reads the vectors file or it stores the information to read it.
+    It stores the information to read the vectors file.
+    It returns an embedding store which reads the whole file, or only the vectors of the entities provided in input, 
+    when a task needs them.
     
     vector_filename: path of the file provided in input, which contains entities and the related vectors.
     vector_size: size of the vectors
+    entities: names of the only entities whose vectors are read. Default: None to read all the vectors.
     """
 
-    def initialize_vectors(self, vector_filename, vector_size):
-        return None
+    def initialize_vectors(self, vector_filename, vector_size, entities=None):
+        if entities is not None:
+            loader = partial(
+                self.read_entity_vectors, vector_filename, vector_size, entities
+            )
+        else:
+            loader = partial(self.read_vector_file, vector_filename, vector_size)
+        return EmbeddingStore(loader=loader, dtype=self.dtype)
 
     """
-    Warning: It does anything. 
-    It reads the vectors file.
+    It reads the vectors file, either in the consolidated layout or in the layout with a dataset for each entity.
+    It returns the list of entity names and the matrix containing the related vectors, with the precision of the 
+    data manager.
     
     vector_filename: path of the file provided in input, which contains entities and the related vectors.
     vector_size: size of the vectors
     """
 
     def read_vector_file(self, vector_filename, vec_size):
-        pass
+        with h5py.File(vector_filename, "r") as vector_file:
+            if self.is_consolidated(vector_file):
+                names = self.read_names(vector_file)
+                W = vector_file["vectors"][:, :vec_size].astype(self.dtype, copy=False)
+            else:
+                vector_group = vector_file["Vectors"]
+
+                keys = list(vector_group.keys())
+                names = [base64.b32decode(key).decode("utf-8") for key in keys]
+
+                W = np.zeros((len(keys), vec_size), dtype=self.dtype)
+                for idx, key in enumerate(keys):
+                    W[idx, :] = vector_group[key][0]
+
+        return names, W
+
+    """
+    It checks whether the vectors file has the consolidated layout, i.e. a 2-D 'vectors' dataset with a row for 
+    each entity, a 'names' dataset with the entity names and an 'index' dataset with the order of the sorted names.
+    
+    vector_file: opened HDF5 vectors file
+    """
+
+    def is_consolidated(self, vector_file):
+        return "vectors" in vector_file and "names" in vector_file
+
+    """
+    It returns the list of entity names of a vectors file with the consolidated layout.
+    
+    vector_file: opened HDF5 vectors file
+    """
+
+    def read_names(self, vector_file):
+        return [
+            name.decode("utf-8") if isinstance(name, bytes) else name
+            for name in vector_file["names"][:]
+        ]
+
+    """
+    It reads only the vectors of the entities provided in input.
+    With the consolidated layout, the entities are looked up in the sorted names and their vectors are read one block
+    of rows at a time, skipping the blocks without requested entities. Otherwise, a dataset is read for each entity.
+    It returns the list of the entities found in the vectors file and the matrix containing the related vectors, with 
+    the precision of the data manager.
+    
+    vector_filename: path of the file provided in input, which contains entities and the related vectors.
+    vector_size: size of the vectors
+    entities: list of entity names
+    """
+
+    def read_entity_vectors(self, vector_filename, vector_size, entities):
+        entities = list(dict.fromkeys(entities))
+
+        with h5py.File(vector_filename, "r") as vector_file:
+            if self.is_consolidated(vector_file):
+                names = np.array(self.read_names(vector_file), dtype=object)
+                if "index" in vector_file:
+                    order = vector_file["index"][:]
+                else:
+                    order = np.argsort(names, kind="stable")
+                sorted_names = names[order]
+
+                keys = np.array(entities, dtype=object)
+                positions = np.searchsorted(sorted_names, keys)
+                positions[positions == len(sorted_names)] = 0
+                found = (
+                    sorted_names[positions] == keys
+                    if len(sorted_names) > 0
+                    else np.zeros(len(keys), dtype=bool)
+                )
+
+                rows = order[positions[found]]
+                unique_rows, inverse = np.unique(rows, return_inverse=True)
+                W = self.read_rows(vector_file["vectors"], unique_rows, vector_size)
+                W = W[inverse]
+                found_names = list(keys[found])
+            else:
+                vector_group = vector_file["Vectors"]
+
+                found_names = list()
+                values = list()
+                for name in entities:
+                    encoded_name = self._to_hdf5_key(name)
+                    if encoded_name in vector_group:
+                        found_names.append(name)
+                        values.append(vector_group[encoded_name][0][:vector_size])
+                W = np.array(values, dtype=self.dtype).reshape(
+                    (len(found_names), vector_size)
+                )
+
+        return found_names, W
+
+    """
+    It reads some rows of the 'vectors' dataset of a consolidated vectors file. Reading many scattered rows with a 
+    single HDF5 selection is very slow, so the rows are read one block at a time.
+    It returns the matrix containing the vectors of the rows, with the precision of the data manager.
+    
+    dataset: 'vectors' dataset
+    rows: sorted array of the rows to read, without duplicates
+    vector_size: size of the vectors
+    """
+
+    def read_rows(self, dataset, rows, vector_size):
+        W = np.empty((len(rows), vector_size), dtype=self.dtype)
+
+        blocks = rows // block_size
+        starts = np.flatnonzero(np.diff(blocks, prepend=-1))
+        ends = np.append(starts[1:], len(rows))
+
+        for start, end in zip(starts, ends):
+            first_row = blocks[start] * block_size
+            block = dataset[first_row : first_row + block_size, :vector_size]
+            W[start:end] = block[rows[start:end] - first_row]
+
+        return W
+
+    """
+    It writes a vectors file with the consolidated layout: a 2-D 'vectors' dataset, a 'names' dataset and an 
+    'index' dataset containing the order of the sorted names. The vectors are written with the precision of the data 
+    manager.
+    
+    vector_filename: path of the file to write
+    names: list of the entity names
+    W: matrix containing the related vectors
+    """
+
+    def write_vector_file(self, vector_filename, names, W):
+        names = np.array(names, dtype=object)
+        W = np.asarray(W, dtype=self.dtype)
+        chunks = (min(block_size, len(W)), W.shape[1]) if W.size > 0 else None
+        with h5py.File(vector_filename, "w") as vector_file:
+            vector_file.create_dataset("vectors", data=W, chunks=chunks)
+            vector_file.create_dataset(
+                "names", data=names, dtype=h5py.special_dtype(vlen=str)
+            )
+            vector_file.create_dataset("index", data=np.argsort(names, kind="stable"))
+
+        if self.debugging_mode:
+            print("Written " + str(len(names)) + " vectors in " + vector_filename)
+
+    """
+    It converts a vectors file with a dataset for each entity into a vectors file with the consolidated layout.
+    
+    vector_filename: path of the vectors file to convert
+    output_filename: path of the consolidated vectors file
+    vector_size: size of the vectors
+    """
+
+    def convert_vector_file(self, vector_filename, output_filename, vector_size):
+        names, W = self.read_vector_file(vector_filename, vector_size)
+        self.write_vector_file(output_filename, names, W)
 
     """
     It returns a list which can be used as header, e.g. of a dataframe. 
@@ -82,7 +257,7 @@ class DataManager(AbstractDataManager):
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -137,43 +312,25 @@ class DataManager(AbstractDataManager):
     It returns a vocabulary containing all the entities of the vector file provided in input.
     It return a dictionary which key is the entity name and the value is a progressive value.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     """
 
     def create_vocab(self, vectors, vector_filename, vector_size):
-        vector_file = h5py.File(vector_filename, "r")
-        vector_group = vector_file["Vectors"]
-
-        words = [base64.b32decode(key).decode("utf-8") for key in vector_group.keys()]
-        vocab = {w: idx for idx, w in enumerate(words)}
-
-        return vocab
+        return vectors.vocab
 
     """
     It normalizes the vector provided in input.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     vocab: dictionary which key is the entity name and the value is a progressive value
     """
 
     def normalize_vectors(self, vectors, vector_filename, vec_size, vocab):
-        vector_file = h5py.File(vector_filename, "r")
-        vector_group = vector_file["Vectors"]
-
-        W = np.zeros((len(vocab), vec_size))
-
-        for word, idx in vocab.items():
-            W[idx, :] = vector_group[self._to_hdf5_key(word)][0]
-
-        # normalize each word vector to unit length
-        d = np.sum(W ** 2, 1) ** (0.5)
-        W_norm = (W.T / d).T
-
-        return W_norm
+        return vectors.normalized
 
 
 """
@@ -205,7 +362,7 @@ class ClassificationDataManager(DataManager):
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -225,9 +382,6 @@ class ClassificationDataManager(DataManager):
         column_score="label",
     ):
 
-        vector_file = h5py.File(vector_filename, "r")
-        vector_group = vector_file["Vectors"]
-
         fields = [column_key, column_score]
 
         gold = self.read_file(goldStandard_filename, fields)
@@ -235,24 +389,7 @@ class ClassificationDataManager(DataManager):
         gold.rename(columns={column_key: "name"}, inplace=True)
         gold.rename(columns={column_score: "label"}, inplace=True)
 
-        merged = pd.DataFrame(columns=self.create_header(vector_size))
-        ignored = list()
-
-        for row in gold.itertuples():
-            encoded_name = self._to_hdf5_key(row.name)
-            if encoded_name in vector_group:
-                values = vector_group[encoded_name][0]
-
-                new_row = dict(zip(np.arange(vector_size), values))
-                new_row["name"] = row.name
-                new_row["label"] = row.label
-
-                merged = merged.append(new_row, ignore_index=True)
-            else:
-                ignored.append(row.name)
-
-        ignored_df = pd.DataFrame(ignored, columns=["name"])
-        return merged, ignored_df
+        return vectors.merge(gold)
 
     """
     It returns a list which can be used as header, e.g. of a dataframe. 
@@ -304,7 +441,7 @@ class ClusteringDataManager(DataManager):
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -324,9 +461,6 @@ class ClusteringDataManager(DataManager):
         column_score="cluster",
     ):
 
-        vector_file = h5py.File(vector_filename, "r")
-        vector_group = vector_file["Vectors"]
-
         fields = [column_key, column_score]
 
         gold = self.read_file(goldStandard_filename, fields)
@@ -334,25 +468,7 @@ class ClusteringDataManager(DataManager):
         gold.rename(columns={column_key: "name"}, inplace=True)
         gold.rename(columns={column_score: "cluster"}, inplace=True)
 
-        merged = pd.DataFrame(columns=self.create_header(vector_size))
-        ignored = pd.DataFrame(columns=["name", "cluster"])
-
-        for row in gold.itertuples():
-            encoded_name = self._to_hdf5_key(row.name)
-            if encoded_name in vector_group:
-                values = vector_group[encoded_name][0]
-
-                new_row = dict(zip(np.arange(vector_size), values))
-                new_row["name"] = row.name
-                new_row["cluster"] = row.cluster
-
-                merged = merged.append(new_row, ignore_index=True)
-            else:
-                ignored.append(
-                    {"name": row.name, "cluster": row.cluster}, ignore_index=True
-                )
-
-        return merged, ignored
+        return vectors.merge(gold)
 
     """
     It returns a list which can be used as header, e.g. of a dataframe. 
@@ -403,7 +519,7 @@ class DocumentSimilarityDataManager(DataManager):
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -423,61 +539,16 @@ class DocumentSimilarityDataManager(DataManager):
         column_score=None,
     ):
 
-        vector_file = h5py.File(vector_filename, "r")
-        vector_group = vector_file["Vectors"]
-
-        merged = pd.DataFrame(columns=self.create_header(vector_size))
-        ignored = list()
-
         entities = self.get_entities(goldStandard_filename)
-
-        for row in entities.itertuples():
-            encoded_name = self._to_hdf5_key(row.name)
-            if encoded_name in vector_group:
-                values = vector_group[encoded_name][0]
-
-                new_row = dict(zip(np.arange(vector_size), values))
-                new_row["doc"] = row.doc
-                new_row["name"] = row.name
-                new_row["weight"] = row.weight
-
-                merged = merged.append(new_row, ignore_index=True)
-            else:
-                ignored.append(row.name)
-
-        ignored_df = pd.DataFrame(ignored, columns=["name"])
-
-        return merged, ignored_df
+        return vectors.merge(entities)
 
     """
-    It reads the file used as gold standard which contains entities attached to the documents.
+    It reads the file used as gold standard which contains entities attached to the documents, either a JSON list of 
+    documents or a JSON lines file (.jsonl), see read_document_entities.
     """
 
     def get_entities(self, filename):
-        with open(filename) as f:
-            data = json.load(f)
-
-        dict_entities = {}
-        doc_list = list()
-        entities_list = list()
-        weight_list = list()
-        i = 0
-
-        for doc_obj in data:
-            i += 1
-            for annotation in doc_obj["annotations"]:
-                doc_list.append(i)
-
-                key = annotation["entity"]
-                entities_list.append(key)
-
-                weight_list.append(float(annotation["weight"]))
-
-        dict_entities["doc"] = doc_list
-        dict_entities["name"] = entities_list
-        dict_entities["weight"] = weight_list
-
-        return pd.DataFrame.from_dict(dict_entities)
+        return read_document_entities(filename)
 
     """
     It returns a list which can be used as header, e.g. of a dataframe. 
@@ -508,37 +579,22 @@ class EntityRelatednessDataManager(DataManager):
             print("Entity relatedness data manager initialized")
 
     """
-    It reads the dataset used as gold standard
+    It reads the dataset used as gold standard, either a TSV file (.tsv) or a text file, see read_relatedness_file. 
+    It returns a dictionary with each main entity as key and, as value, the list of its related entities ordered by 
+    gold rank, from the most related one.
     
     filename: path of the dataset
     columns: list of columns to retrieve
     """
 
     def read_file(self, filename, columns=None):
-        entities_groups = {}
-        related_entities = []
-
-        with open(filename) as f:
-            for i, line in enumerate(f):
-                key = line.strip()
-
-                if i % 21 == 0:
-                    main_entity = key
-                    related_entities = []
-
-                else:
-                    related_entities.append(key)
-
-                if i % 21 == 20:
-                    entities_groups[main_entity] = related_entities
-
-        return entities_groups
+        return read_relatedness_file(filename)
 
     """
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -558,31 +614,11 @@ class EntityRelatednessDataManager(DataManager):
         column_score=None,
     ):
 
-        vector_file = h5py.File(vector_filename, "r")
-        vector_group = vector_file["Vectors"]
-
-        merged = pd.DataFrame(columns=self.create_header(vector_size))
-        ignored = list()
-
         if goldStandard_data is None:
             entities = self.read_file(goldStandard_filename)
             goldStandard_data = pd.DataFrame({"name": list(entities.keys())})
 
-        for row in goldStandard_data.itertuples():
-            encoded_name = self._to_hdf5_key(row.name)
-            if encoded_name in vector_group:
-                values = vector_group[encoded_name][0]
-
-                new_row = dict(zip(np.arange(vector_size), values))
-                new_row["name"] = row.name
-
-                merged = merged.append(new_row, ignore_index=True)
-            else:
-                ignored.append(row.name)
-
-        ignored_df = pd.DataFrame(ignored, columns=["name"])
-
-        return merged, ignored_df
+        return vectors.merge(goldStandard_data)
 
     """
     It returns a list which can be used as header, e.g. of a dataframe. 
@@ -627,7 +663,7 @@ class RegressionDataManager(DataManager):
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -647,9 +683,6 @@ class RegressionDataManager(DataManager):
         column_score="rating",
     ):
 
-        vector_file = h5py.File(vector_filename, "r")
-        vector_group = vector_file["Vectors"]
-
         fields = [column_key, column_score]
 
         gold = self.read_file(goldStandard_filename, fields)
@@ -657,24 +690,7 @@ class RegressionDataManager(DataManager):
         gold.rename(columns={column_key: "name"}, inplace=True)
         gold.rename(columns={column_score: "label"}, inplace=True)
 
-        merged = pd.DataFrame(columns=self.create_header(vector_size))
-        ignored = list()
-
-        for row in gold.itertuples():
-            encoded_name = self._to_hdf5_key(row.name)
-            if encoded_name in vector_group:
-                values = vector_group[encoded_name][0]
-
-                new_row = dict(zip(np.arange(vector_size), values))
-                new_row["name"] = row.name
-                new_row["label"] = row.label
-
-                merged = merged.append(new_row, ignore_index=True)
-            else:
-                ignored.append(row.name)
-
-        ignored_df = pd.DataFrame(ignored, columns=["name"])
-        return merged, ignored_df
+        return vectors.merge(gold)
 
     """
     It returns a list which can be used as header, e.g. of a dataframe. 
@@ -716,10 +732,12 @@ class SemanticAnalogiesDataManager(DataManager):
         pass
 
     """
-    It intersects the input file which contains the vectors and the file used as gold standard.
-    It returns the merged dataframe and the dataframe of ignored entities.
+    It intersects the input file which contains the vectors and the file used as gold standard, i.e. a file with a 
+    question of 4 entities for each line, see read_analogy_questions.
+    It returns the matrix with the rows in the vectors of the 4 entities of each question whose entities all have a 
+    vector, and the list of the other questions, each one as the list of its entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -738,20 +756,4 @@ class SemanticAnalogiesDataManager(DataManager):
         column_key=None,
         column_score=None,
     ):
-
-        vector_file = h5py.File(vector_filename, "r")
-        vector_group = vector_file["Vectors"]
-
-        data = list()
-        ignored = list()
-
-        with open(goldStandard_filename, "r") as f:
-            for line in f:
-                quadruplet = line.rstrip().split()
-
-                if all(self._to_hdf5_key(x) in vector_group for x in quadruplet):
-                    data.append(quadruplet)
-                else:
-                    ignored.append(quadruplet)
-
-        return data, ignored
+        return read_analogy_questions(vectors, goldStandard_filename)
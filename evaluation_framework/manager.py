@@ -4,7 +4,9 @@ import xml.etree.ElementTree as ET
 from evaluation_framework.evaluationManager import EvaluationManager
 from evaluation_framework.txt_dataManager import DataManager as TxtDataManager
 from evaluation_framework.hdf5_dataManager import DataManager as Hdf5DataManager
-from typing import List, Callable
+from evaluation_framework.nearestNeighbourIndex import available_indices
+from evaluation_framework.embeddingStore import available_dtypes
+from typing import Callable, Dict, List, Tuple
 import numpy as np
 
 available_tasks = [
@@ -41,6 +43,16 @@ class FrameworkManager:
                 [np.ndarray, np.ndarray, np.ndarray], np.ndarray
             ] = None,
             result_directory_path: str = None,
+            n_jobs: int = None,
+            analogy_index: str = "exact",
+            analogy_candidates: str = "all",
+            document_corpora: Dict[str, Tuple[str, str]] = None,
+            relatedness_datasets: List[str] = None,
+            dtype: str = "float64",
+            gold_entities_only: bool = True,
+            clustering_large_scale_threshold: int = None,
+            clustering_dbscan_sweep: bool = False,
+            classification_svm_sweep: bool = False,
     ):
         """It checks the parameters of the evaluation and starts it.
 
@@ -66,9 +78,61 @@ class FrameworkManager:
             {True, False}, True to run the tasks by reporting all the information collected during the run,
             False otherwise. Default: False
         analogy_function : Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]
-             function to compute the analogy among vectors. Default: None to use the default function.
+             function to compute the analogy among vectors. It is applied to a block of questions at once: it takes
+             3 matrices, with the vectors of the questions as rows, and returns the matrix of the predicted vectors.
+             Default: None to use the default function.
         result_directory_path : str or None
              Optionally set the result directory path.
+        n_jobs : int or None
+             Maximum number of worker processes used when the tasks run in parallel. When the tasks run
+             sequentially, number of jobs used by the cross-validation of the classification and regression
+             models. Default: None to use all the available cores in parallel mode, and a single process in
+             sequential mode.
+        analogy_index : str
+             {exact, ivf, hnswlib, faiss}, index used in the SemanticAnalogies task to search the nearest vectors of
+             the predicted ones. The approximate indices (ivf, hnswlib, faiss) also report their recall@k with
+             respect to the exact search. hnswlib and faiss require the related package. Default: exact
+        analogy_candidates : str
+             Entities which can be predicted in the SemanticAnalogies task: all, answers (for each dataset, the
+             entities which are the answer of one of its questions) or the path of a file with an entity for each
+             line. Restricting them makes the search much faster, but the scores are reported separately as they
+             are not comparable with the ones on all the entities. Default: all
+        document_corpora : Dict[str, Tuple[str, str]] or None
+             Corpora of annotated documents used in the DocumentSimilarity task, by name. Each corpus is a pair with
+             the path of the file with the entities of the documents (a JSON list or a JSON lines file) and the path
+             of the CSV file with the similarity score of pairs of documents (doc1, doc2 and average columns).
+             Default: None to use LP50.
+        relatedness_datasets : List[str] or None
+             Paths of the datasets used in the EntityRelatedness task. Each dataset is either a TSV file (.tsv) with
+             the main entity, a related entity and its gold rank (1 for the most related one) in each line, or a text
+             file with each main entity followed by its related entities, ordered by gold rank, in indented lines.
+             The groups of related entities can have any size. Default: None to use kgrc_entity_relatedness.
+        dtype : str
+             {float64, float32, float16}, precision of the vectors kept in memory. float32 halves the memory of
+             float64, and float16 halves it again: float16 vectors are stored in float16 and converted to float32
+             when they are used. The scores then differ from the float64 ones by the rounding of the vectors, e.g. in
+             the last digits of the accuracy of the SVM models. Default: float64, which reproduces the previous runs
+        gold_entities_only : bool
+             {True, False}, True to read only the vectors of the entities of the datasets used as gold standard by
+             the tasks, so that the vector file can be much larger than the memory. All the vectors are read anyway
+             if SemanticAnalogies is run, as it searches the answers among all the entities. Default: True
+        clustering_large_scale_threshold : int or None
+             Number of entities of a dataset of the Clustering task above which the large-scale models are used,
+             which do not need the distances among all the vectors: mini-batch k-means, the ward hierarchical
+             clustering constrained by the graph of the nearest neighbours of each vector, and the agglomerative
+             clustering with average linkage computed on a sample of the vectors. Their results are reported with a
+             large_scale=... model configuration, as they differ from the ones of the exact models. DBSCAN is the
+             same in both cases. Default: None to use the exact models only.
+        clustering_dbscan_sweep : bool
+             {True, False}, True to fit DBSCAN in the Clustering task also for a grid of eps and min_samples values,
+             with eps derived from the distances of the vectors to their nearest neighbours. The neighbours are
+             computed once for the whole grid. The scores of each setting are reported, with eps and min_samples in
+             the model configuration, together with the best setting by adjusted rand index. Default: False
+        classification_svm_sweep : bool
+             {True, False}, True to train the SVM models of all the C values of the Classification task together,
+             computing the RBF kernel once for each fold instead of once for each model. The shared kernel differs
+             from the one of libsvm in the last digits, so the accuracy of the models with the largest C values
+             (100, 1000) can differ by about 0.002 from the one of the separate models. Default: False
 
         Returns
         -------
@@ -84,13 +148,23 @@ class FrameworkManager:
         self.top_k = top_k
         self.compare_with = compare_with
         self.debugging_mode = debugging_mode
+        self.n_jobs = n_jobs
+        self.analogy_index = analogy_index
+        self.analogy_candidates = analogy_candidates
+        self.document_corpora = document_corpora
+        self.relatedness_datasets = relatedness_datasets
+        self.dtype = dtype
+        self.gold_entities_only = gold_entities_only
+        self.clustering_large_scale_threshold = clustering_large_scale_threshold
+        self.clustering_dbscan_sweep = clustering_dbscan_sweep
+        self.classification_svm_sweep = classification_svm_sweep
 
         self.check_parameters()
 
         if vector_file_format == "txt":
-            self.dataManager = TxtDataManager(self.debugging_mode)
+            self.dataManager = TxtDataManager(self.debugging_mode, self.dtype)
         elif vector_file_format == "hdf5":
-            self.dataManager = Hdf5DataManager(self.debugging_mode)
+            self.dataManager = Hdf5DataManager(self.debugging_mode, self.dtype)
 
         self.evaluation_manager = EvaluationManager(
             self.dataManager, self.debugging_mode
@@ -127,15 +201,41 @@ class FrameworkManager:
                         "w",
                     )
 
-        self.evaluation_manager.initialize_vectors(vector_filename, vector_size)
+        # the task managers are created once, both to read the gold standard entities and to run the tasks. In
+        # parallel, the cross-validation runs in the workers of the task scheduler, so the task managers use no jobs
+        evaluators = self.evaluation_manager.create_evaluators(
+            tasks,
+            similarity_metric,
+            self.top_k,
+            analogy_function,
+            analogy_index=self.analogy_index,
+            analogy_candidates=self.analogy_candidates,
+            document_corpora=self.document_corpora,
+            relatedness_datasets=self.relatedness_datasets,
+            clustering_large_scale_threshold=self.clustering_large_scale_threshold,
+            clustering_dbscan_sweep=self.clustering_dbscan_sweep,
+            classification_svm_sweep=self.classification_svm_sweep,
+            n_jobs=None if parallel else self.n_jobs,
+        )
+
+        # the gold standards are read before the vectors, so that only the vectors of their entities are read
+        entities = None
+        if self.gold_entities_only:
+            entities = self.evaluation_manager.get_gold_standard_entities(evaluators)
+        self.evaluation_manager.initialize_vectors(vector_filename, vector_size, entities)
 
         if parallel:
             scores_dictionary = self.evaluation_manager.run_tests_in_parallel(
-                tasks, similarity_metric, self.top_k, analogy_function
+                tasks,
+                similarity_metric,
+                self.top_k,
+                analogy_function,
+                self.n_jobs,
+                evaluators=evaluators,
             )
         else:
             scores_dictionary = self.evaluation_manager.run_tests_in_sequential(
-                tasks, similarity_metric, self.top_k, analogy_function
+                tasks, similarity_metric, self.top_k, evaluators=evaluators
             )
 
         self.evaluation_manager.compare_with(compare_with, scores_dictionary)
@@ -162,6 +262,20 @@ class FrameworkManager:
         if type(self.parallel) is not bool:
             raise Exception("The parameter PARALLEL is boolean.")
 
+        if type(self.gold_entities_only) is not bool:
+            raise Exception("The parameter GOLD_ENTITIES_ONLY is boolean.")
+
+        if type(self.clustering_dbscan_sweep) is not bool:
+            raise Exception("The parameter CLUSTERING_DBSCAN_SWEEP is boolean.")
+
+        if type(self.classification_svm_sweep) is not bool:
+            raise Exception("The parameter CLASSIFICATION_SVM_SWEEP is boolean.")
+
+        if self.n_jobs is not None and (
+            type(self.n_jobs) is not int or (self.n_jobs < 1 and self.n_jobs != -1)
+        ):
+            raise Exception("The parameter N_JOBS must be a positive number or -1.")
+
         if self.tasks != "_all":
             for task in self.tasks:
                 if not task in available_tasks:
@@ -176,6 +290,44 @@ class FrameworkManager:
         if self.top_k < 0:
             raise Exception("The top_k value must be not negative.")
 
+        if self.analogy_index not in available_indices:
+            raise Exception(
+                self.analogy_index
+                + " is not a supported analogy index. The managed indices are "
+                + ", ".join(available_indices)
+                + "."
+            )
+
+        if self.analogy_candidates not in ["all", "answers"] and not os.path.isfile(
+            self.analogy_candidates
+        ):
+            raise Exception(
+                "The analogy candidates must be all, answers or the path of a file with an entity for each line."
+            )
+
+        if self.relatedness_datasets is not None:
+            for dataset in self.relatedness_datasets:
+                if not os.path.isfile(dataset):
+                    raise Exception(
+                        "The entity relatedness dataset " + dataset + " does not exist."
+                    )
+
+        if self.clustering_large_scale_threshold is not None and (
+            type(self.clustering_large_scale_threshold) is not int
+            or self.clustering_large_scale_threshold < 1
+        ):
+            raise Exception(
+                "The parameter CLUSTERING_LARGE_SCALE_THRESHOLD must be a positive number."
+            )
+
+        if self.dtype not in available_dtypes:
+            raise Exception(
+                str(self.dtype)
+                + " is not a supported precision. The managed precisions are "
+                + ", ".join(available_dtypes)
+                + "."
+            )
+
         # compare_with TODO
 
         if type(self.debugging_mode) is not bool:
@@ -194,28 +346,46 @@ class FrameworkManager:
         tree = ET.parse(xml_file)
         root = tree.getroot()
 
-        string_tags = ["vector_filename", "vector_file_format", "similarity_function"]
+        string_tags = [
+            "vector_filename",
+            "vector_file_format",
+            "similarity_function",
+            "analogy_index",
+            "analogy_candidates",
+            "dtype",
+        ]
 
         for tag in string_tags:
             actual_tag = root.find(tag)
             if not actual_tag is None:
                 parameters_dict[tag] = actual_tag.text
 
-        int_tags = ["vector_size", "top_k"]
+        int_tags = [
+            "vector_size",
+            "top_k",
+            "n_jobs",
+            "clustering_large_scale_threshold",
+        ]
 
         for tag in int_tags:
             actual_tag = root.find(tag)
             if not actual_tag is None:
                 parameters_dict[tag] = int(actual_tag.text)
 
-        boolean_tags = ["parallel", "debugging_mode"]
+        boolean_tags = [
+            "parallel",
+            "debugging_mode",
+            "gold_entities_only",
+            "clustering_dbscan_sweep",
+            "classification_svm_sweep",
+        ]
 
         for tag in boolean_tags:
             actual_tag = root.find(tag)
             if not actual_tag is None:
-                parameters_dict[tag] = bool(actual_tag.text)
+                parameters_dict[tag] = self.parse_boolean(tag, actual_tag.text)
 
-        tags = ["tasks", "compare_with"]
+        tags = ["tasks", "compare_with", "relatedness_datasets"]
         for tag in tags:
             tag_values_list = []
             actual_tag_list = root.find(tag)
@@ -225,3 +395,27 @@ class FrameworkManager:
                 parameters_dict[tag] = tag_values_list
 
         return parameters_dict
+
+    """
+    It returns the value of a boolean tag of the xml file: true or 1 for True, false or 0 for False, whatever the case.
+    Any other value raises an exception, as bool() would take any non-empty text, e.g. false, as True.
+    
+    tag: name of the tag.
+    text: text of the tag.
+    """
+
+    @staticmethod
+    def parse_boolean(tag, text):
+        text = "" if text is None else text
+        value = text.strip().lower()
+        if value in ("true", "1"):
+            return True
+        if value in ("false", "0"):
+            return False
+        raise Exception(
+            "The parameter "
+            + tag.upper()
+            + " is boolean: expected true or false, got '"
+            + text
+            + "'."
+        )
@@ -0,0 +1,412 @@
+from abc import ABCMeta, abstractmethod
+import numpy as np
+from evaluation_framework.embeddingStore import get_compute_dtype
+
+try:
+    import hnswlib
+except ImportError:  # optional dependency
+    hnswlib = None
+
+try:
+    import faiss
+except ImportError:  # optional dependency
+    faiss = None
+
+"""
+Indices searching the vectors with the largest inner product with a query vector. With normalized vectors, they are
+the nearest ones by cosine similarity.
+The exact index compares each query with all the vectors; the approximate ones only compare it with part of them, so
+that the search time does not grow linearly with the number of vectors.
+"""
+
+available_indices = ["exact", "ivf", "hnswlib", "faiss"]
+
+# number of vectors assigned to the nearest centroid or checked for non-finite values at once while building the IVF
+# index, and number of float16 vectors converted to float32 at once by the exact index
+block_size = 4096
+
+
+class NearestNeighbourIndex(metaclass=ABCMeta):
+    """
+    It abstracts the behavior of a nearest neighbour index. It should be extended by each index.
+    """
+
+    approximate = True
+
+    @abstractmethod
+    def search(self, queries: np.ndarray, k: int, exclude: np.ndarray = None):
+        """It searches the k vectors with the largest inner product with each query vector.
+
+        Parameters
+        ----------
+        queries : np.ndarray
+            Matrix with a query vector in each row.
+        k : int
+            Number of vectors to return for each query.
+        exclude : np.ndarray
+            Optional matrix with, for each query, the positions of the vectors which must not be returned.
+            Negative positions are ignored.
+
+        Returns
+        -------
+            Matrix of shape (number of queries, k) with the positions of the vectors found for each query, in no
+            particular order. If less than k vectors are found, the row is filled with -1.
+        """
+        pass
+
+    @staticmethod
+    def remove_excluded(labels: np.ndarray, k: int, exclude: np.ndarray = None):
+        """It removes the excluded positions from the positions found for each query and keeps the first k.
+
+        Parameters
+        ----------
+        labels : np.ndarray
+            Matrix with the positions found for each query, ordered by decreasing inner product. -1 stands for
+            no vector.
+        k : int
+            Number of positions to keep for each query.
+        exclude : np.ndarray
+            Optional matrix with, for each query, the positions which must be removed.
+
+        Returns
+        -------
+            Matrix of shape (number of queries, k), filled with -1 where less than k positions are left.
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        removed = labels < 0
+        if exclude is not None:
+            removed |= (labels[:, :, np.newaxis] == exclude[:, np.newaxis, :]).any(
+                axis=2
+            )
+
+        # the positions kept are moved to the beginning of each row, in the same order
+        order = np.argsort(removed, axis=1, kind="stable")[:, :k]
+        result = np.take_along_axis(labels, order, axis=1)
+        result[np.take_along_axis(removed, order, axis=1)] = -1
+        if result.shape[1] < k:
+            padding = np.full((len(result), k - result.shape[1]), -1, dtype=np.int64)
+            result = np.concatenate([result, padding], axis=1)
+        return result
+
+
+class ExactIndex(NearestNeighbourIndex):
+    """
+    Index comparing each query vector with all the vectors.
+    """
+
+    approximate = False
+
+    def __init__(self, W: np.ndarray):
+        """Constructor.
+
+        Parameters
+        ----------
+        W : np.ndarray
+            Matrix with a vector in each row.
+        """
+        self.W = W
+
+    def search(self, queries: np.ndarray, k: int, exclude: np.ndarray = None):
+        compute_dtype = get_compute_dtype(self.W.dtype)
+        if compute_dtype == self.W.dtype:
+            dist = np.dot(queries, self.W.T)
+        else:
+            # the vectors are converted to the computation precision one block at a time
+            queries = queries.astype(compute_dtype, copy=False)
+            dist = np.empty((len(queries), len(self.W)), dtype=queries.dtype)
+            for start in range(0, len(self.W), block_size):
+                block = slice(start, start + block_size)
+                dist[:, block] = np.dot(queries, self.W[block].astype(compute_dtype).T)
+        if exclude is not None:
+            rows, columns = np.nonzero(exclude >= 0)
+            dist[rows, exclude[rows, columns]] = -np.Inf
+
+        k = min(k, dist.shape[1])
+        return np.argpartition(-dist, k - 1, axis=1)[:, :k]
+
+
+class IVFIndex(NearestNeighbourIndex):
+    """
+    Inverted file index. The vectors are partitioned by spherical k-means into lists, each one represented by its
+    centroid.
+    Each query vector is only compared with the vectors of the n_probe lists whose centroids are the nearest to it.
+    """
+
+    def __init__(
+        self,
+        W: np.ndarray,
+        n_lists: int = None,
+        n_probe: int = 8,
+        n_iterations: int = 10,
+        sample_size: int = 100000,
+        random_state: int = 0,
+    ):
+        """Constructor. It partitions the vectors into lists.
+
+        Parameters
+        ----------
+        W : np.ndarray
+            Matrix with a vector in each row.
+        n_lists : int
+            Number of lists. Default: None to use the square root of the number of vectors.
+        n_probe : int
+            Number of lists searched for each query vector.
+        n_iterations : int
+            Number of iterations of k-means.
+        sample_size : int
+            Number of vectors used to compute the centroids.
+        random_state : int
+            Seed used to sample the vectors and to initialize the centroids.
+        """
+        self.W = W
+        # a vector which is not finite, e.g. with NaN values, would turn its centroid into NaN, and then all the 
+        # others: these vectors are left out of the lists, so they are never returned
+        rows = np.flatnonzero(self.get_finite(W))
+        n_vectors = len(rows)
+        if n_vectors == 0:
+            raise ValueError("The IVF index cannot be built: no vector is finite")
+        if n_lists is None:
+            n_lists = int(np.sqrt(n_vectors))
+        self.n_lists = max(1, min(n_lists, n_vectors))
+        self.n_probe = max(1, min(n_probe, self.n_lists))
+
+        random = np.random.RandomState(random_state)
+        if n_vectors > sample_size:
+            sample = W[
+                rows[np.sort(random.choice(n_vectors, sample_size, replace=False))]
+            ]
+        elif n_vectors < len(W):
+            sample = W[rows]
+        else:
+            sample = W
+        self.centroids = sample[
+            random.choice(len(sample), self.n_lists, replace=False)
+        ].astype(np.float64)
+
+        for _ in range(n_iterations):
+            assignment = self.assign(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=self.n_lists)
+            # the centroids of the empty lists are kept
+            filled = counts > 0
+            self.centroids[filled] = sums[filled] / counts[filled, np.newaxis]
+            # the inner product is used as similarity, so the centroids are normalized as the vectors
+            norms = np.linalg.norm(self.centroids, axis=1, keepdims=True)
+            self.centroids /= np.where(norms > 0, norms, 1)
+
+        # the vectors of each list are contiguous in order, from offsets[i] to offsets[i + 1]
+        assignment = self.assign(W)[rows]
+        self.order = rows[np.argsort(assignment, kind="stable")]
+        self.offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assignment, minlength=self.n_lists))]
+        )
+
+    @staticmethod
+    def get_finite(W: np.ndarray):
+        """It checks which vectors only contain finite values, one block of vectors at a time.
+
+        Parameters
+        ----------
+        W : np.ndarray
+            Matrix with a vector in each row.
+
+        Returns
+        -------
+            Boolean array, True for the vectors whose values are all finite.
+        """
+        finite = np.empty(len(W), dtype=bool)
+        for start in range(0, len(W), block_size):
+            block = slice(start, start + block_size)
+            finite[block] = np.isfinite(W[block]).all(axis=1)
+        return finite
+
+    def assign(self, vectors: np.ndarray):
+        """It returns the list of each vector, i.e. the one of the centroid with the largest inner product.
+
+        Parameters
+        ----------
+        vectors : np.ndarray
+            Matrix with a vector in each row.
+
+        Returns
+        -------
+            Array with the list of each vector.
+        """
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), block_size):
+            block = slice(start, start + block_size)
+            assignment[block] = np.argmax(
+                np.dot(vectors[block], self.centroids.T), axis=1
+            )
+        return assignment
+
+    def search(self, queries: np.ndarray, k: int, exclude: np.ndarray = None):
+        probes = np.argpartition(
+            -np.dot(queries, self.centroids.T), self.n_probe - 1, axis=1
+        )[:, : self.n_probe]
+
+        result = np.full((len(queries), k), -1, dtype=np.int64)
+        for i, query in enumerate(queries):
+            candidates = np.concatenate(
+                [self.order[self.offsets[j] : self.offsets[j + 1]] for j in probes[i]]
+            )
+            if exclude is not None:
+                candidates = candidates[~np.isin(candidates, exclude[i])]
+            if len(candidates) == 0:
+                continue
+
+            dist = np.dot(
+                self.W[candidates].astype(get_compute_dtype(self.W.dtype)), query
+            )
+            n_found = min(k, len(candidates))
+            result[i, :n_found] = candidates[
+                np.argpartition(-dist, n_found - 1)[:n_found]
+            ]
+        return result
+
+
+class HNSWIndex(NearestNeighbourIndex):
+    """
+    Hierarchical navigable small world graph index of the hnswlib package.
+    """
+
+    def __init__(
+        self,
+        W: np.ndarray,
+        M: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 50,
+        random_state: int = 0,
+    ):
+        """Constructor. It builds the graph of the vectors.
+
+        Parameters
+        ----------
+        W : np.ndarray
+            Matrix with a vector in each row.
+        M : int
+            Number of links of each vector in the graph.
+        ef_construction : int
+            Size of the list of candidates while building the graph.
+        ef_search : int
+            Size of the list of candidates while searching. It is increased to the number of vectors to return,
+            if lower.
+        random_state : int
+            Seed used to build the graph.
+        """
+        if hnswlib is None:
+            raise Exception(
+                "The hnswlib index requires the hnswlib package. Install it with: pip install hnswlib"
+            )
+        self.n_vectors = len(W)
+        self.ef_search = ef_search
+        self.index = hnswlib.Index(space="ip", dim=W.shape[1])
+        self.index.init_index(
+            max_elements=self.n_vectors,
+            ef_construction=ef_construction,
+            M=M,
+            random_seed=random_state,
+        )
+        self.index.add_items(W, np.arange(self.n_vectors))
+
+    def search(self, queries: np.ndarray, k: int, exclude: np.ndarray = None):
+        n_excluded = 0 if exclude is None else exclude.shape[1]
+        n_searched = min(k + n_excluded, self.n_vectors)
+        self.index.set_ef(max(self.ef_search, n_searched))
+        labels, _ = self.index.knn_query(queries, k=n_searched)
+        return self.remove_excluded(labels, k, exclude)
+
+
+class FaissIndex(NearestNeighbourIndex):
+    """
+    Hierarchical navigable small world graph index of the faiss package.
+    """
+
+    def __init__(
+        self, W: np.ndarray, M: int = 16, ef_construction: int = 200, ef_search: int = 50
+    ):
+        """Constructor. It builds the graph of the vectors.
+
+        Parameters
+        ----------
+        W : np.ndarray
+            Matrix with a vector in each row.
+        M : int
+            Number of links of each vector in the graph.
+        ef_construction : int
+            Size of the list of candidates while building the graph.
+        ef_search : int
+            Size of the list of candidates while searching. It is increased to the number of vectors to return,
+            if lower.
+        """
+        if faiss is None:
+            raise Exception(
+                "The faiss index requires the faiss package. Install it with: pip install faiss-cpu"
+            )
+        self.n_vectors = len(W)
+        self.ef_search = ef_search
+        self.index = faiss.IndexHNSWFlat(W.shape[1], M, faiss.METRIC_INNER_PRODUCT)
+        self.index.hnsw.efConstruction = ef_construction
+        self.index.add(np.ascontiguousarray(W, dtype=np.float32))
+
+    def search(self, queries: np.ndarray, k: int, exclude: np.ndarray = None):
+        n_excluded = 0 if exclude is None else exclude.shape[1]
+        n_searched = min(k + n_excluded, self.n_vectors)
+        self.index.hnsw.efSearch = max(self.ef_search, n_searched)
+        _, labels = self.index.search(
+            np.ascontiguousarray(queries, dtype=np.float32), n_searched
+        )
+        return self.remove_excluded(labels, k, exclude)
+
+
+def get_index(W: np.ndarray, index_name: str = "exact", **parameters):
+    """It builds an index of the vectors.
+
+    Parameters
+    ----------
+    W : np.ndarray
+        Matrix with a vector in each row.
+    index_name : str
+        {exact, ivf, hnswlib, faiss}. Default: exact
+    parameters
+        Further parameters of the constructor of the index.
+
+    Returns
+    -------
+        The index.
+    """
+    if index_name == "exact":
+        return ExactIndex(W, **parameters)
+    elif index_name == "ivf":
+        return IVFIndex(W, **parameters)
+    elif index_name == "hnswlib":
+        return HNSWIndex(W, **parameters)
+    elif index_name == "faiss":
+        return FaissIndex(W, **parameters)
+    raise ValueError(
+        index_name
+        + " is not a supported index. The managed indices are "
+        + ", ".join(available_indices)
+    )
+
+
+def recall_at_k(found: np.ndarray, exact: np.ndarray):
+    """It returns the recall@k of an approximate search, i.e. the average fraction of the k vectors found by the
+    exact search which are also found by the approximate one.
+
+    Parameters
+    ----------
+    found : np.ndarray
+        Matrix of shape (number of queries, k) with the positions found by the approximate search.
+    exact : np.ndarray
+        Matrix of shape (number of queries, k) with the positions found by the exact search.
+
+    Returns
+    -------
+        The recall@k, or None if there are no queries.
+    """
+    if exact.size == 0:
+        return None
+    found_exact = (found[:, :, np.newaxis] == exact[:, np.newaxis, :]).any(axis=1)
+    return float(np.mean(found_exact[exact >= 0]))
@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+"""
+It runs units of work of the tasks on a bounded pool of worker processes.
+The embedding store is placed in shared memory once, so that all the workers read the same vectors instead of
+receiving a copy each.
+"""
+
+# embedding store and evaluators of the worker process, set when the worker starts
+_worker_vectors = None
+_worker_evaluators = None
+
+
+def _initialize_worker(vectors, evaluators):
+    global _worker_vectors, _worker_evaluators
+    _worker_vectors = vectors
+    _worker_evaluators = evaluators
+
+
+def _run_unit(evaluator_name, method_name, args):
+    evaluator = _worker_evaluators[evaluator_name]
+    return getattr(evaluator, method_name)(_worker_vectors, *args)
+
+
+class TaskScheduler:
+    def __init__(
+        self,
+        vectors,
+        evaluators,
+        n_jobs: int = None,
+        share_normalized: bool = False,
+        debugging_mode: bool = False,
+    ):
+        """Constructor. It stores the objects needed by the workers, which are started when the scheduler is
+        entered as a context manager.
+
+        Parameters
+        ----------
+        vectors : EmbeddingStore
+            Embedding store containing the vectors.
+        evaluators : Dict[str, object]
+            Evaluators of the tasks, by name. They are handed to each worker when it starts, so they are not
+            sent again with each unit of work.
+        n_jobs : int
+            Maximum number of worker processes. None or -1 to use all the available cores.
+        share_normalized : bool
+            True to place also the normalized vectors in shared memory, so that they are computed only once.
+        debugging_mode : bool
+        """
+        self.vectors = vectors
+        self.evaluators = evaluators
+        self.n_jobs = self.get_n_workers(n_jobs)
+        self.share_normalized = share_normalized
+        self.debugging_mode = debugging_mode
+
+        self.shared_vectors = None
+        self.pool = None
+
+    @staticmethod
+    def get_n_workers(n_jobs: int = None) -> int:
+        """It returns the number of worker processes corresponding to the n_jobs parameter.
+
+        Parameters
+        ----------
+        n_jobs : int
+            Maximum number of worker processes. None or -1 to use all the available cores.
+
+        Returns
+        -------
+            The number of worker processes.
+        """
+        if n_jobs is None or n_jobs == -1:
+            return os.cpu_count() or 1
+        if n_jobs < 1:
+            raise ValueError("n_jobs must be a positive number or -1, got " + str(n_jobs))
+        return n_jobs
+
+    def __enter__(self):
+        self.shared_vectors = self.vectors.share(normalized=self.share_normalized)
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.n_jobs,
+            initializer=_initialize_worker,
+            initargs=(self.shared_vectors, self.evaluators),
+        )
+        # the workers are started now, before other threads of this process submit units of work
+        self.pool.submit(int).result()
+
+        if self.debugging_mode:
+            print("Task scheduler started with " + str(self.n_jobs) + " workers")
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.pool.shutdown(wait=True)
+        self.pool = None
+
+        if self.shared_vectors is not self.vectors:
+            self.shared_vectors.release()
+        self.shared_vectors = None
+
+    def submit(self, evaluator_name: str, method_name: str, *args):
+        """It schedules a unit of work, i.e. the call of a method of an evaluator with the embedding store as first
+        argument.
+
+        Parameters
+        ----------
+        evaluator_name : str
+            Name of the evaluator, as key of the evaluators dictionary.
+        method_name : str
+            Name of the method of the evaluator to call.
+        args
+            Further arguments of the method. They must be picklable.
+
+        Returns
+        -------
+            The future of the result of the method.
+        """
+        return self.pool.submit(_run_unit, evaluator_name, method_name, args)
@@ -1,7 +1,23 @@
 import pandas as pd
 import json
+import os
+import warnings
 import numpy as np
+from itertools import islice
+from typing import List
 from evaluation_framework.abstract_dataManager import AbstractDataManager
+from evaluation_framework.compactVocabulary import CompactVocabulary
+from evaluation_framework.goldStandardReader import (
+    read_analogy_questions,
+    read_document_entities,
+    read_relatedness_file,
+)
+from evaluation_framework.embeddingStore import EmbeddingStore, get_compute_dtype
+
+# number of lines of the vectors file parsed at once
+chunk_size = 10000
+# suffix of the binary cache written next to the vectors file
+cache_suffix = ".cache"
 
 """
 It models how to manage vectors provided in TXT file.
@@ -9,14 +25,20 @@ It models how to manage vectors provided in TXT file.
 
 
 class DataManager(AbstractDataManager):
-    def __init__(self, debugging_mode: bool):
+    # precision of the vectors, see EmbeddingStore
+    dtype = "float64"
+
+    def __init__(self, debugging_mode: bool, dtype: str = "float64"):
         """Constructor. It initializes the DataManager for each provided task.
 
         Parameters
         ----------
         debugging_mode : bool
+        dtype : str
+            {float64, float32, float16}, precision of the vectors. Default: float64
         """
         self.debugging_mode = debugging_mode
+        self.dtype = dtype
 
         self.taskDataManager = dict()
         self.taskDataManager["classification"] = ClassificationDataManager
@@ -29,8 +51,16 @@ class DataManager(AbstractDataManager):
         if self.debugging_mode:
             print("TXT data manager initialized")
 
-    def initialize_vectors(self, vector_filename: str, vector_size: int):
-        """
+    def initialize_vectors(
+        self, vector_filename: str, vector_size: int, entities: List[str] = None
+    ):
+        """It reads the vectors file once and keeps its content in an embedding store shared by all the tasks.
+        The first time a file is read, its vectors are streamed into a binary cache next to it. The following runs
+        open the cache as a memory-mapped matrix instead of parsing the file again.
+        If the entities are provided, only their vectors are copied from the cache: the memory used is then
+        proportional to the number of entities instead of the size of the file. If the cache cannot be written
+        (e.g. the directory is not writable), the file is parsed in memory, keeping only the lines of the entities
+        if they are provided.
 
         Parameters
         ----------
@@ -38,30 +68,316 @@ class DataManager(AbstractDataManager):
             Path of the file provided in input, which contains entities and the related vectors.
         vector_size: int
             Size of the vectors.
+        entities: List[str] or None
+            Names of the only entities whose vectors are kept. Default: None to keep all the vectors.
 
         Returns
         -------
-
+            The embedding store containing the vectors.
         """
-        return self.read_vector_file(vector_filename, vector_size)
+        names, W = self.read_vector_cache(vector_filename, vector_size)
+        if names is None and self.cache_vector_file(vector_filename, vector_size):
+            names, W = self.read_vector_cache(vector_filename, vector_size)
+
+        if names is None:
+            if entities is not None:
+                entities = set(entities)
+            names, W = self.read_vector_file(vector_filename, vector_size, entities)
+        elif entities is not None:
+            names, W = self.select_vectors(names, W, entities)
+        return EmbeddingStore(names, W, dtype=self.dtype)
 
     """
-    It reads the vectors file.
+    It returns the vocabulary and the matrix of the vectors of the entities provided in input, in the order of the 
+    rows of the vectors file. The matrix is copied in memory, so that the memory-mapped cache is no longer read.
+    
+    names: compact vocabulary of the entity names
+    W: matrix containing the related vectors
+    entities: list of entity names
+    """
+
+    def select_vectors(self, names, W, entities):
+        rows = names.lookup(entities)
+        rows = np.unique(rows[rows >= 0])
+        return (
+            CompactVocabulary.from_names([names.name(row) for row in rows]),
+            np.array(W[rows]),
+        )
+
+    """
+    It returns the paths of the cache of the vectors file: the .npy file containing the matrix, the .npy files 
+    containing the UTF-8 bytes of the entity names and their offsets, and the .json file containing the key of the 
+    vectors file.
+    
+    vector_filename: path of the file provided in input, which contains entities and the related vectors.
+    """
+
+    def get_cache_filenames(self, vector_filename):
+        prefix = vector_filename + cache_suffix
+        return (
+            prefix + ".npy",
+            prefix + ".names.npy",
+            prefix + ".offsets.npy",
+            prefix + ".json",
+        )
+
+    """
+    It returns the key identifying the content of the vectors file, i.e. its path, size and modification time, and 
+    the precision of the vectors.
     
     vector_filename: path of the file provided in input, which contains entities and the related vectors.
     vector_size: size of the vectors
     """
 
-    def read_vector_file(self, vector_filename, vec_size):
-        local_vectors = pd.read_csv(
-            vector_filename,
-            "\s+",
-            names=self.create_header(vec_size),
-            encoding="utf-8",
-            index_col=False,
+    def get_cache_key(self, vector_filename, vector_size):
+        stat = os.stat(vector_filename)
+        return {
+            "path": os.path.abspath(vector_filename),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "vector_size": vector_size,
+            "dtype": self.dtype,
+        }
+
+    """
+    It opens the cache of the vectors file, if it exists and it is up to date. The matrix can have unused rows after 
+    the vectors, e.g. for the header and the blank lines of the vectors file.
+    It returns the vocabulary of the entity names and the matrix, both memory-mapped, or None and None.
+    
+    vector_filename: path of the file provided in input, which contains entities and the related vectors.
+    vector_size: size of the vectors
+    """
+
+    def read_vector_cache(self, vector_filename, vector_size):
+        (
+            matrix_filename,
+            names_filename,
+            offsets_filename,
+            index_filename,
+        ) = self.get_cache_filenames(vector_filename)
+        try:
+            with open(index_filename, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index["key"] != self.get_cache_key(vector_filename, vector_size):
+                return None, None
+            W = np.load(matrix_filename, mmap_mode="r")
+            vocabulary = CompactVocabulary(
+                np.load(names_filename, mmap_mode="r"),
+                np.load(offsets_filename, mmap_mode="r"),
+            )
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+        if (
+            W.dtype != np.dtype(self.dtype)
+            or W.ndim != 2
+            or W.shape[0] < len(vocabulary)
+            or W.shape[1] != vector_size
+        ):
+            return None, None
+        W = W[: len(vocabulary)]
+
+        if self.debugging_mode:
+            print("Opened cached vectors " + matrix_filename)
+        return vocabulary, W
+
+    """
+    It parses the vectors file directly into the memory-mapped matrix of its cache, so that the vectors are never all 
+    kept in memory, and then it writes the rest of the cache. The matrix has a row for each line of the file.
+    It returns True if the cache has been written, False otherwise (e.g. the directory is not writable).
+    
+    vector_filename: path of the file provided in input, which contains entities and the related vectors.
+    vector_size: size of the vectors
+    """
+
+    def cache_vector_file(self, vector_filename, vector_size):
+        matrix_filename = self.get_cache_filenames(vector_filename)[0]
+        try:
+            W = np.lib.format.open_memmap(
+                matrix_filename + ".tmp",
+                mode="w+",
+                dtype=self.dtype,
+                shape=(self.count_lines(vector_filename), vector_size),
+            )
+            names = self.read_vector_file(vector_filename, vector_size, W=W)[0]
+            W.flush()
+            del W
+            os.replace(matrix_filename + ".tmp", matrix_filename)
+        except (OSError, ValueError) as e:
+            if self.debugging_mode:
+                print("Vectors cache not written: " + str(e))
+            try:
+                os.remove(matrix_filename + ".tmp")
+            except OSError:
+                pass
+            return False
+        return self.write_vector_cache(vector_filename, vector_size, names)
+
+    """
+    It writes the cache of the vectors file. The index is written last, so that an interrupted write leaves no
+    valid cache.
+    It returns True if the cache has been written, False otherwise (e.g. the directory is not writable).
+    
+    vector_filename: path of the file provided in input, which contains entities and the related vectors.
+    vector_size: size of the vectors
+    names: compact vocabulary of the entity names
+    W: matrix containing the related vectors, None if the matrix of the cache has already been written
+    """
+
+    def write_vector_cache(self, vector_filename, vector_size, names, W=None):
+        (
+            matrix_filename,
+            names_filename,
+            offsets_filename,
+            index_filename,
+        ) = self.get_cache_filenames(vector_filename)
+        index = {"key": self.get_cache_key(vector_filename, vector_size)}
+        arrays = [(names_filename, names.buffer), (offsets_filename, names.offsets)]
+        if W is not None:
+            arrays.insert(0, (matrix_filename, np.ascontiguousarray(W, dtype=self.dtype)))
+        try:
+            for filename, array in arrays:
+                with open(filename + ".tmp", "wb") as f:
+                    np.save(f, array)
+                os.replace(filename + ".tmp", filename)
+            with open(index_filename + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(index_filename + ".tmp", index_filename)
+        except OSError as e:
+            if self.debugging_mode:
+                print("Vectors cache not written: " + str(e))
+            return False
+        return True
+
+    """
+    It reads the vectors file.
+    The file is read in chunks of lines and the vectors are written directly into a preallocated matrix, 
+    while the entity names of each chunk are stored in a compact vocabulary.
+    It returns the compact vocabulary of the entity names and the matrix containing the related vectors.
+    
+    vector_filename: path of the file provided in input, which contains entities and the related vectors.
+    vector_size: size of the vectors
+    entities: optional set of entity names. If provided, only the vectors of these entities are kept.
+    W: optional matrix where the vectors are written, e.g. memory-mapped, with a row for each line of the file.
+    """
+
+    def read_vector_file(self, vector_filename, vec_size, entities=None, W=None):
+        if W is None:
+            n_lines = self.count_lines(vector_filename)
+            capacity = n_lines if entities is None else min(n_lines, len(entities))
+            W = np.empty((capacity, vec_size), dtype=self.dtype)
+        vocabularies = list()
+        n_vectors = 0
+
+        with open(vector_filename, "r", encoding="utf-8") as f:
+            first_chunk = True
+            while True:
+                lines = list(islice(f, chunk_size))
+                if len(lines) == 0:
+                    break
+
+                if first_chunk:
+                    first_chunk = False
+                    if self.is_word2vec_header(lines[0]):
+                        lines = lines[1:]
+
+                chunk_names, chunk_vectors = self.parse_vector_lines(
+                    lines, vec_size, entities
+                )
+
+                start = n_vectors
+                n_vectors += len(chunk_names)
+                if n_vectors > len(W):
+                    W = np.resize(W, (max(n_vectors, 2 * len(W)), vec_size))
+                W[start:n_vectors] = chunk_vectors
+                vocabularies.append(CompactVocabulary.from_names(chunk_names))
+
+        if self.debugging_mode:
+            print("Read " + str(n_vectors) + " vectors from " + vector_filename)
+
+        return CompactVocabulary.concatenate(vocabularies), W[:n_vectors]
 
+    """
+    It parses a chunk of lines of the vectors file.
+    Each line contains the entity name followed by its vector, separated by white spaces. 
+    The lines which do not contain exactly vec_size values are ignored, and reported in debugging mode: their 
+    entities are then reported as missing by the tasks.
+    It returns the list of entity names and the matrix containing the related vectors.
+    
+    lines: list of lines of the vectors file
+    vec_size: size of the vectors
+    entities: optional set of entity names. If provided, only the lines of these entities are parsed.
+    """
+
+    def parse_vector_lines(self, lines, vec_size, entities=None):
+        names = list()
+        values = list()
+        ignored = list()
+        for line in lines:
+            parts = line.split(None, 1)
+            if len(parts) == 0:
+                continue
+            if entities is not None and parts[0] not in entities:
+                continue
+            value = parts[1] if len(parts) > 1 else ""
+            # the values of all the lines are parsed at once, so a line with a wrong number of values would shift 
+            # the vectors of the following ones
+            if len(value.split()) != vec_size:
+                ignored.append(parts[0])
+                continue
+            names.append(parts[0])
+            values.append(value)
+
+        if self.debugging_mode and len(ignored) > 0:
+            print(
+                "Vectors ignored, as their size is not "
+                + str(vec_size)
+                + ": "
+                + ", ".join(ignored)
+            )
+
+        # the values are parsed with the computation precision, e.g. float32 for float16 vectors
+        dtype = get_compute_dtype(self.dtype)
+
+        with warnings.catch_warnings():
+            # raised by the lines with values which are not numbers, reported below
+            warnings.simplefilter("ignore", DeprecationWarning)
+            W = np.fromstring(" ".join(values), dtype=dtype, sep=" ")
+        if W.size == len(names) * vec_size:
+            return names, W.reshape((len(names), vec_size))
+
+        # np.fromstring stops at the first value which is not a number: float() reports it
+        W = np.array(
+            [[float(x) for x in value.split()] for value in values], dtype=dtype
         )
-        return local_vectors
+        return names, W.reshape((len(names), vec_size))
+
+    """
+    It returns the number of lines of the file.
+    
+    filename: path of the file
+    """
+
+    def count_lines(self, filename):
+        n_lines = 0
+        last_byte = b"\n"
+        with open(filename, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                n_lines += block.count(b"\n")
+                last_byte = block[-1:]
+        if last_byte != b"\n":
+            n_lines += 1
+        return n_lines
+
+    """
+    It checks whether the line is the header of a word2vec text file, i.e. the number of vectors and their size.
+    
+    line: first line of the vectors file
+    """
+
+    def is_word2vec_header(self, line):
+        parts = line.split()
+        return len(parts) == 2 and all(part.isdigit() for part in parts)
 
     """
     It returns a list which can be used as header, e.g. of a dataframe. 
@@ -91,7 +407,7 @@ class DataManager(AbstractDataManager):
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -142,30 +458,25 @@ class DataManager(AbstractDataManager):
     It returns a vocabulary containing all the entities of the vector file provided in input.
     It return a dictionary which key is the entity name and the value is a progressive value.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     """
 
     def create_vocab(self, vectors, vector_filename, vector_size):
-        words = vectors["name"]
-        vocab = {w: idx for idx, w in enumerate(words)}
-
-        return vocab
+        return vectors.vocab
 
     """
     It normalizes the vectors to unit length.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     vocab: dictionary which key is the entity name and the value is a progressive value
     """
 
     def normalize_vectors(self, vectors, vector_filename, vec_size, vocab):
-        W = vectors.iloc[:, 1:].to_numpy()
-        d = np.sqrt(np.sum(W ** 2, axis=1))
-        return (W.T / d).T
+        return vectors.normalized
 
 
 """
@@ -197,7 +508,7 @@ class ClassificationDataManager(DataManager):
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -222,13 +533,7 @@ class ClassificationDataManager(DataManager):
         gold.rename(columns={column_key: "name"}, inplace=True)
         gold.rename(columns={column_score: "label"}, inplace=True)
 
-        merged = pd.merge(gold, vectors, on="name", how="inner")
-        outputLeftMerge = pd.merge(gold, vectors, how="outer", indicator=True)
-        ignored = outputLeftMerge[outputLeftMerge["_merge"] == "left_only"][
-            gold.columns
-        ]
-
-        return merged, ignored
+        return vectors.merge(gold)
 
 
 """
@@ -268,7 +573,7 @@ class ClusteringDataManager(DataManager):
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -293,13 +598,7 @@ class ClusteringDataManager(DataManager):
         gold.rename(columns={column_key: "name"}, inplace=True)
         gold.rename(columns={column_score: "cluster"}, inplace=True)
 
-        merged = pd.merge(gold, vectors, on="name", how="inner")
-        outputLeftMerge = pd.merge(gold, vectors, how="outer", indicator=True)
-        ignored = outputLeftMerge[outputLeftMerge["_merge"] == "left_only"][
-            gold.columns
-        ]
-
-        return merged, ignored
+        return vectors.merge(gold)
 
 
 """
@@ -338,7 +637,7 @@ class DocumentSimilarityDataManager(DataManager):
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -359,42 +658,15 @@ class DocumentSimilarityDataManager(DataManager):
     ):
 
         entities = self.get_entities(goldStandard_filename)
-        merged = pd.merge(entities, vectors, on="name", how="inner")
-        outputLeftMerge = pd.merge(entities, vectors, how="outer", indicator=True)
-        ignored = outputLeftMerge[outputLeftMerge["_merge"] == "left_only"][
-            entities.columns
-        ]
-
-        return merged, ignored
+        return vectors.merge(entities)
 
     """
-    It reads the file used as gold standard which contains entities attached to the documents.
+    It reads the file used as gold standard which contains entities attached to the documents, either a JSON list of 
+    documents or a JSON lines file (.jsonl), see read_document_entities.
     """
 
     def get_entities(self, filename):
-        with open(filename) as f:
-            data = json.load(f)
-
-        dict_entities = {}
-        doc_list = list()
-        entities_list = list()
-        weight_list = list()
-        i = 0
-
-        for doc_obj in data:
-            i += 1
-            for annotation in doc_obj["annotations"]:
-                key = annotation["entity"]
-
-                doc_list.append(i)
-                entities_list.append(key)
-                weight_list.append(float(annotation["weight"]))
-
-        dict_entities["doc"] = doc_list
-        dict_entities["name"] = entities_list
-        dict_entities["weight"] = weight_list
-
-        return pd.DataFrame.from_dict(dict_entities)
+        return read_document_entities(filename)
 
 
 """
@@ -413,37 +685,22 @@ class EntityRelatednessDataManager(DataManager):
             print("Entity relatedness data manager initialized")
 
     """
-    It reads the dataset used as gold standard
+    It reads the dataset used as gold standard, either a TSV file (.tsv) or a text file, see read_relatedness_file. 
+    It returns a dictionary with each main entity as key and, as value, the list of its related entities ordered by 
+    gold rank, from the most related one.
     
     filename: path of the dataset
     columns: list of columns to retrieve
     """
 
     def read_file(self, filename, columns=None):
-        entities_groups = {}
-        related_entities = []
-
-        with open(filename) as f:
-            for i, line in enumerate(f):
-                key = line.rstrip().lstrip()
-
-                if i % 11 == 0:
-                    main_entitiy = key
-                    related_entities = []
-
-                else:
-                    related_entities.append(key)
-
-                if i % 11 == 10:
-                    entities_groups[main_entitiy] = related_entities
-
-        return entities_groups
+        return read_relatedness_file(filename)
 
     """
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -467,15 +724,7 @@ class EntityRelatednessDataManager(DataManager):
             entities = self.read_file(goldStandard_filename)
             goldStandard_data = pd.DataFrame({"name": list(entities.keys())})
 
-        merged = pd.merge(goldStandard_data, vectors, on="name", how="inner")
-        outputLeftMerge = pd.merge(
-            goldStandard_data, vectors, on="name", how="outer", indicator=True
-        )
-        ignored = outputLeftMerge[outputLeftMerge["_merge"] == "left_only"][
-            goldStandard_data.columns
-        ]
-
-        return merged, ignored
+        return vectors.merge(goldStandard_data)
 
 
 """
@@ -507,7 +756,7 @@ class RegressionDataManager(DataManager):
     It intersects the input file which contains the vectors and the file used as gold standard.
     It returns the merged dataframe and the dataframe of ignored entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -532,13 +781,7 @@ class RegressionDataManager(DataManager):
         gold.rename(columns={column_key: "name"}, inplace=True)
         gold.rename(columns={column_score: "label"}, inplace=True)
 
-        merged = pd.merge(gold, vectors, on="name", how="inner")
-        outputLeftMerge = pd.merge(gold, vectors, how="outer", indicator=True)
-        ignored = outputLeftMerge[outputLeftMerge["_merge"] == "left_only"][
-            gold.columns
-        ]
-
-        return merged, ignored
+        return vectors.merge(gold)
 
 
 """
@@ -568,10 +811,12 @@ class SemanticAnalogiesDataManager(DataManager):
         pass
 
     """
-    It intersects the input file which contains the vectors and the file used as gold standard.
-    It returns the merged dataframe and the dataframe of ignored entities.
+    It intersects the input file which contains the vectors and the file used as gold standard, i.e. a file with a 
+    question of 4 entities for each line, see read_analogy_questions.
+    It returns the matrix with the rows in the vectors of the 4 entities of each question whose entities all have a 
+    vector, and the list of the other questions, each one as the list of its entities.
     
-    vectors: dataframe containing the vectors
+    vectors: embedding store containing the vectors
     vector_filename: path of the input file which contains the vectors provided in input
     vector_size: size of the vectors
     goldStandard_filename: path of the dataset used as gold standard
@@ -590,19 +835,4 @@ class SemanticAnalogiesDataManager(DataManager):
         column_key=None,
         column_score=None,
     ):
-
-        vocab = self.create_vocab(vectors, vector_filename, vector_size)
-
-        full_data = []
-        with open(goldStandard_filename) as f:
-            for line in f:
-                full_data.append(line.rstrip().split())
-
-        data = [x for x in full_data if all(word in vocab for word in x)]
-
-        if len(data) == 0:
-            ignored = [x for x in full_data]
-        else:
-            ignored = [x for x in full_data if not x in data]
-
-        return data, ignored
+        return read_analogy_questions(vectors, goldStandard_filename)
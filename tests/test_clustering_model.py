@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from sklearn import metrics
+
+from evaluation_framework.Clustering.clustering_model import get_clustering_scores
+
+# sklearn metric of each score computed from the contingency table
+sklearn_metrics = {
+    "adjusted_rand_index": metrics.adjusted_rand_score,
+    "adjusted_mutual_info_score": metrics.adjusted_mutual_info_score,
+    "homogeneity_score": metrics.homogeneity_score,
+    "completeness_score": metrics.completeness_score,
+    "v_measure_score": metrics.v_measure_score,
+    "normalized_mutual_info_score": metrics.normalized_mutual_info_score,
+}
+
+
+def get_labels(seed):
+    random = np.random.RandomState(seed)
+    n_samples = random.randint(2, 300)
+    true_labels = random.randint(0, random.randint(1, 6), n_samples)
+    labels = random.randint(0, random.randint(1, n_samples + 1), n_samples)
+    if seed % 3 == 0:
+        # the noise vectors of DBSCAN are each in a cluster of its own
+        noise = random.rand(n_samples) < 0.5
+        labels = np.where(noise, n_samples + np.arange(n_samples), labels)
+    return true_labels, labels
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_clustering_scores_match_sklearn(seed):
+    true_labels, labels = get_labels(seed)
+    scores = get_clustering_scores(true_labels, labels)
+
+    for name, metric in sklearn_metrics.items():
+        assert np.isclose(
+            scores[name], metric(true_labels, labels), rtol=1e-10, atol=1e-12
+        ), name
+
+
+@pytest.mark.parametrize(
+    "true_labels, labels",
+    [
+        (np.zeros(20, dtype=int), np.zeros(20, dtype=int)),
+        (np.zeros(20, dtype=int), np.arange(20)),
+        (np.arange(20) % 4, np.zeros(20, dtype=int)),
+        (np.arange(20) % 4, np.arange(20)),
+        (np.arange(20), np.arange(20)),
+    ],
+)
+def test_clustering_scores_match_sklearn_with_single_clusters(true_labels, labels):
+    scores = get_clustering_scores(true_labels, labels)
+
+    for name, metric in sklearn_metrics.items():
+        assert np.isclose(
+            scores[name], metric(true_labels, labels), rtol=1e-10, atol=1e-12
+        ), name
@@ -0,0 +1,29 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from evaluation_framework.embeddingStore import EmbeddingStore, shared_memory
+
+
+@pytest.mark.skipif(shared_memory is None, reason="shared memory is not available")
+def test_shared_store_sends_the_vocabulary_through_shared_memory():
+    names = ["http://dbpedia.org/resource/Entity_" + str(i) for i in range(5000)]
+    matrix = np.random.RandomState(0).randn(len(names), 4)
+    shared = EmbeddingStore(names, matrix).share(normalized=True)
+    try:
+        data = pickle.dumps(shared)
+        # neither the vectors nor the names are copied
+        assert len(data) < 2000
+
+        store = pickle.loads(data)
+        assert store.vocab._index is not None
+        keys = [names[10], "missing", names[-1]]
+        np.testing.assert_array_equal(store.lookup(keys), [10, -1, len(names) - 1])
+        assert store.vocab.name(42) == names[42]
+        np.testing.assert_array_equal(store.matrix, matrix)
+        np.testing.assert_allclose(np.linalg.norm(store.normalized, axis=1), 1.0)
+        store.release()
+        assert store._vocab is None and store._matrix is None
+    finally:
+        shared.release()
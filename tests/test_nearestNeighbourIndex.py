@@ -0,0 +1,36 @@
+import numpy as np
+
+from evaluation_framework.nearestNeighbourIndex import (
+    ExactIndex,
+    IVFIndex,
+    recall_at_k,
+)
+
+
+def get_vectors(n_vectors=2000, vector_size=16):
+    W = np.random.RandomState(0).randn(n_vectors, vector_size)
+    return W / np.linalg.norm(W, axis=1, keepdims=True)
+
+
+def test_ivf_index_ignores_vectors_which_are_not_finite():
+    W = get_vectors()
+    queries = W[10:110]
+    exact = ExactIndex(W).search(queries, 5)
+
+    W[3, 5:] = np.nan
+    W[7, 0] = np.inf
+    index = IVFIndex(W, n_probe=8)
+    found = index.search(queries, 5)
+
+    assert np.isfinite(index.centroids).all()
+    assert not np.isin(found, [3, 7]).any()
+    assert (found >= 0).all()
+    assert recall_at_k(found, exact) > 0.8
+
+
+def test_ivf_index_without_vectors_which_are_not_finite():
+    W = get_vectors()
+    found = IVFIndex(W, n_probe=IVFIndex(W).n_lists).search(W[:50], 5)
+
+    # all the lists are searched, so the search is exact
+    assert recall_at_k(found, ExactIndex(W).search(W[:50], 5)) == 1.0
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from evaluation_framework.txt_dataManager import DataManager
+
+
+def write_vectors(directory, lines):
+    filename = str(directory / "vectors.txt")
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return filename
+
+
+@pytest.mark.parametrize("entities", [None, ["a", "b", "c", "d"]])
+def test_lines_with_wrong_size_are_ignored(tmp_path, entities):
+    filename = write_vectors(
+        tmp_path, ["a 1 2 3", "b 4 5", "c 6 7 8 9", "d 10 11 12"]
+    )
+
+    vectors = DataManager(False, dtype="float64").initialize_vectors(
+        filename, 3, entities
+    )
+
+    assert sorted(vectors.names) == ["a", "d"]
+    W = vectors.matrix[vectors.lookup(["a", "d"])]
+    assert np.array_equal(W, [[1, 2, 3], [10, 11, 12]])
+
+
+def test_parse_vector_lines_rejects_short_and_long_lines():
+    names, W = DataManager(False, dtype="float64").parse_vector_lines(
+        ["a 1 2 3\n", "b 4 5\n", "c 6 7 8 9\n", "d\n", "e 10 11 12\n"], 3
+    )
+
+    assert names == ["a", "e"]
+    assert np.array_equal(W, [[1, 2, 3], [10, 11, 12]])
+
+
+def test_parse_vector_lines_reports_values_which_are_not_numbers():
+    with pytest.raises(ValueError):
+        DataManager(False, dtype="float64").parse_vector_lines(
+            ["a 1 2 3\n", "b 4 x 6\n"], 3
+        )
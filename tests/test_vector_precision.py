@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluation_framework.evaluationManager import EvaluationManager
+from evaluation_framework.manager import FrameworkManager
+from evaluation_framework.txt_dataManager import DataManager
+
+# tasks whose scores are compared, Classification is left out as it takes most of the time
+tasks = ["Regression", "Clustering", "DocumentSimilarity", "EntityRelatedness"]
+vector_size = 10
+# largest difference of the scores with respect to float64, relative to the scores larger than 1. float16 keeps about
+# 3 significant digits, which moves the few entities at the boundary of two clusters
+tolerances = {"float32": 1e-6, "float16": 0.05}
+# models whose scores change from run to run
+random_models = ["M5"]
+# columns identifying a score in the comparison
+score_columns = ["task_name", "gold_standard_file", "model", "model_configuration", "metric"]
+
+
+@pytest.fixture(scope="module")
+def scores(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("vector_precision")
+    evaluation_manager = EvaluationManager(DataManager(False), False)
+    entities = evaluation_manager.get_gold_standard_entities(
+        evaluation_manager.create_evaluators(tasks, "cosine", 2)
+    )
+    W = np.random.RandomState(0).randn(len(entities), vector_size)
+    vector_filename = str(directory / "vectors.txt")
+    with open(vector_filename, "w", encoding="utf-8") as f:
+        for name, vector in zip(entities, W):
+            f.write(name + " " + " ".join("%.6f" % x for x in vector) + "\n")
+
+    # the comparison with the previous runs is written in the working directory
+    working_directory = os.getcwd()
+    os.chdir(str(directory))
+    try:
+        scores = dict()
+        for dtype in ["float64"] + list(tolerances):
+            result_directory = str(directory / dtype)
+            FrameworkManager().evaluate(
+                vector_filename,
+                vector_size=vector_size,
+                tasks=tasks,
+                compare_with=[],
+                result_directory_path=result_directory,
+                dtype=dtype,
+            )
+            results = pd.read_csv(
+                os.path.join(result_directory, "comparison_values.csv"), sep=" "
+            )
+            scores[dtype] = results[~results["model"].isin(random_models)]
+    finally:
+        os.chdir(working_directory)
+    return scores
+
+
+@pytest.mark.parametrize("dtype", list(tolerances))
+def test_scores_match_float64(scores, dtype):
+    reference = scores["float64"]
+    assert set(reference["task_name"]) == set(tasks)
+
+    merged = reference.merge(
+        scores[dtype], on=score_columns, how="outer", suffixes=("", "_" + dtype)
+    )
+    assert len(merged) == len(reference)
+
+    values = merged["score_value_" + dtype].to_numpy(dtype=np.float64)
+    reference_values = merged["score_value"].to_numpy(dtype=np.float64)
+    # the errors of the regression are not bounded, so the differences are relative to the scores larger than 1
+    difference = np.abs(values - reference_values) / np.maximum(1, np.abs(reference_values))
+    both_nan = np.isnan(values) & np.isnan(reference_values)
+    assert np.all(both_nan | (difference <= tolerances[dtype]))